@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark short Python tasks as callable jobs vs python -c commands
+
+Both run json.dumps on a small dict through the worker's runners: once as
+an exec job starting a fresh interpreter per task, once as a callable job
+in the worker's warm process pool.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add parent directory to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from src.worker import Worker
+
+RUNS = 100
+PAYLOAD = {'id': 1, 'tags': ['a', 'b'], 'ok': True}
+
+
+def measure(run) -> float:
+    """Median wall time in milliseconds of run() over RUNS calls"""
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        result = run()
+        samples.append((time.perf_counter() - start) * 1000)
+        assert result['success'], result['error']
+    return statistics.median(samples)
+
+
+def main():
+    """Run the callable benchmark"""
+    print("=== Callable Job Benchmark ===")
+    print()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "callable_bench.db")
+    worker = Worker("callable_bench", db_path)
+    code = f"import json; print(json.dumps({PAYLOAD!r}))"
+
+    try:
+        worker._run_callable('json:dumps', [PAYLOAD], None)  # Start the pool
+        process_ms = measure(lambda: worker._run_command([sys.executable, '-c', code], 60))
+        callable_ms = measure(lambda: worker._run_callable('json:dumps', [PAYLOAD], None))
+    finally:
+        worker.callable_pool.shutdown()
+
+    print(f"python -c per task (exec job): {process_ms:.3f} ms (median of {RUNS})")
+    print(f"Callable job in warm pool:     {callable_ms:.3f} ms (median of {RUNS})")
+    if callable_ms > 0:
+        print(f"Speedup: {process_ms / callable_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
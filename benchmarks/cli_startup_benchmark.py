@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark CLI startup time per subcommand
+
+Each sample runs `queuectl.py <command>` in a fresh interpreter against a
+scratch database. Cold runs use an empty bytecode cache so every module is
+compiled again; warm runs reuse a cache filled beforehand, as on a machine
+that has run the CLI before. Pass --max-warm-ms to fail when any warm median
+exceeds a budget.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add parent directory to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUEUECTL = os.path.join(ROOT, "queuectl.py")
+
+COMMANDS = [
+    ["--version"],
+    ["--help"],
+    ["status"],
+    ["list"],
+    ["dlq", "list"],
+    ["config", "get", "max-retries"],
+    ["config", "list"],
+    ["metrics"],
+]
+
+
+def run_once(command, workdir: str, pycache: str) -> float:
+    """Wall time of one CLI invocation in milliseconds"""
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # Warm runs need the cache written
+    start = time.perf_counter()
+    subprocess.run([sys.executable, QUEUECTL] + command, cwd=workdir, env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(command, workdir: str, runs: int):
+    """Median cold and warm times in milliseconds"""
+    cold = []
+    for _ in range(runs):
+        pycache = tempfile.mkdtemp()
+        cold.append(run_once(command, workdir, pycache))
+        shutil.rmtree(pycache, ignore_errors=True)
+
+    pycache = tempfile.mkdtemp()
+    run_once(command, workdir, pycache)  # Fill the bytecode cache
+    warm = [run_once(command, workdir, pycache) for _ in range(runs)]
+    shutil.rmtree(pycache, ignore_errors=True)
+
+    return statistics.median(cold), statistics.median(warm)
+
+
+def main():
+    """Run the CLI startup benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Samples per command and mode")
+    parser.add_argument("--max-warm-ms", type=float, help="Fail if a warm median exceeds this")
+    args = parser.parse_args()
+
+    print("=== CLI Startup Benchmark ===")
+    print()
+
+    workdir = tempfile.mkdtemp()
+    run_once(["status"], workdir, tempfile.mkdtemp())  # Create the database up front
+
+    print(f"{'Command':<28}{'Cold (ms)':>12}{'Warm (ms)':>12}")
+    slow = []
+    for command in COMMANDS:
+        cold, warm = measure(command, workdir, args.runs)
+        label = " ".join(command)
+        print(f"{label:<28}{cold:>12.1f}{warm:>12.1f}")
+        if args.max_warm_ms is not None and warm > args.max_warm_ms:
+            slow.append(label)
+
+    print()
+    print(f"Medians of {args.runs} runs each")
+    if slow:
+        print(f"Over the {args.max_warm_ms:.0f} ms warm budget: {', '.join(slow)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
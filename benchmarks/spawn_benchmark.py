@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-job process launch cost for trivial jobs
+
+Runs /bin/true through the worker's command runner as a shell command and
+as an argv (exec) job, next to the subprocess.run(shell=True) call workers
+made before, so the difference is the launch path alone. The shell gets
+the full path because `true` alone is a shell builtin.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add parent directory to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from src.launcher import spawn
+from src.worker import Worker
+
+RUNS = 500
+TRUE = '/bin/true'
+
+
+def measure(run) -> float:
+    """Median wall time in milliseconds of run() over RUNS calls"""
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def popen_argv():
+    """An argv job through subprocess.Popen instead of posix_spawn"""
+    process = subprocess.Popen([TRUE], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               start_new_session=True)
+    process.communicate()
+
+
+def spawn_argv():
+    """An argv job through the launcher alone"""
+    process = spawn([TRUE])
+    process.stdout.read()
+    process.stderr.read()
+    process.wait()
+
+
+def main():
+    """Run the spawn benchmark"""
+    print("=== Job Spawn Benchmark ===")
+    print()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "spawn_bench.db")
+    worker = Worker("spawn_bench", db_path)
+
+    results = [
+        ("subprocess.run(shell=True), before", lambda: subprocess.run(TRUE, shell=True, capture_output=True, text=True)),
+        ("Worker shell command (sh -c)", lambda: worker._run_command(TRUE, 10)),
+        ("Worker exec job (argv)", lambda: worker._run_command([TRUE], 10)),
+        ("subprocess.Popen argv", popen_argv),
+        ("launcher.spawn argv", spawn_argv),
+    ]
+    for name, run in results:
+        measure(run)  # Warm up page cache and imports
+        print(f"{name + ':':<38} {measure(run):.3f} ms per job (median of {RUNS})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark JobQueue/Config construction time at process startup
+
+Compares opening an up-to-date database (one PRAGMA user_version read)
+with re-running the full schema pass on every startup, which is what each
+construction did before versioned migrations.
+"""
+
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Add parent directory to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from src.job_queue import JobQueue
+from src.config import Config
+
+RUNS = 30
+
+# Runs in a fresh interpreter so every sample pays the real first-open cost
+CHILD_CODE = """
+import sys, time
+sys.path.insert(0, {root!r})
+from src.job_queue import JobQueue
+from src.config import Config
+from src.db import get_connection
+db_path = {db_path!r}
+get_connection(db_path)  # Connection setup is the same in both modes
+start = time.perf_counter()
+JobQueue(db_path)
+Config(db_path)
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def measure(db_path: str, reset_version: bool) -> float:
+    """Median construction time in milliseconds over RUNS fresh processes"""
+    samples = []
+    code = CHILD_CODE.format(root=ROOT, db_path=db_path)
+    for _ in range(RUNS):
+        if reset_version:
+            conn = sqlite3.connect(db_path)
+            conn.execute("PRAGMA user_version = 0")
+            conn.close()
+        result = subprocess.run([sys.executable, "-c", code],
+                                capture_output=True, text=True, check=True)
+        samples.append(float(result.stdout.strip()))
+    return statistics.median(samples)
+
+
+def main():
+    """Run the startup benchmark"""
+    print("=== JobQueue/Config Startup Benchmark ===")
+    print()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "startup_bench.db")
+    jq = JobQueue(db_path)
+    Config(db_path)
+    jq.enqueue_many({'id': f'bench_{i}', 'command': 'echo bench'} for i in range(1000))
+
+    full_pass = measure(db_path, reset_version=True)
+    versioned = measure(db_path, reset_version=False)
+
+    print(f"Full schema pass on every startup: {full_pass:.2f} ms (median of {RUNS})")
+    print(f"Up-to-date schema version check:   {versioned:.2f} ms (median of {RUNS})")
+    if versioned > 0:
+        print(f"Speedup: {full_pass / versioned:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
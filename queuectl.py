@@ -3,6 +3,7 @@
 QueueCTL - CLI-based background job queue system
 """
 
+import functools
 import json
 import signal
 import sys
@@ -10,15 +11,9 @@ import time
 from typing import Optional
 
 import typer
-from rich.console import Console
-from rich.table import Table
-from rich import print as rprint
 
-from src.job_queue import JobQueue
-from src.worker_manager import WorkerManager
-from src.config import Config
-from src.banner import show_startup_screen, show_welcome_message
-from src.interactive_shell import start_interactive_shell
+# Commands import rich and src modules where they use them, and the globals
+# below are built on first use, so each invocation pays only for what it runs
 
 app = typer.Typer(
     help="CLI-based background job queue system",
@@ -29,22 +24,78 @@ app = typer.Typer(
 worker_app = typer.Typer(help="Worker management commands")
 dlq_app = typer.Typer(help="Dead Letter Queue management")
 config_app = typer.Typer(help="Configuration management")
+daemon_app = typer.Typer(help="Supervisor daemon that owns the workers")
 
 app.add_typer(worker_app, name="worker")
 app.add_typer(dlq_app, name="dlq")
 app.add_typer(config_app, name="config")
+app.add_typer(daemon_app, name="daemon")
 
-console = Console()
-job_queue = JobQueue()
-worker_manager = WorkerManager(job_queue)
-config = Config()
+
+class _Deferred:
+    """Stands in for a global and builds it on first attribute access"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+
+    def resolve(self):
+        """The underlying object, built if needed"""
+        if self._instance is None:
+            self._instance = self._factory()
+        return self._instance
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+
+def _make_console():
+    from rich.console import Console
+    return Console()
+
+
+@functools.lru_cache(maxsize=None)
+def _daemon():
+    """Client for the daemon serving jobs.db, or None if none is running"""
+    from src.daemon import connect
+    return connect()
+
+
+def _daemon_or_local(name, local_factory):
+    """The daemon's object when one is running, otherwise a local one"""
+    client = _daemon()
+    if client is None:
+        return local_factory()
+    from src.daemon import RemoteObject
+    return RemoteObject(client, name, local_factory)
+
+
+def _make_job_queue():
+    from src.job_queue import JobQueue
+    return _daemon_or_local('job_queue', JobQueue)
+
+
+def _make_worker_manager():
+    from src.worker_manager import WorkerManager
+    return _daemon_or_local('worker_manager', lambda: WorkerManager(job_queue.resolve()))
+
+
+def _make_config():
+    from src.config import Config
+    return _daemon_or_local('config', Config)
+
+
+console = _Deferred(_make_console)
+job_queue = _Deferred(_make_job_queue)
+worker_manager = _Deferred(_make_worker_manager)
+config = _Deferred(_make_config)
 
 # Global worker manager for signal handling
 _global_worker_manager = None
 
 
 def signal_handler(signum, frame):
-    """Handle graceful shutdown on SIGINT"""
+    """Handle graceful shutdown on SIGINT and SIGTERM"""
     if _global_worker_manager:
         console.print("\n[yellow]Shutting down gracefully...[/yellow]")
         _global_worker_manager.stop_all()
@@ -52,6 +103,7 @@ def signal_handler(signum, frame):
 
 
 signal.signal(signal.SIGINT, signal_handler)
+signal.signal(signal.SIGTERM, signal_handler)
 
 
 @app.callback(invoke_without_command=True)
@@ -72,30 +124,45 @@ def main_callback(
     
     if interactive:
         # Start interactive shell
-        start_interactive_shell()
+        from src.interactive_shell import start_interactive_shell
+        start_interactive_shell(app)
         return
     
     if ctx.invoked_subcommand is None:
         # Show startup screen with ASCII art and automatically start interactive shell
+        from src.banner import show_startup_screen
+        from src.interactive_shell import start_interactive_shell
         show_startup_screen()
         
         # Automatically start interactive shell
-        start_interactive_shell()
+        start_interactive_shell(app)
         return
 
 
 @app.command()
 def enqueue(
-    job_json: str = typer.Argument(..., help="Job JSON string"),
+    job_json: Optional[str] = typer.Argument(None, help="Job JSON string"),
     priority: Optional[int] = typer.Option(None, "--priority", "-p", help="Job priority (higher numbers = higher priority)"),
-    force: bool = typer.Option(False, "--force", "-f", help="Replace existing job with same ID")
+    force: bool = typer.Option(False, "--force", "-f", help="Replace existing job with same ID"),
+    file: Optional[str] = typer.Option(None, "--file", help="Read one job JSON object per line from a file ('-' for stdin)")
 ):
     """
     Add a new job to the queue.
     
     Windows Example: queuectl enqueue "{\"id\":\"job1\",\"command\":\"echo Hello\"}" --priority 10
     Linux/Mac Example: queuectl enqueue '{"id":"job1","command":"echo Hello"}' --priority 10
+    Argv Example: queuectl enqueue '{"id":"job2","exec":["echo","Hello"],"env":{"LANG":"C"}}'
+    Python Example: queuectl enqueue '{"id":"job3","callable":"mypkg.tasks:resize","args":["a.png"]}'
+    Bulk Example: queuectl enqueue --file jobs.jsonl
     """
+    if file is not None:
+        _enqueue_file(file, priority, force)
+        return
+    
+    if job_json is None:
+        console.print("[red]Error:[/red] Provide a job JSON string or --file")
+        raise typer.Exit(1)
+    
     try:
         # Handle Windows command line JSON parsing
         job_json = job_json.strip()
@@ -119,8 +186,8 @@ def enqueue(
             job_data['priority'] = priority
         
         # Validate required fields
-        if "command" not in job_data:
-            raise typer.BadParameter("Job must contain 'command' field")
+        if not any(field in job_data for field in ("command", "exec", "callable")):
+            raise typer.BadParameter("Job must contain 'command', 'exec' or 'callable' field")
         
         try:
             job = job_queue.enqueue(job_data, force_replace=force)
@@ -147,24 +214,84 @@ def enqueue(
         raise typer.Exit(1)
 
 
+def _read_jobs_jsonl(stream, priority: Optional[int]):
+    """Lazily parse one job per line from a JSONL stream"""
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job_data = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+        if not isinstance(job_data, dict) or not any(field in job_data for field in ("command", "exec", "callable")):
+            raise ValueError(f"Job on line {line_number} must be an object with a 'command', 'exec' or 'callable' field")
+        if priority is not None:
+            job_data['priority'] = priority
+        yield job_data
+
+
+def _enqueue_file(path: str, priority: Optional[int], force: bool):
+    """Bulk enqueue jobs from a JSONL file or stdin"""
+    start_time = time.time()
+    try:
+        if path == '-':
+            counts = job_queue.enqueue_many(_read_jobs_jsonl(sys.stdin, priority), force_replace=force)
+        else:
+            with open(path, 'r', encoding='utf-8') as stream:
+                counts = job_queue.enqueue_many(_read_jobs_jsonl(stream, priority), force_replace=force)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error enqueuing jobs:[/red] {e}")
+        console.print("[dim]Chunks written before the error were kept; re-running skips jobs that already exist[/dim]")
+        raise typer.Exit(1)
+    
+    elapsed = time.time() - start_time
+    console.print(f"[green]OK[/green] Enqueued [bold]{counts['enqueued']}[/bold] job(s) in {elapsed:.2f}s")
+    if counts['replaced']:
+        console.print(f"  Replaced: {counts['replaced']}")
+    if counts['skipped']:
+        console.print(f"  Skipped (already exist): {counts['skipped']}")
+        console.print("[dim]Use --force to replace existing jobs[/dim]")
+
+
 
 
 
 @worker_app.command("start")
 def start_workers(
-    count: int = typer.Option(1, "--count", "-c", help="Number of workers to start")
+    count: int = typer.Option(1, "--count", "-c", help="Number of workers to start (the minimum when autoscaling)"),
+    max_workers: Optional[int] = typer.Option(None, "--max", "-m", help="Autoscale with queue depth up to this many workers"),
+    concurrency: Optional[int] = typer.Option(None, "--concurrency", "-j", help="Jobs each worker runs at once (default: worker-concurrency)")
 ):
     """Start worker processes"""
     global _global_worker_manager
     _global_worker_manager = worker_manager
     
     try:
-        if count < 1:
+        if max_workers is None and count < 1:
             console.print("[red]Error:[/red] Worker count must be at least 1")
             raise typer.Exit(1)
+        if max_workers is not None and (count < 0 or max_workers < max(count, 1)):
+            console.print("[red]Error:[/red] --max must be at least 1 and no less than --count")
+            raise typer.Exit(1)
+        if concurrency is not None and concurrency < 1:
+            console.print("[red]Error:[/red] --concurrency must be at least 1")
+            raise typer.Exit(1)
+        
+        started = f"[bold]{count}[/bold] worker(s)"
+        if max_workers is not None:
+            started += f", autoscaling up to [bold]{max_workers}[/bold]"
+        if concurrency is not None and concurrency > 1:
+            started += f", {concurrency} jobs at a time each"
+        
+        if _daemon() is not None:
+            worker_manager.start(count, max_workers, concurrency)
+            console.print(f"[green]OK[/green] Daemon started {started}")
+            console.print("[dim]Use 'worker stop' or 'daemon stop' to stop them[/dim]")
+            return
             
-        worker_manager.start(count)
-        console.print(f"[green]OK[/green] Started [bold]{count}[/bold] worker(s)")
+        worker_manager.start(count, max_workers, concurrency)
+        console.print(f"[green]OK[/green] Started {started}")
         console.print("[dim]Press Ctrl+C to stop workers gracefully[/dim]")
         
         # Keep the main process alive
@@ -185,6 +312,8 @@ def stop_workers():
         active_count = worker_manager.get_active_worker_count()
         if active_count == 0:
             console.print("[yellow]No active workers to stop[/yellow]")
+            if _daemon() is not None:
+                return
             # Also try to kill any background Python processes that might be workers
             console.print("[dim]Checking for background worker processes...[/dim]")
             try:
@@ -205,6 +334,37 @@ def stop_workers():
         raise typer.Exit(1)
 
 
+@worker_app.command("status")
+def worker_status():
+    """Show worker processes"""
+    from rich.table import Table
+    try:
+        workers = worker_manager.get_worker_status()
+        if not workers:
+            console.print("[yellow]No active workers[/yellow]")
+            if _daemon() is None:
+                console.print("[dim]Workers are tracked by the process that started them; "
+                              "run 'daemon start' to manage them from any terminal[/dim]")
+            return
+        
+        table = Table(title="Workers", show_header=True, header_style="bold magenta")
+        table.add_column("Worker", style="cyan")
+        table.add_column("Slot", justify="right")
+        table.add_column("PID", justify="right")
+        table.add_column("State")
+        table.add_column("Crashes", justify="right")
+        
+        for name, info in sorted(workers.items()):
+            state = "[green]running[/green]" if info['alive'] else f"[red]exited ({info['exitcode']})[/red]"
+            table.add_row(name, str(info.get('slot', '')), str(info['pid']), state, str(info.get('crashes', 0)))
+        
+        console.print(table)
+        
+    except Exception as e:
+        console.print(f"[red]Error getting worker status:[/red] {e}")
+        raise typer.Exit(1)
+
+
 @worker_app.command("kill-all")
 def kill_all_workers():
     """Force kill all Python worker processes (use with caution)"""
@@ -255,9 +415,77 @@ def kill_all_workers():
         raise typer.Exit(1)
 
 
+@daemon_app.command("start")
+def start_daemon(
+    workers: int = typer.Option(0, "--workers", "-w", help="Number of workers to start with (the minimum when autoscaling)"),
+    max_workers: Optional[int] = typer.Option(None, "--max-workers", "-m", help="Autoscale with queue depth up to this many workers"),
+    concurrency: Optional[int] = typer.Option(None, "--concurrency", "-j", help="Jobs each worker runs at once (default: worker-concurrency)")
+):
+    """Run the supervisor daemon in the foreground"""
+    from src.daemon import control_path, run_daemon
+    
+    if workers < 0:
+        console.print("[red]Error:[/red] Worker count can't be negative")
+        raise typer.Exit(1)
+    if max_workers is not None and max_workers < max(workers, 1):
+        console.print("[red]Error:[/red] --max-workers must be at least 1 and no less than --workers")
+        raise typer.Exit(1)
+    if concurrency is not None and concurrency < 1:
+        console.print("[red]Error:[/red] --concurrency must be at least 1")
+        raise typer.Exit(1)
+    
+    if _daemon() is not None:
+        console.print("[yellow]A daemon is already running[/yellow] (see 'daemon status')")
+        raise typer.Exit(1)
+    
+    try:
+        console.print(f"[green]OK[/green] Daemon listening on [bold]{control_path('jobs.db')}[/bold]")
+        console.print("[dim]Press Ctrl+C or run 'daemon stop' to stop it[/dim]")
+        run_daemon(workers=workers, max_workers=max_workers, concurrency=concurrency)
+    except Exception as e:
+        console.print(f"[red]Error running daemon:[/red] {e}")
+        raise typer.Exit(1)
+
+
+@daemon_app.command("stop")
+def stop_daemon():
+    """Stop the daemon and its workers"""
+    client = _daemon()
+    if client is None:
+        console.print("[yellow]No daemon running[/yellow]")
+        return
+    
+    try:
+        client.call('daemon.shutdown')
+        console.print("[green]OK[/green] Daemon is stopping its workers and exiting")
+    except Exception as e:
+        console.print(f"[red]Error stopping daemon:[/red] {e}")
+        raise typer.Exit(1)
+
+
+@daemon_app.command("status")
+def daemon_status():
+    """Show whether a daemon is running"""
+    client = _daemon()
+    if client is None:
+        console.print("[yellow]No daemon running[/yellow]")
+        return
+    
+    try:
+        info = client.call('daemon.ping')
+        workers = client.call('worker_manager.get_active_worker_count')
+        console.print(f"[green]Daemon running[/green] (PID {info['pid']}, since {info['started_at']})")
+        console.print(f"  Database: {info['db_path']}")
+        console.print(f"  Active workers: {workers}")
+    except Exception as e:
+        console.print(f"[red]Error querying daemon:[/red] {e}")
+        raise typer.Exit(1)
+
+
 @app.command()
 def status():
     """Show system status"""
+    from rich.table import Table
     try:
         job_status = job_queue.get_status()
         active_workers = worker_manager.get_active_worker_count()
@@ -269,6 +497,10 @@ def status():
         
         table.add_row("Active Workers", str(active_workers))
         table.add_row("Pending Jobs", str(job_status.get('pending', 0)))
+        # Keys arrive as strings when answered by the daemon
+        by_priority = {int(priority): count for priority, count in job_queue.get_priority_counts('pending').items()}
+        if len(by_priority) > 1:
+            table.add_row("  by Priority", ", ".join(f"{priority}: {count}" for priority, count in sorted(by_priority.items(), reverse=True)))
         table.add_row("Processing Jobs", str(job_status.get('processing', 0)))
         table.add_row("Completed Jobs", str(job_status.get('completed', 0)))
         table.add_row("Failed Jobs", str(job_status.get('failed', 0)))
@@ -286,6 +518,7 @@ def list_jobs(
     state: Optional[str] = typer.Option(None, "--state", "-s", help="Filter by job state")
 ):
     """List jobs, optionally filtered by state"""
+    from rich.table import Table
     try:
         jobs = job_queue.list_jobs(state)
         
@@ -438,6 +671,7 @@ def list_jobs(
 @dlq_app.command("list")
 def list_dlq():
     """List jobs in Dead Letter Queue"""
+    from rich.table import Table
     try:
         jobs = job_queue.list_jobs('dead')
         
@@ -518,9 +752,11 @@ def retry_dlq_job(job_id: str = typer.Argument(..., help="Job ID to retry")):
 def set_config(key: str = typer.Argument(..., help="Configuration key"), 
                value: str = typer.Argument(..., help="Configuration value")):
     """Set configuration value"""
+    from src.config import Config
+    from src.db import SYNCHRONOUS_MODES
     try:
         # Validate configuration keys
-        valid_keys = ['max-retries', 'backoff-base']
+        valid_keys = list(Config.DEFAULTS)
         if key not in valid_keys:
             console.print(f"[red]Error:[/red] Invalid config key")
             console.print(f"[yellow]Valid keys:[/yellow] [cyan]{', '.join(valid_keys)}[/cyan]")
@@ -543,6 +779,88 @@ def set_config(key: str = typer.Argument(..., help="Configuration key"),
             except ValueError as e:
                 console.print(f"[red]Error:[/red] backoff-base must be a number greater than 1")
                 raise typer.Exit(1)
+        elif key in ('worker-poll-interval', 'worker-max-backoff', 'worker-wake-timeout',
+                     'worker-restart-backoff', 'worker-restart-max-backoff', 'autoscale-interval', 'autoscale-max-wait', 'autoscale-idle-seconds'):
+            try:
+                if float(value) <= 0:
+                    raise ValueError(f"{key} must be positive")
+            except ValueError:
+                console.print(f"[red]Error:[/red] {key} must be a positive number of seconds")
+                raise typer.Exit(1)
+        elif key == 'metrics-retention-days':
+            try:
+                if float(value) <= 0:
+                    raise ValueError("metrics-retention-days must be positive")
+            except ValueError:
+                console.print(f"[red]Error:[/red] metrics-retention-days must be a positive number of days")
+                raise typer.Exit(1)
+        elif key == 'snapshot-ttl':
+            try:
+                if float(value) < 0:
+                    raise ValueError("snapshot-ttl must not be negative")
+            except ValueError:
+                console.print(f"[red]Error:[/red] snapshot-ttl must be a number of seconds, 0 or more")
+                raise typer.Exit(1)
+        elif key == 'worker-batch-size':
+            try:
+                if int(value) < 1:
+                    raise ValueError("worker-batch-size must be at least 1")
+            except ValueError:
+                console.print(f"[red]Error:[/red] worker-batch-size must be a positive integer")
+                raise typer.Exit(1)
+        elif key in ('worker-lease-seconds', 'scheduler-lease-seconds'):
+            try:
+                if int(value) < 3:
+                    raise ValueError(f"{key} must be at least 3")
+            except ValueError:
+                console.print(f"[red]Error:[/red] {key} must be an integer of at least 3")
+                raise typer.Exit(1)
+        elif key == 'scheduler-window':
+            try:
+                if int(value) < 1:
+                    raise ValueError("scheduler-window must be at least 1")
+            except ValueError:
+                console.print(f"[red]Error:[/red] scheduler-window must be a positive integer")
+                raise typer.Exit(1)
+        elif key == 'worker-max-jobs':
+            try:
+                if int(value) < 0:
+                    raise ValueError("worker-max-jobs can't be negative")
+            except ValueError:
+                console.print(f"[red]Error:[/red] worker-max-jobs must be a non-negative integer (0 = unlimited)")
+                raise typer.Exit(1)
+        elif key == 'worker-max-rss-mb':
+            try:
+                if float(value) < 0:
+                    raise ValueError("worker-max-rss-mb can't be negative")
+            except ValueError:
+                console.print(f"[red]Error:[/red] worker-max-rss-mb must be a non-negative number (0 = unlimited)")
+                raise typer.Exit(1)
+        elif key == 'output-preview-bytes':
+            try:
+                if int(value) < 2:
+                    raise ValueError("output-preview-bytes must be at least 2")
+            except ValueError:
+                console.print(f"[red]Error:[/red] output-preview-bytes must be an integer of at least 2")
+                raise typer.Exit(1)
+        elif key in ('worker-concurrency', 'autoscale-jobs-per-worker'):
+            try:
+                if int(value) < 1:
+                    raise ValueError(f"{key} must be at least 1")
+            except ValueError:
+                console.print(f"[red]Error:[/red] {key} must be a positive integer")
+                raise typer.Exit(1)
+        elif key == 'db-synchronous':
+            if value.upper() not in SYNCHRONOUS_MODES:
+                console.print(f"[red]Error:[/red] db-synchronous must be one of {', '.join(SYNCHRONOUS_MODES)}")
+                raise typer.Exit(1)
+            value = value.upper()
+        elif key in ('db-busy-timeout-ms', 'db-mmap-size', 'db-cache-size'):
+            try:
+                int(value)
+            except ValueError:
+                console.print(f"[red]Error:[/red] {key} must be an integer")
+                raise typer.Exit(1)
         
         config.set(key, value)
         console.print(f"[green]OK[/green] Configuration updated: [bold]{key}[/bold] = {value}")
@@ -555,9 +873,10 @@ def set_config(key: str = typer.Argument(..., help="Configuration key"),
 @config_app.command("get")
 def get_config(key: str = typer.Argument(..., help="Configuration key")):
     """Get configuration value"""
+    from src.config import Config
     try:
         # Validate configuration key
-        valid_keys = ['max-retries', 'backoff-base']
+        valid_keys = list(Config.DEFAULTS)
         if key not in valid_keys:
             console.print(f"[red]'{key}' is not a valid config key[/red]")
             console.print(f"[yellow]Valid keys:[/yellow] [cyan]{', '.join(valid_keys)}[/cyan]")
@@ -577,6 +896,7 @@ def get_config(key: str = typer.Argument(..., help="Configuration key")):
 @config_app.command("list")
 def list_config():
     """List all configuration values"""
+    from rich.table import Table
     try:
         configs = config.list_all()
         
@@ -591,7 +911,31 @@ def list_config():
         
         descriptions = {
             'max-retries': 'Maximum number of retry attempts for failed jobs',
-            'backoff-base': 'Base for exponential backoff calculation (delay = base^attempts)'
+            'backoff-base': 'Base for exponential backoff calculation (delay = base^attempts)',
+            'worker-poll-interval': 'Seconds an idle worker waits before its first re-poll',
+            'worker-max-backoff': 'Maximum seconds between polls when wakeup sockets are unavailable',
+            'worker-wake-timeout': 'Maximum seconds an idle worker blocks waiting for a wakeup before re-polling',
+            'worker-batch-size': 'Jobs a worker leases per claim and commits results for together',
+            'worker-concurrency': 'Jobs each worker runs at once; above 1 a worker runs them as asyncio subprocesses',
+            'worker-lease-seconds': 'Seconds a claimed job stays leased without a heartbeat before it is requeued',
+            'worker-max-jobs': 'Jobs a worker runs before it is replaced by a fresh process (0 = unlimited)',
+            'worker-max-rss-mb': 'Resident memory in MiB at which a worker is replaced by a fresh process (0 = unlimited)',
+            'worker-restart-backoff': 'Seconds before restarting a crashed worker, doubling with each crash in a row',
+            'worker-restart-max-backoff': 'Maximum seconds between restarts of a crash-looping worker',
+            'output-preview-bytes': 'Bytes of job output kept in memory and in the job row (first and last half)',
+            'output-spool-dir': 'Directory for the gzipped full output of jobs beyond the preview (empty = <db name>-spool)',
+            'scheduler-lease-seconds': 'Seconds the elected scheduler holds its lease between renewals',
+            'scheduler-window': 'Number of upcoming deadlines the scheduler keeps in memory',
+            'autoscale-interval': 'Seconds between autoscaling decisions',
+            'autoscale-jobs-per-worker': 'Ready jobs each autoscaled worker is expected to keep up with',
+            'autoscale-max-wait': 'Seconds the oldest ready job may wait before another worker is added',
+            'autoscale-idle-seconds': 'Seconds of surplus capacity before one worker is removed',
+            'metrics-retention-days': 'Days raw system_metrics rows are kept; per-minute rollups are kept 2 days, per-hour 90 days, per-day for good',
+            'snapshot-ttl': 'Seconds the dashboard reuses status and metrics while nothing changes (0 = always recompute)',
+            'db-synchronous': 'SQLite synchronous mode for new connections (OFF, NORMAL, FULL, EXTRA)',
+            'db-busy-timeout-ms': 'Milliseconds to wait for a database lock before failing',
+            'db-mmap-size': 'Bytes of the database file to memory-map',
+            'db-cache-size': 'SQLite page cache size (negative values are KiB)'
         }
         
         for key, value in configs.items():
@@ -608,7 +952,8 @@ def list_config():
 @app.command("shell")
 def interactive_shell():
     """Start interactive shell mode"""
-    start_interactive_shell()
+    from src.interactive_shell import start_interactive_shell
+    start_interactive_shell(app)
 
 
 @app.command("dashboard")
@@ -621,7 +966,7 @@ def web_dashboard(
         from src.web_dashboard import start_dashboard
         
         console.print(f"[#bbfa01] Starting web dashboard at http://{host}:{port}[/#bbfa01]")
-        dashboard = start_dashboard(job_queue, config, host, port)
+        dashboard = start_dashboard(job_queue.resolve(), config.resolve(), host, port)
         
         console.print("[dim]Press Ctrl+C to stop the dashboard[/dim]")
         
@@ -645,14 +990,15 @@ def show_metrics(
     hours: int = typer.Option(24, "--hours", help="Hours of metrics to show")
 ):
     """Show system metrics and statistics"""
+    from rich.table import Table
     try:
         metrics = job_queue.get_system_metrics(hours)
         
         console.print(f"\n[#bbfa01] System Metrics (Last {hours} hours)[/#bbfa01]")
         
         # Job counts
-        table = Table(title="Job Counts", show_header=True, header_style="#bbfa01 bold")
-        table.add_column("State", style="#bbfa01")
+        table = Table(title="Job Outcomes", show_header=True, header_style="#bbfa01 bold")
+        table.add_column("Outcome", style="#bbfa01")
         table.add_column("Count", justify="right", style="white")
         
         for state, count in metrics['job_counts'].items():
@@ -663,6 +1009,8 @@ def show_metrics(
         # Performance metrics
         console.print(f"\n[#bbfa01]Performance:[/#bbfa01]")
         console.print(f"  Average execution time: {metrics['avg_execution_time_ms']:.0f}ms")
+        console.print(f"  Median / 95th percentile: {metrics['p50_execution_time_ms']:.0f}ms / "
+                      f"{metrics['p95_execution_time_ms']:.0f}ms (max {metrics['max_execution_time_ms']:.0f}ms)")
         console.print(f"  Jobs per hour: {metrics['jobs_per_hour']:.1f}")
         console.print(f"  Success rate: {metrics['success_rate_percent']:.1f}%")
         
@@ -0,0 +1,293 @@
+"""
+Asyncio worker that runs many jobs concurrently in one process
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Union
+
+from .callables import CallablePool, kill_executor, run_callable
+from .launcher import job_environment
+from .notify import WakeListener
+from .output_capture import OutputCapture
+from .worker import Worker, callable_result, command_result, failed_result, kill_process_group
+
+
+async def _pump(stream: asyncio.StreamReader, capture: OutputCapture):
+    """Copy a subprocess stream into a capture until EOF"""
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        capture.write(chunk)
+
+
+class AsyncWorker(Worker):
+    """Worker that keeps up to `concurrency` jobs running at once
+
+    Commands run as asyncio subprocesses, so I/O-bound jobs (curl, rsync,
+    dumps) get many concurrent slots for the memory of one interpreter.
+    Claims, leases, retries, timeouts and recycling behave as in Worker.
+    Database calls run on a single helper thread so the event loop never
+    blocks on a SQLite lock, and the results of jobs that finish close
+    together are committed in one transaction.
+    """
+
+    def __init__(self, worker_id: str, db_path: str = "jobs.db", lock_dir: str = "locks",
+                 exit_when_idle: bool = True, concurrency: int = 10):
+        super().__init__(worker_id, db_path, lock_dir, exit_when_idle)
+        self.concurrency = max(1, concurrency)
+        self.callable_pool = CallablePool(min(self.concurrency, os.cpu_count() or 1))
+        self._running: Dict[str, asyncio.Task] = {}
+        self._flushing: List[Dict[str, Any]] = []  # Updates being committed by _flush
+        # Guards _running and the pending updates against the heartbeat thread
+        self._leases_lock = threading.Lock()
+        self._db: Optional[ThreadPoolExecutor] = None
+        self._woken: Optional[asyncio.Event] = None
+
+    def start(self):
+        """Run jobs until stopped, idle or due for recycling
+
+        On stop no new jobs are claimed and the running ones finish first.
+        """
+        self.running = True
+        self.logger.info(f"Worker {self.worker_id} started (async, up to {self.concurrency} jobs)")
+        self._start_heartbeat()
+        self._wake = WakeListener(self.db_path)
+        self._db = ThreadPoolExecutor(max_workers=1)
+
+        try:
+            asyncio.run(self._main())
+        except KeyboardInterrupt:
+            self.logger.info("Worker interrupted")
+        finally:
+            wake, self._wake = self._wake, None
+            wake.close()
+            self._stop_heartbeat()
+            self._db.shutdown()
+            self._release_prefetched()
+            self.callable_pool.shutdown()
+            self.logger.info(f"Worker {self.worker_id} stopped")
+
+    async def _main(self):
+        """Claim jobs into free slots and wait for completions or wakeups"""
+        loop = asyncio.get_running_loop()
+        wake = self._wake
+        self._woken = asyncio.Event()
+        if wake.available:
+            loop.add_reader(wake.sock, self._on_wake)
+
+        poll_interval = self.config.get_float('worker-poll-interval', 0.05)
+        max_backoff = self.config.get_float('worker-max-backoff', 1.0)
+        wake_timeout = self.config.get_float('worker-wake-timeout', 5.0)
+        idle_delay = poll_interval
+        idle_since = None
+        max_idle_before_check = 30  # Check for scheduled jobs after 30 seconds idle
+
+        try:
+            while self.running and not self.recycle:
+                try:
+                    free = self.concurrency - len(self._running)
+                    if free > 0:
+                        jobs = await self._db_call(
+                            self.job_queue.claim_batch, self.worker_id, free, self.lease_seconds
+                        )
+                        for job in jobs:
+                            task = loop.create_task(self._run_job(job))
+                            with self._leases_lock:
+                                self._running[job['id']] = task
+
+                    if self._running:
+                        idle_delay = poll_interval
+                        idle_since = None
+                        await self._wait(wake_timeout if wake.available else max_backoff)
+                    else:
+                        if idle_since is None:
+                            idle_since = time.time()
+                        if self.exit_when_idle and time.time() - idle_since >= max_idle_before_check:
+                            if await self._db_call(self.job_queue.seconds_until_next_due) is None:
+                                self.logger.info("No more jobs to process - worker will exit")
+                                break
+                            idle_since = time.time()
+
+                        if wake.available:
+                            await self._wait(await self._db_call(self._idle_wait, wake_timeout, poll_interval))
+                        else:
+                            await self._wait(self._idle_backoff(idle_delay))
+                            idle_delay = min(idle_delay * 2, max_backoff)
+
+                    await self._flush()
+                except Exception as e:
+                    self.logger.error(f"Error in worker loop: {e}")
+                    await asyncio.sleep(5)  # Wait longer on error
+        finally:
+            if self._running:
+                self.logger.info(f"Waiting for {len(self._running)} running job(s) to finish")
+                await asyncio.gather(*self._running.values(), return_exceptions=True)
+            await self._flush()
+            if wake.available:
+                loop.remove_reader(wake.sock)
+
+    async def _run_job(self, job: Dict[str, Any]):
+        """Run one claimed job and record its outcome"""
+        start_time = self._begin_job(job)
+        try:
+            if job.get('callable'):
+                result = await self._run_callable_async(job['callable'], job.get('args'), job.get('kwargs'),
+                                                        job.get('timeout_seconds', 300))
+            else:
+                result = await self._run_command_async(job.get('exec') or job['command'],
+                                                       job.get('timeout_seconds', 300),
+                                                       job['id'], job.get('env'), job.get('cwd'))
+            self._finish_job(job, result, start_time)
+        except Exception as e:
+            self.logger.error(f"Error executing job {job['id']}: {e}")
+            self._handle_job_failure(job, str(e), 0)
+        finally:
+            with self._leases_lock:
+                del self._running[job['id']]
+            self.jobs_processed += 1
+            if not self.recycle and self._should_recycle():
+                self.recycle = True  # Stop claiming; the running jobs still finish
+
+    async def _run_command_async(self, command: Union[str, List[str]], timeout_seconds: int = 300,
+                                 job_id: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+                                 cwd: Optional[str] = None) -> Dict[str, Any]:
+        """Execute a shell command or argv list without blocking the event loop"""
+        start_time = time.time()
+        stdout, stderr = self._captures(job_id)
+
+        try:
+            # Own process group, so a timeout kills the whole command and not just the shell
+            options = dict(stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                           env=job_environment(env), cwd=cwd, start_new_session=True)
+            if isinstance(command, str):
+                process = await asyncio.create_subprocess_shell(command, **options)
+            else:
+                process = await asyncio.create_subprocess_exec(*command, **options)
+            try:
+                await asyncio.wait_for(asyncio.gather(
+                    _pump(process.stdout, stdout), _pump(process.stderr, stderr), process.wait()
+                ), timeout_seconds)
+            except asyncio.TimeoutError:
+                kill_process_group(process)
+                await process.wait()
+                stdout.discard()
+                return failed_result(f'Command timed out after {timeout_seconds} seconds', start_time)
+        except Exception as e:
+            stdout.discard()
+            return failed_result(f"Failed to execute command: {str(e)}", start_time)
+
+        stdout.close()
+        return command_result(process.returncode, stdout, stderr, start_time)
+
+    async def _run_callable_async(self, spec: str, args: Optional[List], kwargs: Optional[Dict],
+                                  timeout_seconds: int = 300) -> Dict[str, Any]:
+        """Run a Python callable job in the process pool without blocking the event loop
+
+        The pool is shared by every callable job this worker is running, so
+        when one of them times out or crashes its pool process, the others
+        fail with BrokenProcessPool through no fault of their own. Those are
+        run again rather than failed: on the fresh pool if another job's
+        timeout killed the old one, or in a process of their own after a
+        crash, since any of the jobs sharing the pool may have caused it.
+        """
+        start_time = time.time()
+        isolated = False
+        while True:
+            if isolated:
+                executor = self.callable_pool.isolated()
+            else:
+                executor = self.callable_pool.executor
+            try:
+                future = asyncio.wrap_future(executor.submit(run_callable, spec, args, kwargs))
+                ok, text = await asyncio.wait_for(future, timeout_seconds)
+            except asyncio.TimeoutError:
+                if isolated:
+                    kill_executor(executor)
+                else:
+                    self.callable_pool.kill(executor)
+                return failed_result(f'Callable timed out after {timeout_seconds} seconds', start_time)
+            except BrokenProcessPool as e:
+                if isolated:
+                    # Its own process died, so this job is the one crashing
+                    return failed_result(f"Failed to run callable: {str(e)}", start_time)
+                if not self.callable_pool.was_killed(executor):
+                    self.callable_pool.discard(executor)
+                    isolated = True
+                continue
+            except Exception as e:
+                if isolated:
+                    executor.shutdown(wait=False)
+                return failed_result(f"Failed to run callable: {str(e)}", start_time)
+            if isolated:
+                executor.shutdown(wait=False)
+            return callable_result(ok, text, start_time)
+
+    async def _wait(self, timeout: float):
+        """Sleep until a job finishes, a wakeup arrives or timeout passes"""
+        woken = asyncio.ensure_future(self._woken.wait())
+        try:
+            await asyncio.wait(set(self._running.values()) | {woken}, timeout=timeout,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            woken.cancel()
+        self._woken.clear()
+
+    def _on_wake(self):
+        """Drain the wake socket and wake the main loop"""
+        try:
+            while True:
+                self._wake.sock.recv(64)
+        except OSError:
+            pass
+        self._woken.set()
+
+    async def _flush(self):
+        """Commit the recorded results of finished jobs on the database thread"""
+        with self._leases_lock:
+            updates, metrics = self._pending_updates, self._pending_metrics
+            if not updates and not metrics:
+                return
+            self._pending_updates, self._pending_metrics = [], []
+            self._flushing = updates
+        try:
+            skipped = await self._db_call(self.job_queue.update_job_states, updates, metrics,
+                                          self.worker_id)
+        except Exception:
+            # Keep them for the next flush, ahead of anything recorded since
+            with self._leases_lock:
+                self._pending_updates[:0] = updates
+                self._pending_metrics[:0] = metrics
+            raise
+        finally:
+            with self._leases_lock:
+                self._flushing = []
+        if skipped:
+            self.logger.warning(f"Dropped results of {len(skipped)} job(s) whose leases were lost: "
+                                f"{', '.join(skipped)}")
+
+    def _db_call(self, func, *args):
+        """Run a blocking database call on the helper thread"""
+        return asyncio.get_running_loop().run_in_executor(self._db, func, *args)
+
+    def _record_update(self, job_id: str, state: str, **fields):
+        """Queue a job state change for the next grouped commit"""
+        with self._leases_lock:
+            super()._record_update(job_id, state, **fields)
+
+    def _leased_job_ids(self):
+        """IDs of the jobs this worker holds leases on: running, or finished but not flushed
+
+        Called on the heartbeat thread, so the snapshot is taken under the
+        lock the event loop holds while changing them.
+        """
+        with self._leases_lock:
+            job_ids = list(self._running)
+            job_ids.extend(update['id'] for update in self._pending_updates)
+            job_ids.extend(update['id'] for update in self._flushing)
+        return job_ids
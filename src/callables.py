@@ -0,0 +1,132 @@
+"""
+Python callable jobs, run in a warm process pool
+"""
+
+import importlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import traceback
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# "package.module:function" or "package.module:Class.method"
+CALLABLE_PATTERN = re.compile(r'^[A-Za-z_][\w.]*:[A-Za-z_][\w.]*$')
+
+# Functions resolved in this pool process; modules stay imported in sys.modules
+_resolved: Dict[str, Callable] = {}
+
+
+def validate_callable(spec: Any, args: Any, kwargs: Any):
+    """Raise ValueError unless spec, args and kwargs make a callable job"""
+    if not isinstance(spec, str) or not CALLABLE_PATTERN.match(spec):
+        raise ValueError("Job 'callable' must look like 'package.module:function'")
+    if args is not None and not isinstance(args, (list, tuple)):
+        raise ValueError("Job 'args' must be a list")
+    if kwargs is not None and not isinstance(kwargs, dict):
+        raise ValueError("Job 'kwargs' must be an object")
+
+
+def resolve(spec: str) -> Callable:
+    """Import and look up a callable, caching it for later jobs"""
+    func = _resolved.get(spec)
+    if func is None:
+        module_name, _, qualname = spec.partition(':')
+        func = importlib.import_module(module_name)
+        for attribute in qualname.split('.'):
+            func = getattr(func, attribute)
+        _resolved[spec] = func
+    return func
+
+
+def run_callable(spec: str, args: Optional[List], kwargs: Optional[Dict]) -> Tuple[bool, str]:
+    """Call a job's function in a pool process
+
+    Returns (True, compact JSON of the result) or (False, traceback). Both
+    are plain strings so nothing unpicklable crosses back to the worker;
+    results JSON can't represent fall back to their repr.
+    """
+    try:
+        result = resolve(spec)(*(args or ()), **(kwargs or {}))
+        return True, json.dumps(result, separators=(',', ':'), default=repr)
+    except BaseException:
+        return False, traceback.format_exc()
+
+
+def _init_pool_process(path: List[str]):
+    """Give pool processes the worker's import path, including its working directory"""
+    for entry in reversed(path):
+        if entry not in sys.path:
+            sys.path.insert(0, entry)
+
+
+def kill_executor(executor: ProcessPoolExecutor):
+    """Kill a pool's processes, abandoning whatever they are running"""
+    # ProcessPoolExecutor has no public way to stop a running call
+    for process in list(getattr(executor, '_processes', {}).values()):
+        process.kill()
+    executor.shutdown(wait=False)
+
+
+class CallablePool:
+    """A ProcessPoolExecutor started on the first callable job and kept warm
+
+    Pool processes are started by a fork server where available, so they
+    don't inherit the worker's threads and database connections, and are
+    reused for every later job. A job that times out can't be cancelled
+    inside a pool process, so the pool's processes are killed and a new
+    pool is started for the next job. Calls that were running alongside it
+    fail with BrokenProcessPool; was_killed() tells them apart from calls
+    whose own pool process died.
+    """
+
+    def __init__(self, size: int = 1):
+        self.size = max(1, size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._killed: 'weakref.WeakSet[ProcessPoolExecutor]' = weakref.WeakSet()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """The running pool, started if needed"""
+        if self._executor is None:
+            self._executor = self.isolated(self.size)
+        return self._executor
+
+    def isolated(self, size: int = 1) -> ProcessPoolExecutor:
+        """A new pool, separate from the shared one, for the caller to shut down"""
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        path = [os.getcwd()] + [entry for entry in sys.path if entry]
+        return ProcessPoolExecutor(size, mp_context=context,
+                                   initializer=_init_pool_process, initargs=(path,))
+
+    def kill(self, executor: ProcessPoolExecutor):
+        """Kill a pool's processes, abandoning whatever they are running
+
+        Does nothing if executor was already replaced, so jobs failing
+        together after a kill don't take down the new pool.
+        """
+        if executor is not self._executor:
+            return
+        self._executor = None
+        self._killed.add(executor)
+        kill_executor(executor)
+
+    def discard(self, executor: ProcessPoolExecutor):
+        """Stop using a pool that broke on its own, so the next call starts a new one"""
+        if executor is self._executor:
+            self._executor = None
+            executor.shutdown(wait=False)
+
+    def was_killed(self, executor: ProcessPoolExecutor) -> bool:
+        """Whether executor was killed by kill() rather than broken by a crashed call"""
+        return executor in self._killed
+
+    def shutdown(self):
+        """Stop the pool once its calls finish"""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
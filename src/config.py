@@ -6,50 +6,55 @@ import sqlite3
 import threading
 from typing import Any, Dict, Optional
 
+from .db import get_connection, PRAGMA_DEFAULTS
+from .migrations import ensure_schema
+
 
 class Config:
+    # Valid keys and the values used until they are set
+    DEFAULTS = {
+        'max-retries': '3',
+        'backoff-base': '2',
+        'worker-poll-interval': '0.05',
+        'worker-max-backoff': '1.0',
+        'worker-wake-timeout': '5.0',
+        'worker-batch-size': '1',
+        'worker-concurrency': '1',
+        'worker-lease-seconds': '60',
+        'worker-max-jobs': '0',
+        'worker-max-rss-mb': '0',
+        'worker-restart-backoff': '1.0',
+        'worker-restart-max-backoff': '60',
+        'output-preview-bytes': '65536',
+        'output-spool-dir': '',
+        'scheduler-lease-seconds': '15',
+        'scheduler-window': '10000',
+        'autoscale-interval': '1.0',
+        'autoscale-jobs-per-worker': '5',
+        'autoscale-max-wait': '2.0',
+        'autoscale-idle-seconds': '30',
+        'snapshot-ttl': '2.0',
+        'metrics-retention-days': '30',
+        **PRAGMA_DEFAULTS
+    }
+    
     def __init__(self, db_path: str = "jobs.db"):
         self.db_path = db_path
         self._lock = threading.Lock()
         self._init_database()
-        self._set_defaults()
     
-    def _init_database(self):
-        """Initialize the configuration table"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS config (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            conn.commit()
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's pooled database connection"""
+        return get_connection(self.db_path)
     
-    def _set_defaults(self):
-        """Set default configuration values if they don't exist"""
-        defaults = {
-            'max-retries': '3',
-            'backoff-base': '2'
-        }
-        
-        with self._lock:
-            with sqlite3.connect(self.db_path) as conn:
-                for key, value in defaults.items():
-                    # Only set if key doesn't exist
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT key FROM config WHERE key = ?", (key,))
-                    if not cursor.fetchone():
-                        conn.execute(
-                            "INSERT INTO config (key, value) VALUES (?, ?)",
-                            (key, value)
-                        )
-                conn.commit()
+    def _init_database(self):
+        """Create or upgrade the database schema"""
+        ensure_schema(self._connect(), self.db_path)
     
     def set(self, key: str, value: str) -> None:
         """Set a configuration value"""
         with self._lock:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.execute("""
                     INSERT OR REPLACE INTO config (key, value, updated_at)
                     VALUES (?, ?, datetime('now'))
@@ -57,12 +62,14 @@ class Config:
                 conn.commit()
     
     def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
-        """Get a configuration value"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Get a configuration value, falling back to its built-in default"""
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT value FROM config WHERE key = ?", (key,))
             row = cursor.fetchone()
-            return row[0] if row else default
+            if row:
+                return row[0]
+            return self.DEFAULTS.get(key, default)
     
     def get_int(self, key: str, default: int = 0) -> int:
         """Get a configuration value as integer"""
@@ -87,22 +94,24 @@ class Config:
     def delete(self, key: str) -> bool:
         """Delete a configuration value"""
         with self._lock:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM config WHERE key = ?", (key,))
                 conn.commit()
                 return cursor.rowcount > 0
     
     def list_all(self) -> Dict[str, str]:
-        """Get all configuration values"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Get all configuration values, including defaults that were never set"""
+        with self._connect() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT key, value FROM config ORDER BY key")
-            return dict(cursor.fetchall())
+            cursor.execute("SELECT key, value FROM config")
+            values = dict(self.DEFAULTS)
+            values.update(cursor.fetchall())
+            return dict(sorted(values.items()))
     
     def exists(self, key: str) -> bool:
         """Check if a configuration key exists"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT 1 FROM config WHERE key = ?", (key,))
             return cursor.fetchone() is not None
\ No newline at end of file
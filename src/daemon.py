@@ -0,0 +1,364 @@
+"""
+Supervisor daemon with a local JSON-RPC control socket
+
+`queuectl daemon start` runs one long-lived process per database that owns
+the worker pool, the scheduler and the database connections. The CLI, the
+interactive shell and the dashboard find it through a Unix socket next to
+the wake sockets and call it instead of opening the database themselves.
+
+The protocol is JSON-RPC 2.0, one request or response per line. Methods are
+named '<object>.<method>' (see CONTROL_METHODS) and params are always
+{"args": [...], "kwargs": {...}}.
+"""
+
+import json
+import logging
+import os
+import queue
+import signal
+import socket
+import socketserver
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from .notify import wake_dir
+from .timestamps import from_us, now_us
+
+
+# Methods each object exposes over the control socket. Anything else, such as
+# bulk enqueue from a stream, runs locally in the calling process.
+CONTROL_METHODS = {
+    'job_queue': {'enqueue', 'get_job', 'get_job_output', 'get_status', 'get_priority_counts', 'list_jobs',
+                  'delete_job', 'retry_from_dlq', 'get_job_metrics', 'get_system_metrics'},
+    'config': {'get', 'set', 'list_all'},
+    'worker_manager': {'start', 'stop_all', 'get_active_worker_count', 'get_worker_status'},
+    'daemon': {'ping', 'shutdown'},
+}
+
+# Exceptions re-raised with their own type on the client, so callers can keep
+# catching e.g. ValueError for duplicate job IDs
+_REMOTE_ERRORS = {
+    'ValueError': ValueError,
+    'KeyError': KeyError,
+    'LookupError': LookupError,
+    'RuntimeError': RuntimeError,
+}
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+
+class DaemonError(RuntimeError):
+    """A daemon call failed"""
+
+
+def control_path(db_path: str) -> str:
+    """Path of the daemon control socket for db_path"""
+    return os.path.join(wake_dir(db_path), 'daemon.ctl')
+
+
+def connect(db_path: str = "jobs.db", timeout: float = 120.0) -> Optional['DaemonClient']:
+    """Client for the daemon serving db_path, or None if none is running"""
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(control_path(db_path)):
+        return None
+    client = DaemonClient(db_path, timeout)
+    try:
+        client.call('daemon.ping')
+    except (OSError, DaemonError):
+        client.close()
+        return None
+    return client
+
+
+class DaemonClient:
+    """Connection to a running daemon; safe to share between threads"""
+
+    def __init__(self, db_path: str = "jobs.db", timeout: float = 120.0):
+        self.path = control_path(db_path)
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def call(self, method: str, *args, **kwargs) -> Any:
+        """Call a method on the daemon and return its result"""
+        with self._lock:
+            self._next_id += 1
+            request = {'jsonrpc': '2.0', 'id': self._next_id, 'method': method,
+                       'params': {'args': list(args), 'kwargs': kwargs}}
+            data = json.dumps(request, separators=(',', ':')).encode() + b'\n'
+            try:
+                self._send(data)
+            except socket.timeout:
+                self.close()
+                raise
+            except OSError:
+                # Nothing reached the daemon, which may have restarted since this
+                # connection was opened; retry once on a new connection
+                self.close()
+                try:
+                    self._send(data)
+                except OSError:
+                    self.close()
+                    raise
+            try:
+                response = self._receive()
+            except OSError:
+                # The daemon may already have run the call, so it isn't retried
+                self.close()
+                raise
+
+        error = response.get('error')
+        if error:
+            error_type = (error.get('data') or {}).get('type')
+            raise _REMOTE_ERRORS.get(error_type, DaemonError)(error.get('message', 'Daemon call failed'))
+        return response.get('result')
+
+    def close(self):
+        """Close the connection"""
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+            self._reader = None
+
+    def _send(self, data: bytes):
+        """Send one request line, connecting first if needed"""
+        if self._sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._sock = sock
+            self._reader = sock.makefile('rb')
+
+        self._sock.sendall(data)
+
+    def _receive(self) -> Dict[str, Any]:
+        """Read one response line"""
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionResetError("Daemon closed the connection")
+        return json.loads(line)
+
+
+class RemoteObject:
+    """Stands in for a daemon-owned object, forwarding CONTROL_METHODS calls
+
+    Other attributes come from a local object built by local_factory, so
+    callers can use it wherever they'd use the real object.
+    """
+
+    def __init__(self, client: DaemonClient, name: str, local_factory: Optional[Callable] = None):
+        self._client = client
+        self._name = name
+        self._local_factory = local_factory
+        self._local = None
+
+    def __getattr__(self, attr: str):
+        if attr in CONTROL_METHODS[self._name]:
+            method = f'{self._name}.{attr}'
+            return lambda *args, **kwargs: self._client.call(method, *args, **kwargs)
+        if self._local_factory is None:
+            raise AttributeError(attr)
+        if self._local is None:
+            self._local = self._local_factory()
+        return getattr(self._local, attr)
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """Serves newline-delimited JSON-RPC requests on one connection"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            if not line.endswith(b'\n'):
+                break  # Cut off mid-send; the client sends the whole request again
+            response = self.server.daemon.handle(line)
+            self.wfile.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+            self.wfile.flush()
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    _ControlServer = None  # No Unix sockets (Windows)
+
+
+class QueueDaemon:
+    """Supervisor owning the worker pool, scheduler and database connections
+
+    Requests are served on background threads. Calls on the worker manager
+    are handed to the main thread, so worker processes are only ever forked
+    from the thread that supervises them.
+    """
+
+    def __init__(self, db_path: str = "jobs.db", workers: int = 0, max_workers: Optional[int] = None,
+                 concurrency: Optional[int] = None):
+        from .config import Config
+        from .job_queue import JobQueue
+        from .worker_manager import WorkerManager
+
+        self.db_path = db_path
+        self.path = control_path(db_path)
+        self.initial_workers = workers
+        self.max_workers = max_workers
+        self.concurrency = concurrency
+        self.job_queue = JobQueue(db_path)
+        self.config = Config(db_path)
+        # Workers outlive an empty queue; the daemon keeps its pool at size
+        self.worker_manager = WorkerManager(self.job_queue, db_path, exit_when_idle=False)
+        self.started_at = now_us()
+
+        self.server = None
+        self._tasks: "queue.Queue[tuple]" = queue.Queue()
+        self._stopped = threading.Event()
+        self.logger = logging.getLogger('daemon')
+
+    def serve_forever(self):
+        """Bind the control socket, start workers and supervise until stopped"""
+        self.bind()
+        server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        server_thread.start()
+        self.logger.info(f"Daemon {os.getpid()} listening on {self.path}")
+
+        try:
+            if self.initial_workers or self.max_workers:
+                self.worker_manager.start(self.initial_workers, self.max_workers, self.concurrency)
+            while not self._stopped.is_set():
+                try:
+                    future, func, args, kwargs = self._tasks.get(timeout=1.0)
+                except queue.Empty:
+                    pass
+                else:
+                    if future.set_running_or_notify_cancel():
+                        try:
+                            future.set_result(func(*args, **kwargs))
+                        except Exception as e:
+                            future.set_exception(e)
+                self.worker_manager.supervise()  # Restarts crashed workers; resizes when autoscaling
+        finally:
+            self._stopped.set()
+            while not self._tasks.empty():
+                future = self._tasks.get_nowait()[0]
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(RuntimeError("Daemon is shutting down"))
+            self.close()
+
+    def bind(self):
+        """Create the control socket, refusing to replace a live daemon"""
+        if _ControlServer is None:
+            raise RuntimeError("The daemon needs Unix domain sockets, which this platform lacks")
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        if os.path.exists(self.path):
+            if connect(self.db_path) is not None:
+                raise RuntimeError(f"A daemon is already running for {os.path.abspath(self.db_path)}")
+            os.unlink(self.path)  # Left behind by a daemon that died
+
+        server = _ControlServer(self.path, _ControlHandler)
+        server.daemon = self
+        os.chmod(self.path, 0o600)
+        self.server = server
+
+    def stop(self):
+        """Ask the supervisor loop to shut down"""
+        self._stopped.set()
+
+    def close(self):
+        """Stop serving, stop the workers and remove the control socket"""
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        self.worker_manager.stop_all()
+        self.logger.info("Daemon stopped")
+
+    def handle(self, line: bytes) -> Dict[str, Any]:
+        """Run one JSON-RPC request and build its response"""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return self._error(None, PARSE_ERROR, f"Parse error: {e}")
+
+        request_id = request.get('id') if isinstance(request, dict) else None
+        method = request.get('method') if isinstance(request, dict) else None
+        params = request.get('params', {}) if isinstance(request, dict) else None
+        if not isinstance(method, str) or not isinstance(params, dict):
+            return self._error(request_id, INVALID_REQUEST, "Invalid request")
+        args, kwargs = params.get('args', []), params.get('kwargs', {})
+        if not isinstance(args, list) or not isinstance(kwargs, dict):
+            return self._error(request_id, INVALID_PARAMS, "params must be {\"args\": [...], \"kwargs\": {...}}")
+
+        name, _, attr = method.partition('.')
+        if attr not in CONTROL_METHODS.get(name, ()):
+            return self._error(request_id, METHOD_NOT_FOUND, f"Method not found: {method}")
+
+        try:
+            if name == 'worker_manager':
+                result = self._on_main_thread(getattr(self.worker_manager, attr), args, kwargs)
+            elif name == 'daemon':
+                result = getattr(self, attr)(*args, **kwargs)
+            else:
+                result = getattr(getattr(self, name), attr)(*args, **kwargs)
+        except Exception as e:
+            return self._error(request_id, SERVER_ERROR, str(e), type(e).__name__)
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+    def ping(self) -> Dict[str, Any]:
+        """Identify the daemon"""
+        return {
+            'pid': os.getpid(),
+            'db_path': os.path.abspath(self.db_path),
+            'started_at': from_us(self.started_at),
+        }
+
+    def shutdown(self) -> bool:
+        """Stop the daemon once the current requests finish"""
+        self.stop()
+        return True
+
+    def _on_main_thread(self, func, args, kwargs):
+        """Run func on the supervisor thread and wait for its result"""
+        if self._stopped.is_set():
+            raise RuntimeError("Daemon is shutting down")
+        future = Future()
+        self._tasks.put((future, func, args, kwargs))
+        return future.result()
+
+    @staticmethod
+    def _error(request_id, code: int, message: str, error_type: Optional[str] = None) -> Dict[str, Any]:
+        error = {'code': code, 'message': message}
+        if error_type:
+            error['data'] = {'type': error_type}
+        return {'jsonrpc': '2.0', 'id': request_id, 'error': error}
+
+
+def run_daemon(db_path: str = "jobs.db", workers: int = 0, max_workers: Optional[int] = None,
+               concurrency: Optional[int] = None):
+    """Run the daemon in the foreground until SIGTERM/SIGINT or a shutdown call"""
+    daemon = QueueDaemon(db_path, workers, max_workers, concurrency)
+
+    def handle_stop(signum, frame):
+        daemon.stop()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    daemon.serve_forever()
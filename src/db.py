@@ -0,0 +1,102 @@
+"""
+SQLite connection pool for QueueCTL
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, List
+
+
+# Connection tuning defaults, overridable through the config table
+PRAGMA_DEFAULTS = {
+    'db-synchronous': 'NORMAL',
+    'db-busy-timeout-ms': '30000',
+    'db-mmap-size': '268435456',
+    'db-cache-size': '-16000'
+}
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# Size of each connection's prepared statement cache
+STATEMENT_CACHE_SIZE = 256
+
+_local = threading.local()
+
+# Connections inherited across fork() are kept referenced but never used or
+# closed in the child, so the parent's SQLite state is left untouched
+_inherited: List[sqlite3.Connection] = []
+
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """Return the calling thread's pooled connection for db_path
+
+    Connections are opened once per thread and process, put in WAL mode and
+    tuned with the db-* pragmas from the config table. Rows are returned as
+    sqlite3.Row objects. Use the connection as a context manager to wrap a
+    transaction; it stays open for reuse afterwards.
+    """
+    pool = _get_pool()
+    key = os.path.abspath(db_path)
+    conn = pool.get(key)
+    if conn is None:
+        conn = _open_connection(db_path)
+        pool[key] = conn
+    return conn
+
+
+def close_connections():
+    """Close every pooled connection owned by the calling thread"""
+    pool = _get_pool()
+    for conn in pool.values():
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    pool.clear()
+
+
+def _get_pool() -> Dict[str, sqlite3.Connection]:
+    """Get the connection pool for the current thread and process"""
+    pid = os.getpid()
+    if getattr(_local, 'pid', None) != pid:
+        _inherited.extend(getattr(_local, 'pool', {}).values())
+        _local.pool = {}
+        _local.pid = pid
+    return _local.pool
+
+
+def _open_connection(db_path: str) -> sqlite3.Connection:
+    """Open and configure a new connection"""
+    conn = sqlite3.connect(db_path, timeout=30, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.row_factory = sqlite3.Row
+
+    settings = dict(PRAGMA_DEFAULTS)
+    try:
+        cursor = conn.execute("SELECT key, value FROM config WHERE key LIKE 'db-%'")
+        settings.update((row[0], row[1]) for row in cursor.fetchall())
+    except sqlite3.OperationalError:
+        pass  # Config table not created yet, use defaults
+
+    conn.execute("PRAGMA journal_mode=WAL")
+    for statement in _pragma_statements(settings):
+        conn.execute(statement)
+    return conn
+
+
+def _pragma_statements(settings: Dict[str, str]) -> List[str]:
+    """Build validated PRAGMA statements from db-* settings"""
+    synchronous = str(settings['db-synchronous']).upper()
+    if synchronous not in SYNCHRONOUS_MODES:
+        synchronous = PRAGMA_DEFAULTS['db-synchronous']
+
+    statements = [f"PRAGMA synchronous={synchronous}"]
+    for key, pragma in [('db-busy-timeout-ms', 'busy_timeout'),
+                        ('db-mmap-size', 'mmap_size'),
+                        ('db-cache-size', 'cache_size')]:
+        try:
+            value = int(settings[key])
+        except (TypeError, ValueError):
+            value = int(PRAGMA_DEFAULTS[key])
+        statements.append(f"PRAGMA {pragma}={value}")
+    return statements
@@ -7,9 +7,16 @@ import json
 import shlex
 import subprocess
 import sys
+
+import click
+import typer
 from rich.console import Console
 from rich.text import Text
 from src.banner import show_banner
+from src.config import Config
+from src.daemon import RemoteObject, connect
+from src.job_queue import JobQueue
+from src.timestamps import seconds_until
 
 console = Console()
 
@@ -19,9 +26,20 @@ class QueueCTLShell(cmd.Cmd):
     
     intro = Text("\nWelcome to QueueCTL Interactive Shell!", style="#bbfa01 bold")
     prompt = Text("queuectl> ", style="#bbfa01 bold").plain
+    doc_header = "Available commands:"
     
-    def __init__(self):
+    def __init__(self, app: typer.Typer):
         super().__init__()
+        # Commands run in this process against one JobQueue, which
+        # reuse the pooled database connection for the life of the shell,
+        # or against the daemon when one is running
+        self.cli = typer.main.get_command(app)
+        self.daemon = connect()
+        if self.daemon is not None:
+            self.job_queue = RemoteObject(self.daemon, 'job_queue', JobQueue)
+        else:
+            self.job_queue = JobQueue()
+        self._worker_manager = None
         console.print(self.intro)
         console.print("[dim]Type 'help' for available commands or 'exit' to quit.[/dim]")
         console.print("[dim]You can run any queuectl command without the 'python queuectl.py' prefix.[/dim]\n")
@@ -31,26 +49,35 @@ class QueueCTLShell(cmd.Cmd):
         if line.strip():
             self.run_queuectl_command(line)
     
+    @property
+    def worker_manager(self):
+        """WorkerManager for this shell, created on first use"""
+        if self._worker_manager is None:
+            from src.worker_manager import WorkerManager
+            if self.daemon is not None:
+                self._worker_manager = RemoteObject(self.daemon, 'worker_manager')
+            else:
+                self._worker_manager = WorkerManager(self.job_queue)
+        return self._worker_manager
+    
     def run_queuectl_command(self, command):
-        """Run a queuectl command"""
+        """Run a queuectl command in this process"""
         try:
-            import sys
-            import os
-            
-            # Get the Python executable and script path
-            python_exe = sys.executable
-            script_path = os.path.join(os.getcwd(), "queuectl.py")
-            
-            full_cmd = f'"{python_exe}" "{script_path}" {command}'
-            result = subprocess.run(full_cmd, shell=True, capture_output=True, text=True)
+            args = shlex.split(command)
+            try:
+                self.cli.main(args=args, prog_name="queuectl.py", standalone_mode=False)
+                return
+            except click.exceptions.Exit:
+                return  # Commands report their own errors before exiting
+            except click.exceptions.Abort:
+                console.print("[yellow]Aborted[/yellow]")
+                return
+            except click.ClickException as e:
+                stderr_text = e.format_message()
             
-            if result.stdout:
-                console.print(result.stdout.strip())
-            if result.stderr and result.returncode != 0:
-                stderr_text = result.stderr.strip()
-                
+            if stderr_text:
                 # Special handling for config commands
-                valid_keys = ["backoff-base", "max-retries"]  # Known config keys
+                valid_keys = list(Config.DEFAULTS)  # Known config keys
                 
                 if command.startswith("config set"):
                     parts = command.split()
@@ -92,25 +119,13 @@ class QueueCTLShell(cmd.Cmd):
                         return
                 
                 # Customize error messages for interactive shell context
-                if "Try 'queuectl.py" in stderr_text and "--help' for help" in stderr_text:
-                    lines = stderr_text.split('\n')
-                    for line in lines:
-                        if "Try 'queuectl.py" in line and "--help' for help" in line:
-                            console.print("[dim]Type 'help' for available commands[/dim]")
-                        elif "Missing argument" in line:
-                            console.print(f"[red]{line}[/red]")
-                            # Add helpful context for missing arguments
-                            if "config set" in command:
-                                console.print("[dim]Type 'config list' to see available keys[/dim]")
-                        elif "Error" in line and not line.startswith("Usage:"):
-                            console.print(f"[red]{line}[/red]")
-                        elif line.startswith("Usage:"):
-                            continue  # Skip usage lines
-                        elif line.strip() and not "Try 'queuectl.py" in line:
-                            console.print(f"[red]{line}[/red]")
-                else:
-                    console.print(f"[red]{stderr_text}[/red]")
+                console.print(f"[red]Error: {stderr_text}[/red]")
+                if "Missing argument" in stderr_text and "config set" in command:
+                    console.print("[dim]Type 'config list' to see available keys[/dim]")
+                console.print("[dim]Type 'help' for available commands[/dim]")
                 
+        except SystemExit:
+            pass  # Don't let a command close the shell
         except Exception as e:
             console.print(f"[red]Error executing command: {e}[/red]")
     
@@ -214,9 +229,10 @@ class QueueCTLShell(cmd.Cmd):
         
         # Show worker status
         console.print(f"\n[yellow]Worker Status:[/yellow]")
-        worker_result = subprocess.run("python queuectl.py worker status", shell=True, capture_output=True, text=True)
-        if worker_result.stdout and worker_result.stdout.strip():
-            console.print(worker_result.stdout)
+        if self.daemon is not None:
+            console.print(f"[green]Daemon workers: {self.worker_manager.get_active_worker_count()} running[/green]")
+        elif self._background_workers_running():
+            console.print("[green]Background workers: Running[/green]")
         else:
             console.print("[dim]No workers currently running[/dim]")
             console.print("[dim]Use 'worker start' to process jobs[/dim]")
@@ -229,10 +245,8 @@ class QueueCTLShell(cmd.Cmd):
             self.run_queuectl_command(f"list {arg}")
         else:
             # Run the list command and enhance the output
-            result = subprocess.run("python queuectl.py list", shell=True, capture_output=True, text=True)
-            if result.stdout:
-                console.print(result.stdout)
-                
+            self.run_queuectl_command("list")
+            if any(self.job_queue.get_status().values()):
                 # Show filtering tip
                 console.print(f"\n[dim] Filter by job type:[/dim]")
                 console.print(f"[dim]  list --state pending     - Show only pending jobs[/dim]")
@@ -241,8 +255,6 @@ class QueueCTLShell(cmd.Cmd):
                 console.print(f"[dim]  list --state failed      - Show only failed jobs[/dim]")
                 console.print(f"[dim]  list --state dead        - Show only dead letter queue jobs[/dim]")
                 console.print(f"[dim]  list --state scheduled   - Show scheduled jobs with run times[/dim]")
-            else:
-                console.print("[red]No output from list command[/red]")
     
 
 
@@ -261,7 +273,11 @@ class QueueCTLShell(cmd.Cmd):
             console.print("\n[dim]Workers process all jobs and can stay running for scheduled jobs like cron.[/dim]")
             return
         
-        # Handle worker start
+        # Handle worker start; with a daemon running it owns the workers
+        if arg.strip().startswith("start") and self.daemon is not None:
+            self.run_queuectl_command(f"worker {arg}")
+            return
+        
         if arg.strip().startswith("start"):
             parts = arg.strip().split()
             count = 2  # default
@@ -367,17 +383,12 @@ class QueueCTLShell(cmd.Cmd):
                 except Exception as e:
                     console.print(f"[yellow]Background worker stop error: {e}[/yellow]")
             
-            # Also try regular worker stop
-            result = subprocess.run("python queuectl.py worker stop", shell=True, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                if not background_stopped:
-                    console.print("[green]✓ Workers stopped successfully[/green]")
-                if result.stdout and "No active workers" not in result.stdout:
-                    console.print(result.stdout.strip())
-            else:
-                if not background_stopped:
-                    console.print(f"[yellow]No active workers found[/yellow]")
+            # Also stop workers started by this shell's worker manager
+            if self.worker_manager.get_active_worker_count() > 0:
+                self.worker_manager.stop_all()
+                console.print("[green]✓ Workers stopped successfully[/green]")
+            elif not background_stopped:
+                console.print(f"[yellow]No active workers found[/yellow]")
             
             # Show final job status
             console.print(f"\n[cyan]📊 Current Job Status:[/cyan]")
@@ -397,12 +408,16 @@ class QueueCTLShell(cmd.Cmd):
                 if len(scheduled_jobs) > 3:
                     console.print(f"[dim]... and {len(scheduled_jobs) - 3} more[/dim]")
         
+        # Daemon workers are listed by the CLI's worker status
+        elif arg.strip() == "status" and self.daemon is not None:
+            self.run_queuectl_command("worker status")
+        
         # Handle worker status with background worker info
         elif arg.strip() == "status":
-            # Show regular worker status
-            result = subprocess.run("python queuectl.py worker status", shell=True, capture_output=True, text=True)
-            if result.stdout:
-                console.print(result.stdout.strip())
+            # Show workers started by this shell's worker manager
+            active = self.worker_manager.get_active_worker_count()
+            if active:
+                console.print(f"[green]Workers: {active} running[/green]")
             
             # Also show background worker status
             if hasattr(self, '_background_process') and self._background_process:
@@ -423,32 +438,8 @@ class QueueCTLShell(cmd.Cmd):
 
     def _get_job_counts(self):
         """Get current job counts by state"""
-        result = subprocess.run("python queuectl.py list", shell=True, capture_output=True, text=True)
-        
         counts = {'pending': 0, 'processing': 0, 'completed': 0, 'failed': 0, 'dead': 0, 'scheduled': 0}
-        
-        if result.stdout:
-            lines = result.stdout.split('\n')
-            for line in lines:
-                # Parse the table format - state abbreviations are in column 2
-                if '|' in line and not line.startswith('+') and 'ID' not in line and line.strip():
-                    parts = [p.strip() for p in line.split('|')]
-                    if len(parts) >= 3:
-                        state_abbrev = parts[2].strip()  # State abbreviation is in column 2
-                        # Map abbreviations to full state names
-                        if state_abbrev == 'P':
-                            counts['pending'] += 1
-                        elif state_abbrev == 'R':
-                            counts['processing'] += 1
-                        elif state_abbrev == 'C':
-                            counts['completed'] += 1
-                        elif state_abbrev == 'F':
-                            counts['failed'] += 1
-                        elif state_abbrev == 'D':
-                            counts['dead'] += 1
-                        elif state_abbrev == 'S':
-                            counts['scheduled'] += 1
-        
+        counts.update(self.job_queue.get_status())
         return counts
     
     def _display_job_counts(self, counts):
@@ -456,54 +447,18 @@ class QueueCTLShell(cmd.Cmd):
         console.print(f"Pending: {counts['pending']} | Processing: {counts['processing']} | Completed: {counts['completed']} | Failed: {counts['failed']} | Dead: {counts['dead']} | Scheduled: {counts['scheduled']}")
     
     def _get_scheduled_jobs_info(self):
-        """Get information about scheduled jobs including wait times"""
+        """Get information about scheduled jobs including wait times, soonest first"""
         try:
-            result = subprocess.run("python queuectl.py list --state scheduled", shell=True, capture_output=True, text=True)
             scheduled_jobs = []
-            if result.stdout:
-                lines = result.stdout.split('\n')
-                current_job = None
-                
-                for line in lines:
-                    if '|' in line and not line.startswith('+') and not line.startswith('┏') and not line.startswith('┡') and not line.startswith('└'):
-                        parts = [p.strip() for p in line.split('|')]
-                        if len(parts) >= 5:
-                            # Check if this is a main job line (has job ID)
-                            if parts[1] and parts[1] != '' and not parts[1].isspace():
-                                # This is a new job
-                                if current_job:
-                                    scheduled_jobs.append(current_job)
-                                
-                                job_id = parts[1]
-                                state = parts[2] if len(parts) > 2 else ''
-                                command = parts[3] if len(parts) > 3 else ''
-                                scheduled_time = parts[5] if len(parts) > 5 else ''
-                                
-                                if state == 'S':  # Scheduled state
-                                    current_job = {
-                                        'id': job_id,
-                                        'command': command,
-                                        'scheduled_time': scheduled_time,
-                                        'wait_seconds': 0
-                                    }
-                            elif current_job and len(parts) > 5:
-                                # This might be a continuation line with the time
-                                time_part = parts[5].strip()
-                                if time_part and ':' in time_part:
-                                    # Combine with previous scheduled_time if it exists
-                                    if current_job['scheduled_time']:
-                                        current_job['scheduled_time'] += ' ' + time_part
-                                    else:
-                                        current_job['scheduled_time'] = time_part
-                
-                # Don't forget the last job
-                if current_job:
-                    scheduled_jobs.append(current_job)
-                
-                # Calculate wait times
-                for job in scheduled_jobs:
-                    job['wait_seconds'] = self._calculate_wait_time(job['scheduled_time'])
-                    
+            for job in self.job_queue.list_jobs('scheduled'):
+                wait_seconds = seconds_until(job['run_at']) if job['run_at'] else 0
+                scheduled_jobs.append({
+                    'id': job['id'],
+                    'command': job['command'],
+                    'scheduled_time': job['run_at'],
+                    'wait_seconds': max(0, wait_seconds)
+                })
+            scheduled_jobs.sort(key=lambda job: job['wait_seconds'])
             return scheduled_jobs
         except Exception as e:
             console.print(f"[red]Error getting scheduled jobs: {e}[/red]")
@@ -512,44 +467,14 @@ class QueueCTLShell(cmd.Cmd):
     def _get_job_count_by_state(self, state):
         """Get count of jobs in specific state"""
         try:
-            result = subprocess.run(f"python queuectl.py list --state {state}", shell=True, capture_output=True, text=True)
-            if "No jobs found" in result.stdout:
-                return 0
-            # Count lines with job data (contains '|' but not table borders)
-            count = 0
-            if result.stdout:
-                lines = result.stdout.split('\n')
-                for line in lines:
-                    if '|' in line and not line.startswith('+') and not 'ID' in line and line.strip():
-                        count += 1
-            return count
+            return self.job_queue.get_status().get(state, 0)
         except Exception:
             return 0
     
-    def _calculate_wait_time(self, scheduled_time_str):
-        """Calculate seconds until scheduled time"""
-        try:
-            from datetime import datetime, timezone
-            import re
-            # Parse the scheduled time (format: "11-10 04:20")
-            if not scheduled_time_str or scheduled_time_str == '-':
-                return 0
-            
-            # Extract time parts
-            time_match = re.match(r'(\d{2})-(\d{2})\s+(\d{2}):(\d{2})', scheduled_time_str)
-            if not time_match:
-                return 0
-            
-            month, day, hour, minute = map(int, time_match.groups())
-            # Create datetime object (assume current year)
-            now = datetime.now(timezone.utc)
-            scheduled_dt = datetime(now.year, month, day, hour, minute, tzinfo=timezone.utc)
-            
-            # If scheduled time is in the past, it's ready now
-            wait_seconds = (scheduled_dt - now).total_seconds()
-            return max(0, wait_seconds)
-        except Exception:
-            return 0
+    def _background_workers_running(self):
+        """Whether workers left running in the background are still alive"""
+        process = getattr(self, '_background_process', None)
+        return process is not None and process.poll() is None
     
     def _format_wait_time(self, seconds):
         """Format wait time in human readable format"""
@@ -574,15 +499,6 @@ class QueueCTLShell(cmd.Cmd):
             import threading
             import time
             
-            # Import worker manager directly
-            sys.path.append(os.getcwd())
-            from src.worker_manager import WorkerManager
-            from src.job_queue import JobQueue
-            
-            # Create instances
-            job_queue = JobQueue()
-            worker_manager = WorkerManager(job_queue)
-            
             console.print(f"[green]Starting {count} worker process(es)...[/green]")
             
             # Start workers using subprocess with live output
@@ -819,26 +735,20 @@ class QueueCTLShell(cmd.Cmd):
         command = parts[0]
         
         if command == "list":
-            # Show the DLQ table (now with full IDs thanks to our fix)
-            result = subprocess.run("python queuectl.py dlq list", shell=True, capture_output=True, text=True)
-            if result.stdout:
-                console.print(result.stdout)
-                
-                # Also get full job IDs for easy copy-paste
-                dlq_jobs = self._extract_job_ids_from_dlq()
+            # Show the DLQ table
+            self.run_queuectl_command("dlq list")
+            
+            # Also get full job IDs for easy copy-paste
+            dlq_jobs = self._extract_job_ids_from_dlq()
+            
+            if dlq_jobs:
+                console.print(f"\n[yellow]Full Job IDs for retry:[/yellow]")
+                for i, job_id in enumerate(dlq_jobs, 1):
+                    console.print(f"  {i}. [red]{job_id}[/red]")
                 
-                if dlq_jobs:
-                    console.print(f"\n[yellow]Full Job IDs for retry:[/yellow]")
-                    for i, job_id in enumerate(dlq_jobs, 1):
-                        console.print(f"  {i}. [red]{job_id}[/red]")
-                    
-                    console.print(f"\n[dim] Usage:[/dim]")
-                    console.print(f"[dim]  dlq retry <full_job_id>     - Retry with full ID[/dim]")
-                    console.print(f"[dim]  dlq retry demo_fail_176     - Retry with partial ID (auto-match)[/dim]")
-                else:
-                    console.print("[yellow]No jobs found in Dead Letter Queue[/yellow]")
-            else:
-                console.print("[yellow]No jobs in Dead Letter Queue[/yellow]")
+                console.print(f"\n[dim] Usage:[/dim]")
+                console.print(f"[dim]  dlq retry <full_job_id>     - Retry with full ID[/dim]")
+                console.print(f"[dim]  dlq retry demo_fail_176     - Retry with partial ID (auto-match)[/dim]")
         
         elif command == "retry":
             if len(parts) < 2:
@@ -863,55 +773,20 @@ class QueueCTLShell(cmd.Cmd):
             self.run_queuectl_command(f"dlq {arg}")
     
     def _extract_job_ids_from_dlq(self):
-        """Extract job IDs from DLQ by querying the database directly"""
+        """Get the IDs of jobs in the DLQ"""
         try:
-            # Import the job queue module to query directly
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-            from src.job_queue import JobQueue
-            
-            # Create job queue instance and get dead jobs directly
-            job_queue = JobQueue()
-            dead_jobs = job_queue.list_jobs('dead')
-            
-            return [job['id'] for job in dead_jobs]
-        except Exception as e:
-            # Fallback to command parsing if direct access fails
-            try:
-                result = subprocess.run("python queuectl.py list --state dead", shell=True, capture_output=True, text=True)
-                if result.stdout:
-                    job_ids = []
-                    lines = result.stdout.split('\n')
-                    for line in lines:
-                        # Look for lines that contain job IDs
-                        line = line.strip()
-                        if '|' in line and ('demo_fail' in line or 'job_' in line or 'quick_' in line):
-                            parts = line.split('|')
-                            if len(parts) >= 1:
-                                job_id = parts[0].strip()
-                                if job_id and job_id != 'ID' and not job_id.startswith('-') and not job_id.startswith('+'):
-                                    job_ids.append(job_id)
-                    return job_ids
-                return []
-            except:
-                return []
+            return [job['id'] for job in self.job_queue.list_jobs('dead')]
+        except Exception:
+            return []
     
     def _find_full_job_id_pattern(self, partial_id):
-        """Try to find full job ID by pattern matching"""
+        """Try to find full job ID by prefix in any state"""
         try:
-            # Check if we can find jobs with this pattern in any state
-            result = subprocess.run("python queuectl.py list", shell=True, capture_output=True, text=True)
-            if result.stdout:
-                for line in result.stdout.split('\n'):
-                    if partial_id in line and '|' in line:
-                        parts = line.split('|')
-                        if len(parts) >= 2:
-                            job_id = parts[1].strip()
-                            if job_id.startswith(partial_id) and not job_id.endswith('…'):
-                                return job_id
+            for job in self.job_queue.list_jobs():
+                if job['id'].startswith(partial_id):
+                    return job['id']
             return None
-        except:
+        except Exception:
             return None
     
     def _find_dlq_job_by_partial_id(self, partial_id):
@@ -1264,6 +1139,15 @@ class QueueCTLShell(cmd.Cmd):
         console.print("[#bbfa01]Thanks for using QueueCTL![/#bbfa01]")
         return True
     
+    def do_EOF(self, arg):
+        """Exit the interactive shell (Ctrl+D)"""
+        console.print()
+        return self.do_exit(arg)
+    
+    def get_names(self):
+        """Command names for help, without EOF (that's Ctrl+D, not a command)"""
+        return [name for name in super().get_names() if name != 'do_EOF']
+    
     def emptyline(self):
         """Do nothing on empty line"""
         pass
@@ -1280,7 +1164,7 @@ class QueueCTLShell(cmd.Cmd):
                 # Continue the loop to restart the shell
 
 
-def start_interactive_shell():
-    """Start the interactive shell"""
-    shell = QueueCTLShell()
+def start_interactive_shell(app: typer.Typer):
+    """Start the interactive shell for the given queuectl app"""
+    shell = QueueCTLShell(app)
     shell.cmdloop()
\ No newline at end of file
@@ -2,190 +2,295 @@
 Job Queue implementation with SQLite persistence
 """
 
+import os
 import sqlite3
 import json
 import uuid
-from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Tuple, Any
 import threading
 
+from .db import get_connection
+from .callables import validate_callable
+from .launcher import display_command
+from .migrations import HISTOGRAM_EDGES_MS, ROLLUP_RESOLUTIONS, TIMESTAMP_COLUMNS, ensure_schema
+from .notify import notify_workers
+from .output_capture import compress_text, decompress_text, error_summary
+from .snapshots import SnapshotCache
+from .timestamps import from_us, now_us, seconds_until, to_us
+
+
+_INSERT_JOB_SQL = """
+    INSERT INTO jobs (id, command, state, attempts, max_retries, priority,
+                    timeout_seconds, run_at, created_at, updated_at, started_at,
+                    completed_at, next_retry_at, output, error, execution_time_ms, worker_id,
+                    exec, env, cwd, callable, args, kwargs)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_REPLACE_JOB_SQL = """
+    UPDATE jobs SET command = ?, state = ?, attempts = 0, max_retries = ?, 
+                  priority = ?, timeout_seconds = ?, run_at = ?, updated_at = ?,
+                  exec = ?, env = ?, cwd = ?, callable = ?, args = ?, kwargs = ?,
+                  started_at = NULL, completed_at = NULL, next_retry_at = NULL,
+                  output = NULL, output_path = NULL, error = NULL, execution_time_ms = 0, worker_id = NULL
+    WHERE id = ?
+"""
+
+# Columns read by listings; output and the full error live in job_outputs (get_job_output)
+_JOB_COLUMNS = """
+    id, command, state, attempts, max_retries, priority, timeout_seconds, run_at,
+    created_at, updated_at, started_at, completed_at, next_retry_at, error,
+    execution_time_ms, worker_id, lease_expires_at, heartbeat_at, output_path, exec, env, cwd,
+    callable, args, kwargs
+"""
+
+# Columns a worker needs from a job it claims
+_CLAIM_COLUMNS = ("id, command, attempts, max_retries, priority, timeout_seconds, run_at, created_at, "
+                  "exec, env, cwd, callable, args, kwargs")
+
+# Columns holding JSON: an argv list, a map of environment variables and a callable's arguments
+_JSON_COLUMNS = ('exec', 'env', 'args', 'kwargs')
+
+_STORE_OUTPUT_SQL = "INSERT OR REPLACE INTO job_outputs (job_id, output, error) VALUES (?, ?, ?)"
+
+
+# Lease held by the running scheduler process
+SCHEDULER_LEASE = 'scheduler'
+
+
+def _row_to_dict(row: sqlite3.Row, table: str = 'jobs') -> Dict[str, Any]:
+    """Turn a row into a dict, presenting timestamps as ISO strings"""
+    record = dict(row)
+    for column in TIMESTAMP_COLUMNS[table]:
+        if column in record:
+            record[column] = from_us(record[column])
+    if table == 'jobs':
+        for column in _JSON_COLUMNS:
+            if isinstance(record.get(column), str):
+                record[column] = json.loads(record[column])
+    return record
+
+
+def _histogram_percentile(histogram: List[Tuple[int, int]], fraction: float,
+                          maximum: Optional[int]) -> float:
+    """Estimate a percentile from (bin lower edge, count) pairs sorted by bin
+
+    Returns the upper edge of the bin holding the percentile, capped at the
+    largest value seen.
+    """
+    total = sum(count for _, count in histogram)
+    if not total:
+        return 0
+    seen = 0
+    for bin_ms, count in histogram:
+        seen += count
+        if seen >= fraction * total:
+            index = HISTOGRAM_EDGES_MS.index(bin_ms)
+            if index + 1 < len(HISTOGRAM_EDGES_MS):
+                return min(HISTOGRAM_EDGES_MS[index + 1], maximum)
+            break
+    return maximum
+
 
 class JobQueue:
     def __init__(self, db_path: str = "jobs.db"):
         self.db_path = db_path
         self._lock = threading.Lock()
+        # Whole-table status and metrics queries, shared with the dashboard
+        self.snapshots = SnapshotCache(db_path)
         self._init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's pooled database connection"""
+        return get_connection(self.db_path)
+    
     def _init_database(self):
-        """Initialize the SQLite database and create tables"""
-        with sqlite3.connect(self.db_path) as conn:
-            # Enhanced jobs table with new features
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS jobs (
-                    id TEXT PRIMARY KEY,
-                    command TEXT NOT NULL,
-                    state TEXT DEFAULT 'pending',
-                    attempts INTEGER DEFAULT 0,
-                    max_retries INTEGER DEFAULT 3,
-                    priority INTEGER DEFAULT 0,
-                    timeout_seconds INTEGER DEFAULT 300,
-                    run_at TEXT,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    started_at TEXT,
-                    completed_at TEXT,
-                    next_retry_at TEXT,
-                    output TEXT,
-                    error TEXT,
-                    execution_time_ms INTEGER DEFAULT 0,
-                    worker_id TEXT
-                )
-            """)
-            
-            # Job metrics table
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS job_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    job_id TEXT NOT NULL,
-                    event_type TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    data TEXT,
-                    FOREIGN KEY (job_id) REFERENCES jobs (id)
-                )
-            """)
-            
-            # System metrics table
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS system_metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    metric_name TEXT NOT NULL,
-                    metric_value REAL NOT NULL,
-                    timestamp TEXT NOT NULL
-                )
-            """)
-            
-            # Add new columns to existing tables if they don't exist
-            self._migrate_database(conn)
-            
-            # Create indexes for efficient querying (after migration)
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_job ON job_metrics(job_id)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON system_metrics(timestamp)")
-            conn.commit()
-    
-    def _migrate_database(self, conn):
-        """Add new columns to existing database"""
-        new_columns = [
-            ("priority", "INTEGER DEFAULT 0"),
-            ("timeout_seconds", "INTEGER DEFAULT 300"),
-            ("run_at", "TEXT"),
-            ("started_at", "TEXT"),
-            ("completed_at", "TEXT"),
-            ("execution_time_ms", "INTEGER DEFAULT 0"),
-            ("worker_id", "TEXT")
-        ]
-        
-        for column_name, column_def in new_columns:
-            try:
-                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column_name} {column_def}")
-            except sqlite3.OperationalError:
-                # Column already exists
-                pass
-        
-        # Create indexes after ensuring columns exist
-        try:
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_state_priority ON jobs(state, priority DESC, created_at)")
-        except sqlite3.OperationalError:
-            pass
-        
-        try:
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_run_at ON jobs(run_at)")
-        except sqlite3.OperationalError:
-            pass
-        
-        try:
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_next_retry ON jobs(next_retry_at)")
-        except sqlite3.OperationalError:
-            pass
+        """Create or upgrade the database schema"""
+        ensure_schema(self._connect(), self.db_path)
     
     def enqueue(self, job_data: Dict[str, Any], force_replace: bool = False) -> Dict[str, Any]:
         """Add a new job to the queue with enhanced features"""
         with self._lock:
-            job_id = job_data.get('id', str(uuid.uuid4()))
-            now = datetime.now(timezone.utc).isoformat()
+            now = now_us()
+            job = self._build_job(job_data, now)
+            job_id = job['id']
             
             # Check if job already exists
             existing_job = self.get_job(job_id)
             if existing_job and not force_replace:
                 raise ValueError(f"Job with ID '{job_id}' already exists. Use force_replace=True to overwrite.")
             
-            # Handle scheduled jobs
-            run_at = job_data.get('run_at')
-            if run_at:
-                if isinstance(run_at, str):
-                    # Parse ISO format or relative time
-                    if run_at.startswith('+'):
-                        # Relative time like "+5m", "+1h", "+30s"
-                        run_at = self._parse_relative_time(run_at)
-                    # else assume it's already ISO format
-                else:
-                    run_at = run_at.isoformat() if hasattr(run_at, 'isoformat') else str(run_at)
-            
-            job = {
-                'id': job_id,
-                'command': job_data['command'],
-                'state': 'scheduled' if run_at and run_at > now else 'pending',
-                'attempts': 0,
-                'max_retries': job_data.get('max_retries', 3),
-                'priority': job_data.get('priority', 0),
-                'timeout_seconds': job_data.get('timeout_seconds', 300),
-                'run_at': run_at,
-                'created_at': now,
-                'updated_at': now,
-                'started_at': None,
-                'completed_at': None,
-                'next_retry_at': None,
-                'output': None,
-                'error': None,
-                'execution_time_ms': 0,
-                'worker_id': None
-            }
-            
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 if existing_job and force_replace:
                     # Update existing job
-                    conn.execute("""
-                        UPDATE jobs SET command = ?, state = ?, attempts = 0, max_retries = ?, 
-                                      priority = ?, timeout_seconds = ?, run_at = ?, updated_at = ?,
-                                      started_at = NULL, completed_at = NULL, next_retry_at = NULL,
-                                      output = NULL, error = NULL, execution_time_ms = 0, worker_id = NULL
-                        WHERE id = ?
-                    """, (
-                        job['command'], job['state'], job['max_retries'], job['priority'],
-                        job['timeout_seconds'], job['run_at'], job['updated_at'], job['id']
-                    ))
+                    conn.execute(_REPLACE_JOB_SQL, self._replace_params(job))
+                    conn.execute("DELETE FROM job_outputs WHERE job_id = ?", (job_id,))
                 else:
                     # Insert new job
-                    conn.execute("""
-                        INSERT INTO jobs (id, command, state, attempts, max_retries, priority,
-                                        timeout_seconds, run_at, created_at, updated_at, started_at,
-                                        completed_at, next_retry_at, output, error, execution_time_ms, worker_id)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        job['id'], job['command'], job['state'], job['attempts'],
-                        job['max_retries'], job['priority'], job['timeout_seconds'],
-                        job['run_at'], job['created_at'], job['updated_at'],
-                        job['started_at'], job['completed_at'], job['next_retry_at'],
-                        job['output'], job['error'], job['execution_time_ms'], job['worker_id']
-                    ))
+                    conn.execute(_INSERT_JOB_SQL, self._insert_params(job))
                 conn.commit()
             
+            # Scheduled jobs are announced too, so the scheduler picks up the new deadline
+            notify_workers(self.db_path)
+            
             # Log job creation metric
             action = 'replaced' if existing_job and force_replace else 'created'
-            self._log_job_metric(job_id, action, {'priority': job['priority'], 'scheduled': bool(run_at)})
+            self._log_job_metric(job_id, action, {'priority': job['priority'], 'scheduled': bool(job['run_at'])})
             
-            return job
+            return _row_to_dict(job)
     
-    def _parse_relative_time(self, relative_time: str) -> str:
+    def enqueue_many(self, jobs: Iterable[Dict[str, Any]], force_replace: bool = False,
+                     chunk_size: int = 500) -> Dict[str, int]:
+        """Add many jobs, streaming them into the database in chunked transactions
+        
+        The iterable is consumed lazily, so arbitrarily large inputs never
+        have to be held in memory. Each chunk is written with one existence
+        query and multi-row INSERT/UPDATE statements in a single transaction.
+        Jobs whose ID already exists are skipped unless force_replace is set.
+        
+        Returns counts of enqueued, replaced and skipped jobs.
+        """
+        counts = {'enqueued': 0, 'replaced': 0, 'skipped': 0}
+        chunk = []
+        for job_data in jobs:
+            chunk.append(job_data)
+            if len(chunk) >= chunk_size:
+                self._enqueue_chunk(chunk, force_replace, counts)
+                chunk = []
+        if chunk:
+            self._enqueue_chunk(chunk, force_replace, counts)
+        return counts
+    
+    def _enqueue_chunk(self, chunk: List[Dict[str, Any]], force_replace: bool, counts: Dict[str, int]):
+        """Write one chunk of jobs in a single transaction"""
+        with self._lock:
+            now = now_us()
+            built = [self._build_job(job_data, now) for job_data in chunk]
+            
+            with self._connect() as conn:
+                placeholders = ', '.join('?' * len(built))
+                cursor = conn.execute(f"SELECT id FROM jobs WHERE id IN ({placeholders})",
+                                      [job['id'] for job in built])
+                existing = {row[0] for row in cursor.fetchall()}
+                
+                inserts, replaces, metrics = [], [], []
+                for job in built:
+                    if job['id'] in existing:
+                        if not force_replace:
+                            counts['skipped'] += 1
+                            continue
+                        replaces.append(job)
+                        action = 'replaced'
+                    else:
+                        # Later duplicates within the same chunk count as existing
+                        existing.add(job['id'])
+                        inserts.append(job)
+                        action = 'created'
+                    metrics.append((job['id'], action, now, json.dumps(
+                        {'priority': job['priority'], 'scheduled': bool(job['run_at'])})))
+                
+                conn.executemany(_INSERT_JOB_SQL, [self._insert_params(job) for job in inserts])
+                conn.executemany(_REPLACE_JOB_SQL, [self._replace_params(job) for job in replaces])
+                conn.executemany("DELETE FROM job_outputs WHERE job_id = ?", [(job['id'],) for job in replaces])
+                conn.executemany("""
+                    INSERT INTO job_metrics (job_id, event_type, timestamp, data)
+                    VALUES (?, ?, ?, ?)
+                """, metrics)
+                conn.commit()
+            
+            counts['enqueued'] += len(inserts)
+            counts['replaced'] += len(replaces)
+            
+            if inserts or replaces:
+                notify_workers(self.db_path)
+    
+    def _build_job(self, job_data: Dict[str, Any], now: int) -> Dict[str, Any]:
+        """Build a full job record from user supplied job data
+        
+        A job has a shell 'command', an 'exec' argv list, which runs without
+        a shell, or a Python 'callable' ("package.module:function") called
+        with 'args' and 'kwargs' in the worker's process pool. 'env' and
+        'cwd' apply to commands and argv lists.
+        """
+        argv, env, cwd = job_data.get('exec'), job_data.get('env'), job_data.get('cwd')
+        target, args, kwargs = job_data.get('callable'), job_data.get('args'), job_data.get('kwargs')
+        if target is not None:
+            validate_callable(target, args, kwargs)
+        elif argv is not None:
+            if not isinstance(argv, list) or not argv or not all(isinstance(arg, str) for arg in argv):
+                raise ValueError("Job 'exec' must be a non-empty list of strings")
+        elif 'command' not in job_data:
+            raise ValueError("Job must contain 'command', 'exec' or 'callable' field")
+        if env is not None and (not isinstance(env, dict) or
+                                not all(isinstance(k, str) and isinstance(v, str) for k, v in env.items())):
+            raise ValueError("Job 'env' must be an object of string values")
+        if cwd is not None and not isinstance(cwd, str):
+            raise ValueError("Job 'cwd' must be a string")
+        
+        # Handle scheduled jobs
+        run_at = job_data.get('run_at')
+        if run_at:
+            if isinstance(run_at, str) and run_at.startswith('+'):
+                # Relative time like "+5m", "+1h", "+30s"
+                run_at = self._parse_relative_time(run_at)
+            else:
+                # ISO string, datetime or epoch microseconds
+                try:
+                    run_at = to_us(run_at)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid run_at '{run_at}'. Use +30s, +5m, +2h, or ISO format")
+        else:
+            run_at = None
+        
+        return {
+            'id': job_data.get('id', str(uuid.uuid4())),
+            'command': target if target is not None else
+                       display_command(argv) if argv is not None else job_data['command'],
+            'state': 'scheduled' if run_at and run_at > now else 'pending',
+            'attempts': 0,
+            'max_retries': job_data.get('max_retries', 3),
+            'priority': job_data.get('priority', 0),
+            'timeout_seconds': job_data.get('timeout_seconds', 300),
+            'run_at': run_at,
+            'created_at': now,
+            'updated_at': now,
+            'started_at': None,
+            'completed_at': None,
+            'next_retry_at': None,
+            'output': None,
+            'error': None,
+            'execution_time_ms': 0,
+            'worker_id': None,
+            'exec': json.dumps(argv) if argv is not None else None,
+            'env': json.dumps(env) if env else None,
+            'cwd': cwd,
+            'callable': target,
+            'args': json.dumps(list(args)) if args else None,
+            'kwargs': json.dumps(kwargs) if kwargs else None
+        }
+    
+    @staticmethod
+    def _insert_params(job: Dict[str, Any]) -> tuple:
+        """Parameters for _INSERT_JOB_SQL"""
+        return (
+            job['id'], job['command'], job['state'], job['attempts'],
+            job['max_retries'], job['priority'], job['timeout_seconds'],
+            job['run_at'], job['created_at'], job['updated_at'],
+            job['started_at'], job['completed_at'], job['next_retry_at'],
+            job['output'], job['error'], job['execution_time_ms'], job['worker_id'],
+            job['exec'], job['env'], job['cwd'], job['callable'], job['args'], job['kwargs']
+        )
+    
+    @staticmethod
+    def _replace_params(job: Dict[str, Any]) -> tuple:
+        """Parameters for _REPLACE_JOB_SQL"""
+        return (
+            job['command'], job['state'], job['max_retries'], job['priority'],
+            job['timeout_seconds'], job['run_at'], job['updated_at'],
+            job['exec'], job['env'], job['cwd'], job['callable'], job['args'], job['kwargs'], job['id']
+        )
+    
+    def _parse_relative_time(self, relative_time: str) -> int:
         """Parse relative time strings like '+5m', '+1h', '+30s'"""
         import re
         
@@ -199,81 +304,412 @@ class JobQueue:
         multipliers = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
         seconds = amount * multipliers[unit]
         
-        future_time = datetime.now(timezone.utc) + timedelta(seconds=seconds)
-        return future_time.isoformat()
+        return now_us() + seconds * 1000000
     
     def _log_job_metric(self, job_id: str, event_type: str, data: Dict = None):
         """Log job metrics"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.execute("""
                     INSERT INTO job_metrics (job_id, event_type, timestamp, data)
                     VALUES (?, ?, ?, ?)
-                """, (job_id, event_type, datetime.now(timezone.utc).isoformat(), 
+                """, (job_id, event_type, now_us(), 
                      json.dumps(data) if data else None))
                 conn.commit()
         except Exception:
             pass  # Don't fail job operations due to metrics logging
     
-    def get_next_job(self) -> Optional[Dict[str, Any]]:
-        """Get the next job to process with priority and scheduling support"""
+    def claim_next_job(self, worker_id: str, lease_seconds: int = 60) -> Optional[Dict[str, Any]]:
+        """Atomically pick the next ready job and mark it as processing.
+        
+        Selection and the state change happen in one BEGIN IMMEDIATE
+        transaction, so concurrent workers can never claim the same row.
+        The claimed job is returned with its updated fields, including the
+        incremented attempt counter. The claim is a lease that expires after
+        lease_seconds unless the worker extends it with heartbeat().
+        """
+        jobs = self.claim_batch(worker_id, 1, lease_seconds)
+        return jobs[0] if jobs else None
+    
+    def claim_batch(self, worker_id: str, n: int, lease_seconds: int = 60) -> List[Dict[str, Any]]:
+        """Atomically lease up to n ready jobs for one worker
+        
+        Jobs are taken in priority DESC, created_at order and marked as
+        processing in the same transaction, exactly like claim_next_job.
+        """
         with self._lock:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                now = datetime.now(timezone.utc).isoformat()
-                
-                # First, check for scheduled jobs that are ready to run
-                cursor.execute("""
-                    UPDATE jobs 
-                    SET state = 'pending', updated_at = ?
-                    WHERE state = 'scheduled' AND run_at <= ?
-                """, (now, now))
+            conn = self._connect()
+            cursor = conn.cursor()
+            now = now_us()
+            lease_expires_at = now + int(lease_seconds * 1000000)
+            
+            # Due scheduled jobs are promoted here only when no scheduler is running
+            promote_scheduled = not self._lease_active(conn, SCHEDULER_LEASE, now)
+            
+            # Idle polls stay read-only: only take the write lock when there is work
+            if not self._has_ready_jobs(conn, now, promote_scheduled):
+                return []
+            
+            # Take the write lock up front so no other worker can pick
+            # the same candidates between our SELECT and UPDATE
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                if promote_scheduled:
+                    cursor.execute("""
+                        UPDATE jobs 
+                        SET state = 'pending', updated_at = ?
+                        WHERE state = 'scheduled' AND run_at <= ?
+                    """, (now, now))
                 
-                # Get next job with priority ordering
-                cursor.execute("""
-                    SELECT * FROM jobs 
+                cursor.execute(f"""
+                    SELECT {_CLAIM_COLUMNS} FROM jobs 
                     WHERE (state = 'pending' OR 
                            (state = 'failed' AND (next_retry_at IS NULL OR next_retry_at <= ?)))
                     ORDER BY priority DESC, created_at ASC 
-                    LIMIT 1
-                """, (now,))
+                    LIMIT ?
+                """, (now, n))
+                jobs = [dict(row) for row in cursor.fetchall()]
                 
-                row = cursor.fetchone()
-                if row:
-                    return dict(row)
-                return None
+                for job in jobs:
+                    job.update({
+                        'state': 'processing',
+                        'attempts': job['attempts'] + 1,
+                        'worker_id': worker_id,
+                        'started_at': now,
+                        'updated_at': now,
+                        'lease_expires_at': lease_expires_at,
+                        'heartbeat_at': now
+                    })
+                cursor.executemany("""
+                    UPDATE jobs 
+                    SET state = 'processing', attempts = ?, worker_id = ?,
+                        started_at = ?, updated_at = ?, lease_expires_at = ?, heartbeat_at = ?
+                    WHERE id = ?
+                """, [(job['attempts'], worker_id, now, now, lease_expires_at, now, job['id'])
+                      for job in jobs])
+                conn.commit()
+                return [_row_to_dict(job) for job in jobs]
+            except Exception:
+                conn.rollback()
+                raise
     
-    def update_job_state(self, job_id: str, state: str, **kwargs) -> bool:
-        """Update job state and additional fields"""
+    @staticmethod
+    def _has_ready_jobs(conn: sqlite3.Connection, now: int, include_scheduled: bool = True) -> bool:
+        """Cheap read-only check for claimable or due scheduled jobs"""
+        row = conn.execute("""
+            SELECT EXISTS (SELECT 1 FROM jobs WHERE state = 'pending')
+                OR EXISTS (SELECT 1 FROM jobs WHERE state = 'failed' 
+                           AND (next_retry_at IS NULL OR next_retry_at <= ?))
+                OR (? AND EXISTS (SELECT 1 FROM jobs WHERE state = 'scheduled' AND run_at <= ?))
+        """, (now, int(include_scheduled), now)).fetchone()
+        # End the implicit read so this connection doesn't pin the WAL snapshot
+        conn.commit()
+        return bool(row[0])
+    
+    @staticmethod
+    def _lease_active(conn: sqlite3.Connection, name: str, now: int) -> bool:
+        """Whether someone currently holds the named lease"""
+        row = conn.execute("SELECT 1 FROM leases WHERE name = ? AND expires_at > ?",
+                           (name, now)).fetchone()
+        return row is not None
+    
+    def seconds_until_next_due(self) -> Optional[float]:
+        """Seconds until the next scheduled job or retry becomes claimable
+        
+        Returns None when no job is waiting on a timer.
+        """
+        deadlines = self.next_deadlines(1)
+        if not deadlines:
+            return None
+        return max(0.0, seconds_until(deadlines[0][0]))
+    
+    def next_deadlines(self, limit: int) -> List[Tuple[int, str, str]]:
+        """The earliest scheduled run_at and retry next_retry_at deadlines
+        
+        Returns up to limit (deadline_us, kind, job_id) tuples ordered by
+        deadline, where kind is 'scheduled' or 'retry'. Retries that are
+        already due are left out since workers can claim them directly.
+        Both halves are range scans on the (state, deadline) indexes.
+        """
+        now = now_us()
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT due, kind, id FROM (
+                    SELECT * FROM (
+                        SELECT run_at AS due, 'scheduled' AS kind, id FROM jobs 
+                        WHERE state = 'scheduled' AND run_at IS NOT NULL
+                        ORDER BY run_at LIMIT ?
+                    )
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT next_retry_at AS due, 'retry' AS kind, id FROM jobs 
+                        WHERE state = 'failed' AND next_retry_at > ?
+                        ORDER BY next_retry_at LIMIT ?
+                    )
+                )
+                ORDER BY due LIMIT ?
+            """, (limit, now, limit, limit)).fetchall()
+        return [(row['due'], row['kind'], row['id']) for row in rows]
+    
+    def promote_scheduled(self, job_ids: List[str]) -> int:
+        """Move the given scheduled jobs to pending if they are due
+        
+        Returns the number of jobs promoted. Idle workers are notified.
+        """
+        if not job_ids:
+            return 0
+        
         with self._lock:
-            now = datetime.now(timezone.utc).isoformat()
-            
-            # Build dynamic update query
-            update_fields = ['state = ?', 'updated_at = ?']
-            values = [state, now]
+            now = now_us()
+            promoted = 0
+            with self._connect() as conn:
+                for start in range(0, len(job_ids), 500):
+                    chunk = job_ids[start:start + 500]
+                    placeholders = ', '.join('?' * len(chunk))
+                    cursor = conn.execute(f"""
+                        UPDATE jobs 
+                        SET state = 'pending', updated_at = ?
+                        WHERE state = 'scheduled' AND run_at <= ? AND id IN ({placeholders})
+                    """, [now, now] + chunk)
+                    promoted += cursor.rowcount
+                conn.commit()
+        
+        if promoted:
+            notify_workers(self.db_path)
+        return promoted
+    
+    def acquire_lease(self, name: str, owner: str, ttl_seconds: float) -> bool:
+        """Take or renew the named lease for owner
+        
+        Succeeds when the lease is free, expired or already held by owner.
+        """
+        with self._lock:
+            now = now_us()
+            expires_at = now + int(ttl_seconds * 1000000)
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT owner, expires_at FROM leases WHERE name = ?", (name,)).fetchone()
+                if row and row['owner'] != owner and row['expires_at'] > now:
+                    conn.commit()
+                    return False
+                conn.execute("INSERT OR REPLACE INTO leases (name, owner, expires_at) VALUES (?, ?, ?)",
+                             (name, owner, expires_at))
+                conn.commit()
+                return True
+            except Exception:
+                conn.rollback()
+                raise
+    
+    def release_lease(self, name: str, owner: str):
+        """Give up the named lease if owner holds it"""
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+                conn.commit()
+    
+    def release_jobs(self, job_ids: List[str], worker_id: str) -> int:
+        """Hand leased but unstarted jobs back to the queue
+        
+        Only rows still processing under worker_id are touched, and the
+        attempt taken by the claim is given back.
+        """
+        if not job_ids:
+            return 0
+        
+        with self._lock:
+            now = now_us()
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.executemany("""
+                    UPDATE jobs 
+                    SET state = 'pending', attempts = MAX(attempts - 1, 0), worker_id = NULL,
+                        started_at = NULL, lease_expires_at = NULL, heartbeat_at = NULL, updated_at = ?
+                    WHERE id = ? AND state = 'processing' AND worker_id = ?
+                """, [(now, job_id, worker_id) for job_id in job_ids])
+                conn.commit()
             
-            for field in ['attempts', 'next_retry_at', 'output', 'error']:
-                if field in kwargs:
-                    update_fields.append(f'{field} = ?')
-                    values.append(kwargs[field])
+            if cursor.rowcount:
+                notify_workers(self.db_path)
+            return cursor.rowcount
+    
+    def heartbeat(self, job_ids: List[str], worker_id: str, lease_seconds: int = 60) -> int:
+        """Extend the leases a worker holds on its processing jobs
+        
+        Returns the number of leases renewed. Jobs that were reaped or
+        finished in the meantime are left alone.
+        """
+        if not job_ids:
+            return 0
+        
+        with self._lock:
+            now = now_us()
+            lease_expires_at = now + int(lease_seconds * 1000000)
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.executemany("""
+                    UPDATE jobs 
+                    SET lease_expires_at = ?, heartbeat_at = ?
+                    WHERE id = ? AND state = 'processing' AND worker_id = ?
+                """, [(lease_expires_at, now, job_id, worker_id) for job_id in job_ids])
+                conn.commit()
+                return cursor.rowcount
+    
+    def reap_expired_leases(self) -> int:
+        """Requeue processing jobs whose lease ran out
+        
+        A worker that dies mid-job stops heartbeating, so its jobs go back to
+        pending once their lease expires. The lost run counts as an attempt:
+        jobs that already used all their retries move to the DLQ instead.
+        Returns the number of jobs recovered.
+        """
+        with self._lock:
+            now = now_us()
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                expired = conn.execute("""
+                    SELECT id, worker_id, attempts FROM jobs 
+                    WHERE state = 'processing' AND lease_expires_at < ?
+                """, (now,)).fetchall()
+                if not expired:
+                    conn.commit()
+                    return 0
+                
+                conn.executemany("""
+                    INSERT INTO job_metrics (job_id, event_type, timestamp, data)
+                    VALUES (?, 'lease_expired', ?, ?)
+                """, [(row['id'], now, json.dumps({'worker_id': row['worker_id'], 'attempts': row['attempts']}))
+                      for row in expired])
+                errors = [(row['id'], f"Lease expired while processing (worker {row['worker_id'] or '?'} "
+                                      f"stopped responding)") for row in expired]
+                cursor = conn.executemany("""
+                    UPDATE jobs 
+                    SET state = CASE WHEN attempts >= max_retries THEN 'dead' ELSE 'pending' END,
+                        error = ?,
+                        completed_at = CASE WHEN attempts >= max_retries THEN ? ELSE NULL END,
+                        worker_id = NULL, started_at = NULL, lease_expires_at = NULL,
+                        heartbeat_at = NULL, updated_at = ?
+                    WHERE id = ? AND state = 'processing' AND lease_expires_at < ?
+                """, [(error, now, now, job_id, now) for job_id, error in errors])
+                # Replace the previous attempt's output, which get_job would show instead
+                conn.executemany(_STORE_OUTPUT_SQL, [self._output_params(job_id, {'error': error})
+                                                     for job_id, error in errors])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
             
-            values.append(job_id)
+            notify_workers(self.db_path)
+            return cursor.rowcount
+    
+    def update_job_state(self, job_id: str, state: str, **kwargs) -> bool:
+        """Update job state and additional fields"""
+        with self._lock:
+            now = now_us()
+            sql, values = self._update_statement(job_id, state, now, kwargs)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute(f"""
-                    UPDATE jobs SET {', '.join(update_fields)}
-                    WHERE id = ?
-                """, values)
+                cursor.execute(sql, values)
+                updated = cursor.rowcount > 0
+                if updated and ('output' in kwargs or 'error' in kwargs):
+                    conn.execute(_STORE_OUTPUT_SQL, self._output_params(job_id, kwargs))
+                conn.commit()
+                return updated
+    
+    def update_job_states(self, updates: List[Dict[str, Any]],
+                          metrics: Optional[List[Tuple[str, str, Optional[Dict]]]] = None,
+                          worker_id: Optional[str] = None) -> List[str]:
+        """Apply several job state updates and metric events in one commit
+        
+        Each update is a dict with 'id', 'state' and any of the fields
+        accepted by update_job_state. Metrics are (job_id, event_type, data)
+        tuples, logged in the same transaction.
+        
+        With worker_id, only jobs that worker still holds (processing under
+        its lease) are updated: a job whose lease was reaped may have been
+        claimed or finished by another worker since. Returns the IDs of the
+        jobs skipped that way; their metrics are dropped too.
+        """
+        if not updates and not metrics:
+            return []
+        
+        with self._lock:
+            now = now_us()
+            skipped = []
+            with self._connect() as conn:
+                outputs = []
+                for update in updates:
+                    fields = {k: v for k, v in update.items() if k not in ('id', 'state')}
+                    cursor = conn.execute(*self._update_statement(update['id'], update['state'], now, fields,
+                                                                  worker_id))
+                    if not cursor.rowcount:
+                        if worker_id is not None:
+                            skipped.append(update['id'])
+                        continue
+                    if 'output' in fields or 'error' in fields:
+                        outputs.append(self._output_params(update['id'], fields))
+                conn.executemany(_STORE_OUTPUT_SQL, outputs)
+                if skipped and metrics:
+                    skipped_ids = set(skipped)
+                    metrics = [metric for metric in metrics if metric[0] not in skipped_ids]
+                if metrics:
+                    conn.executemany("""
+                        INSERT INTO job_metrics (job_id, event_type, timestamp, data)
+                        VALUES (?, ?, ?, ?)
+                    """, [(job_id, event_type, now, json.dumps(data) if data else None)
+                          for job_id, event_type, data in metrics])
                 conn.commit()
-                return cursor.rowcount > 0
+            
+            # Scheduled retries may change how long idle workers should wait
+            if any(update['state'] == 'failed' for update in updates):
+                notify_workers(self.db_path)
+            return skipped
+    
+    @staticmethod
+    def _update_statement(job_id: str, state: str, now: int, fields: Dict[str, Any],
+                          worker_id: Optional[str] = None) -> Tuple[str, list]:
+        """Build the UPDATE statement for a job state change, limited to worker_id's lease if given"""
+        update_fields = ['state = ?', 'updated_at = ?']
+        values = [state, now]
+        if state != 'processing':
+            # Leaving processing ends the worker's lease
+            update_fields.append('lease_expires_at = NULL')
+        
+        # The full output and error go to job_outputs (_output_params); the row keeps an error summary
+        for field in ['attempts', 'next_retry_at', 'output_path', 'error', 'started_at',
+                      'completed_at', 'execution_time_ms', 'worker_id']:
+            if field in fields:
+                update_fields.append(f'{field} = ?')
+                value = fields[field]
+                if field in TIMESTAMP_COLUMNS['jobs']:
+                    value = to_us(value)
+                elif field == 'error':
+                    value = error_summary(value)
+                values.append(value)
+        
+        values.append(job_id)
+        where = "id = ?"
+        if worker_id is not None:
+            where += " AND state = 'processing' AND worker_id = ?"
+            values.append(worker_id)
+        return f"UPDATE jobs SET {', '.join(update_fields)} WHERE {where}", values
+    
+    @staticmethod
+    def _output_params(job_id: str, fields: Dict[str, Any]) -> tuple:
+        """Parameters for _STORE_OUTPUT_SQL; each attempt replaces the last one's output"""
+        return job_id, compress_text(fields.get('output')), compress_text(fields.get('error'))
     
     def get_status(self) -> Dict[str, int]:
-        """Get count of jobs by state"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Get count of jobs by state, cached until the next commit"""
+        return dict(self.snapshots.get(('status',), self._count_states))
+    
+    def _count_states(self) -> Dict[str, int]:
+        """Count jobs by state from the trigger-maintained queue_counters"""
+        with self._connect() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+            cursor.execute("SELECT state, SUM(count) FROM queue_counters GROUP BY state HAVING SUM(count) > 0")
             
             status = {
                 'pending': 0,
@@ -288,26 +724,109 @@ class JobQueue:
             
             return status
     
+    def get_priority_counts(self, state: str = 'pending') -> Dict[int, int]:
+        """Count jobs in a state by priority, highest priority first"""
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                SELECT priority, count FROM queue_counters
+                WHERE state = ? AND count > 0
+                ORDER BY priority DESC
+            """, (state,))
+            return {priority: count for priority, count in cursor.fetchall()}
+    
+    def get_backlog(self) -> Dict[str, Any]:
+        """Claimable jobs, jobs in progress and how long the oldest ready job has waited
+
+        A job counts as ready from the later of its creation and its run_at,
+        or from its retry time if it failed. Used to size the worker pool.
+        """
+        now = now_us()
+        with self._connect() as conn:
+            ready, oldest = conn.execute("""
+                SELECT COUNT(*),
+                       MIN(CASE WHEN state = 'failed' THEN IFNULL(next_retry_at, updated_at)
+                                ELSE MAX(created_at, IFNULL(run_at, created_at)) END)
+                FROM jobs
+                WHERE state = 'pending'
+                   OR (state = 'failed' AND (next_retry_at IS NULL OR next_retry_at <= ?))
+                   OR (state = 'scheduled' AND run_at <= ?)
+            """, (now, now)).fetchone()
+            processing = conn.execute(
+                "SELECT IFNULL(SUM(count), 0) FROM queue_counters WHERE state = 'processing'"
+            ).fetchone()[0]
+
+        return {
+            'ready': ready,
+            'processing': processing,
+            'oldest_wait_seconds': max(0.0, (now - oldest) / 1000000) if oldest is not None else 0.0
+        }
+    
     def list_jobs(self, state: Optional[str] = None) -> List[Dict[str, Any]]:
         """List jobs, optionally filtered by state"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.cursor()
             
             if state:
-                cursor.execute("""
-                    SELECT * FROM jobs WHERE state = ? 
+                cursor.execute(f"""
+                    SELECT {_JOB_COLUMNS} FROM jobs WHERE state = ? 
                     ORDER BY created_at DESC
                 """, (state,))
             else:
-                cursor.execute("SELECT * FROM jobs ORDER BY created_at DESC")
+                cursor.execute(f"SELECT {_JOB_COLUMNS} FROM jobs ORDER BY created_at DESC")
             
-            return [dict(row) for row in cursor.fetchall()]
+            return [_row_to_dict(row) for row in cursor.fetchall()]
+    
+    def list_jobs_page(self, state: Optional[str] = None, limit: int = 100,
+                       cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of jobs, newest first, and the cursor for the next page
+        
+        Pages seek past the previous page's last (created_at, id) on an
+        index instead of using OFFSET, so every page costs the same however
+        deep it is. The cursor is None after the last page.
+        """
+        conditions, params = [], []
+        if state:
+            conditions.append("state = ?")
+            params.append(state)
+        if cursor:
+            created_at, _, job_id = cursor.partition(':')
+            try:
+                created_at = int(created_at)
+            except ValueError:
+                raise ValueError(f"Invalid cursor '{cursor}'")
+            # created_at <= ? bounds the index range; the OR breaks ties on id
+            conditions.append("created_at <= ? AND (created_at < ? OR id < ?)")
+            params.extend([created_at, created_at, job_id])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        with self._connect() as conn:
+            rows = conn.execute(f"""
+                SELECT {_JOB_COLUMNS} FROM jobs {where}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            """, params + [limit + 1]).fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1]['created_at']}:{rows[-1]['id']}"
+        return [_row_to_dict(row) for row in rows], next_cursor
+    
+    def list_jobs_updated_since(self, since: Any, limit: int = 500) -> List[Dict[str, Any]]:
+        """Jobs whose updated_at is at or after since, oldest change first"""
+        with self._connect() as conn:
+            rows = conn.execute(f"""
+                SELECT {_JOB_COLUMNS} FROM jobs 
+                WHERE updated_at >= ? 
+                ORDER BY updated_at ASC 
+                LIMIT ?
+            """, (to_us(since), limit)).fetchall()
+            return [_row_to_dict(row) for row in rows]
     
     def retry_from_dlq(self, job_id: str) -> bool:
         """Move a job from DLQ back to pending state"""
         with self._lock:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Check if job exists in DLQ
@@ -316,107 +835,172 @@ class JobQueue:
                     raise ValueError(f"Job {job_id} not found in Dead Letter Queue")
                 
                 # Reset job to pending state
-                now = datetime.now(timezone.utc).isoformat()
+                now = now_us()
                 cursor.execute("""
                     UPDATE jobs 
                     SET state = 'pending', attempts = 0, next_retry_at = NULL, 
                         updated_at = ?, error = NULL
                     WHERE id = ?
                 """, (now, job_id))
+                cursor.execute("DELETE FROM job_outputs WHERE job_id = ?", (job_id,))
                 
                 conn.commit()
-                return cursor.rowcount > 0
+            
+            notify_workers(self.db_path)
+            return cursor.rowcount > 0
     
     def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
-        """Get a specific job by ID"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        """Get a specific job by ID, including its full output and error"""
+        with self._connect() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            cursor.execute(f"SELECT {_JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,))
             
             row = cursor.fetchone()
-            return dict(row) if row else None
+            if not row:
+                return None
+        
+        job = _row_to_dict(row)
+        job['output'] = None
+        job.update(self.get_job_output(job_id) or {})
+        return job
+    
+    def get_job_output(self, job_id: str) -> Optional[Dict[str, Optional[str]]]:
+        """The last attempt's full output and error, or None if nothing was recorded"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT output, error FROM job_outputs WHERE job_id = ?",
+                               (job_id,)).fetchone()
+        if not row:
+            return None
+        return {'output': decompress_text(row['output']), 'error': decompress_text(row['error'])}
     
     def delete_job(self, job_id: str) -> bool:
-        """Delete a job from the queue"""
+        """Delete a job from the queue, along with its spilled output"""
         with self._lock:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
+                row = cursor.execute("SELECT output_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
                 cursor.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                deleted = cursor.rowcount > 0
+                cursor.execute("DELETE FROM job_outputs WHERE job_id = ?", (job_id,))
                 conn.commit()
-                return cursor.rowcount > 0
+        if deleted and row and row[0]:
+            try:
+                os.remove(row[0])
+            except OSError:
+                pass
+        return deleted
     
     def get_job_metrics(self, job_id: str) -> List[Dict[str, Any]]:
         """Get metrics for a specific job"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT * FROM job_metrics 
                 WHERE job_id = ? 
                 ORDER BY timestamp ASC
             """, (job_id,))
-            return [dict(row) for row in cursor.fetchall()]
+            return [_row_to_dict(row, 'job_metrics') for row in cursor.fetchall()]
+    
+    def get_metrics_for_jobs(self, job_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Metrics for several jobs in one query, keyed by job ID"""
+        metrics = {job_id: [] for job_id in job_ids}
+        job_ids = list(metrics)
+        with self._connect() as conn:
+            # Chunked to stay under SQLite's default limit of 999 parameters
+            for start in range(0, len(job_ids), 500):
+                chunk = job_ids[start:start + 500]
+                rows = conn.execute(f"""
+                    SELECT * FROM job_metrics 
+                    WHERE job_id IN ({', '.join('?' * len(chunk))}) 
+                    ORDER BY timestamp ASC, id ASC
+                """, chunk).fetchall()
+                for row in rows:
+                    metrics[row['job_id']].append(_row_to_dict(row, 'job_metrics'))
+        return metrics
     
     def get_system_metrics(self, hours: int = 24) -> Dict[str, Any]:
-        """Get system metrics for the last N hours"""
-        since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+        """Get system metrics for the last N hours, cached until the next commit"""
+        metrics = self.snapshots.get(('system_metrics', hours), lambda: self._compute_system_metrics(hours))
+        return dict(metrics, job_counts=dict(metrics['job_counts']))
+    
+    def _compute_system_metrics(self, hours: int) -> Dict[str, Any]:
+        """Compute system metrics for the last N hours in one pass over metric_rollups
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Job counts by state
-            cursor.execute("""
-                SELECT state, COUNT(*) as count 
-                FROM jobs 
-                WHERE created_at >= ?
-                GROUP BY state
-            """, (since,))
-            job_counts = dict(cursor.fetchall())
-            
-            # Average execution time
-            cursor.execute("""
-                SELECT AVG(execution_time_ms) as avg_execution_time
-                FROM jobs 
-                WHERE state = 'completed' AND created_at >= ?
-            """, (since,))
-            avg_execution = cursor.fetchone()[0] or 0
-            
-            # Jobs per hour
-            cursor.execute("""
-                SELECT COUNT(*) as total_jobs
-                FROM jobs 
-                WHERE created_at >= ?
-            """, (since,))
-            total_jobs = cursor.fetchone()[0]
-            
-            # Success rate
-            cursor.execute("""
-                SELECT 
-                    SUM(CASE WHEN state = 'completed' THEN 1 ELSE 0 END) as completed,
-                    COUNT(*) as total
-                FROM jobs 
-                WHERE created_at >= ? AND state IN ('completed', 'dead')
-            """, (since,))
-            result = cursor.fetchone()
-            success_rate = (result[0] / result[1] * 100) if result[1] > 0 else 0
-            
-            return {
-                'job_counts': job_counts,
-                'avg_execution_time_ms': avg_execution,
-                'jobs_per_hour': total_jobs / hours,
-                'success_rate_percent': success_rate,
-                'period_hours': hours
-            }
+        Uses the finest resolution whose buckets still cover the window, so
+        the window may start up to one bucket early.
+        """
+        now = now_us()
+        since = now - int(hours * 3600 * 1000000)
+        resolution = next(width for width, retention in ROLLUP_RESOLUTIONS
+                          if retention is None or now - since <= retention * 1000000)
+        bucket_us = resolution * 1000000
+        
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                SELECT outcome, bin_ms, SUM(count), SUM(time_sum_ms), MIN(time_min_ms), MAX(time_max_ms)
+                FROM metric_rollups
+                WHERE resolution = ? AND bucket_start >= ?
+                GROUP BY outcome, bin_ms
+                ORDER BY outcome, bin_ms
+            """, (resolution, since // bucket_us * bucket_us))
+            rows = cursor.fetchall()
+        
+        job_counts: Dict[str, int] = {}
+        histogram: List[Tuple[int, int]] = []
+        time_sum = 0
+        time_min = time_max = None
+        for outcome, bin_ms, count, bin_sum, bin_min, bin_max in rows:
+            job_counts[outcome] = job_counts.get(outcome, 0) + count
+            if outcome == 'completed':
+                histogram.append((bin_ms, count))
+                time_sum += bin_sum
+                time_min = bin_min if time_min is None else min(time_min, bin_min)
+                time_max = bin_max if time_max is None else max(time_max, bin_max)
+        
+        completed = job_counts.get('completed', 0)
+        finished = completed + job_counts.get('dead', 0)
+        return {
+            'job_counts': job_counts,
+            'avg_execution_time_ms': time_sum / completed if completed else 0,
+            'min_execution_time_ms': time_min or 0,
+            'max_execution_time_ms': time_max or 0,
+            'p50_execution_time_ms': _histogram_percentile(histogram, 0.50, time_max),
+            'p95_execution_time_ms': _histogram_percentile(histogram, 0.95, time_max),
+            'jobs_per_hour': finished / hours,
+            'success_rate_percent': completed / finished * 100 if finished else 0,
+            'period_hours': hours,
+            'resolution_seconds': resolution
+        }
+    
+    def prune_metrics(self, raw_retention_days: float = 30) -> int:
+        """Delete rollup buckets past their resolution's retention and older system_metrics rows
+        
+        Returns the number of rows deleted.
+        """
+        now = now_us()
+        deleted = 0
+        with self._lock:
+            with self._connect() as conn:
+                for resolution, retention in ROLLUP_RESOLUTIONS:
+                    if retention is not None:
+                        deleted += conn.execute("""
+                            DELETE FROM metric_rollups WHERE resolution = ? AND bucket_start < ?
+                        """, (resolution, now - retention * 1000000)).rowcount
+                deleted += conn.execute(
+                    "DELETE FROM system_metrics WHERE timestamp < ?",
+                    (now - int(raw_retention_days * 86400 * 1000000),)
+                ).rowcount
+                conn.commit()
+        return deleted
     
     def log_system_metric(self, metric_name: str, value: float):
         """Log a system metric"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 conn.execute("""
                     INSERT INTO system_metrics (metric_name, metric_value, timestamp)
                     VALUES (?, ?, ?)
-                """, (metric_name, value, datetime.now(timezone.utc).isoformat()))
+                """, (metric_name, value, now_us()))
                 conn.commit()
         except Exception:
             pass  # Don't fail operations due to metrics logging
\ No newline at end of file
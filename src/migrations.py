@@ -0,0 +1,453 @@
+"""
+Versioned schema migrations for the QueueCTL database
+
+The schema version is kept in PRAGMA user_version. Opening an up-to-date
+database costs a single pragma read per process; older databases are
+brought forward by running the missing migrations in one transaction.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Callable, List, Optional, Set, Tuple
+
+from .output_capture import compress_text, error_summary
+from .timestamps import lenient_to_us, now_us
+
+
+# Table definitions; timestamps are INTEGER microseconds since the Unix epoch
+JOBS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id TEXT PRIMARY KEY,
+        command TEXT NOT NULL,
+        state TEXT DEFAULT 'pending',
+        attempts INTEGER DEFAULT 0,
+        max_retries INTEGER DEFAULT 3,
+        priority INTEGER DEFAULT 0,
+        timeout_seconds INTEGER DEFAULT 300,
+        run_at INTEGER,
+        created_at INTEGER NOT NULL,
+        updated_at INTEGER NOT NULL,
+        started_at INTEGER,
+        completed_at INTEGER,
+        next_retry_at INTEGER,
+        output TEXT,
+        error TEXT,
+        execution_time_ms INTEGER DEFAULT 0,
+        worker_id TEXT,
+        lease_expires_at INTEGER,
+        heartbeat_at INTEGER
+    )
+"""
+
+JOB_METRICS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        timestamp INTEGER NOT NULL,
+        data TEXT,
+        FOREIGN KEY (job_id) REFERENCES jobs (id)
+    )
+"""
+
+SYSTEM_METRICS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        metric_name TEXT NOT NULL,
+        metric_value REAL NOT NULL,
+        timestamp INTEGER NOT NULL
+    )
+"""
+
+LEASES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        name TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires_at INTEGER NOT NULL
+    )
+"""
+
+CONFIG_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Full job output and error, zlib-compressed (version 3); kept out of the jobs
+# table so listings and claims don't read them
+JOB_OUTPUTS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        job_id TEXT PRIMARY KEY,
+        output BLOB,
+        error BLOB,
+        FOREIGN KEY (job_id) REFERENCES jobs (id)
+    )
+"""
+
+# Jobs per (state, priority), kept exact by the triggers below (version 8) so
+# status queries don't scan jobs
+QUEUE_COUNTERS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        state TEXT,
+        priority INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (state, priority)
+    )
+"""
+
+# A counter row is created by the first job with its state and priority: the
+# INSERT only adds a row when the UPDATE before it changed none. Cheaper per
+# job than INSERT OR IGNORE first, and unlike an upsert works before SQLite 3.24.
+QUEUE_COUNTER_TRIGGERS_SQL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_count_insert AFTER INSERT ON jobs
+    BEGIN
+        UPDATE queue_counters SET count = count + 1
+        WHERE state = NEW.state AND priority = IFNULL(NEW.priority, 0);
+        INSERT INTO queue_counters (state, priority, count)
+        SELECT NEW.state, IFNULL(NEW.priority, 0), 1 WHERE changes() = 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_count_delete AFTER DELETE ON jobs
+    BEGIN
+        UPDATE queue_counters SET count = count - 1
+        WHERE state = OLD.state AND priority = IFNULL(OLD.priority, 0);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_count_update AFTER UPDATE OF state, priority ON jobs
+    WHEN OLD.state IS NOT NEW.state OR OLD.priority IS NOT NEW.priority
+    BEGIN
+        UPDATE queue_counters SET count = count - 1
+        WHERE state = OLD.state AND priority = IFNULL(OLD.priority, 0);
+        UPDATE queue_counters SET count = count + 1
+        WHERE state = NEW.state AND priority = IFNULL(NEW.priority, 0);
+        INSERT INTO queue_counters (state, priority, count)
+        SELECT NEW.state, IFNULL(NEW.priority, 0), 1 WHERE changes() = 0;
+    END
+    """,
+)
+
+# Finished job runs per time bucket, outcome and execution-time bin (version 9),
+# kept at each resolution in ROLLUP_RESOLUTIONS so metrics for any window are
+# summed from buckets instead of scanning jobs
+METRIC_ROLLUPS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        resolution INTEGER NOT NULL,
+        bucket_start INTEGER NOT NULL,
+        outcome TEXT NOT NULL,
+        bin_ms INTEGER NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        time_sum_ms INTEGER NOT NULL DEFAULT 0,
+        time_min_ms INTEGER,
+        time_max_ms INTEGER,
+        PRIMARY KEY (resolution, bucket_start, outcome, bin_ms)
+    )
+"""
+
+# Bucket width in seconds and how long its buckets are kept (None = forever)
+ROLLUP_RESOLUTIONS = ((60, 2 * 86400), (3600, 90 * 86400), (86400, None))
+
+# Lower edges of the execution-time histogram bins, in milliseconds
+HISTOGRAM_EDGES_MS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000,
+                      50000, 100000, 200000, 500000, 1000000, 2000000, 5000000)
+
+# Job states that end a run and are counted in metric_rollups
+ROLLUP_OUTCOMES = ('completed', 'failed', 'dead')
+
+
+def _bin_sql(time_ms: str) -> str:
+    """SQL expression for the histogram bin (lower edge) of an execution time"""
+    cases = ' '.join(f"WHEN {time_ms} < {upper} THEN {lower}"
+                     for lower, upper in zip(HISTOGRAM_EDGES_MS, HISTOGRAM_EDGES_MS[1:]))
+    return f"CASE {cases} ELSE {HISTOGRAM_EDGES_MS[-1]} END"
+
+
+def _rollup_trigger_sql() -> str:
+    """Trigger adding each finished run to its bucket at every resolution"""
+    time_ms = "MAX(IFNULL(NEW.execution_time_ms, 0), 0)"
+    bin_ms = _bin_sql(time_ms)
+    statements = []
+    for resolution, _ in ROLLUP_RESOLUTIONS:
+        bucket = f"(NEW.updated_at / {resolution * 1000000}) * {resolution * 1000000}"
+        statements.append(f"""
+        UPDATE metric_rollups
+        SET count = count + 1, time_sum_ms = time_sum_ms + {time_ms},
+            time_min_ms = MIN(time_min_ms, {time_ms}), time_max_ms = MAX(time_max_ms, {time_ms})
+        WHERE resolution = {resolution} AND bucket_start = {bucket}
+          AND outcome = NEW.state AND bin_ms = {bin_ms};
+        INSERT INTO metric_rollups (resolution, bucket_start, outcome, bin_ms, count,
+                                    time_sum_ms, time_min_ms, time_max_ms)
+        SELECT {resolution}, {bucket}, NEW.state, {bin_ms}, 1, {time_ms}, {time_ms}, {time_ms}
+        WHERE changes() = 0;""")
+    outcomes = ', '.join(f"'{outcome}'" for outcome in ROLLUP_OUTCOMES)
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS jobs_rollup_outcome AFTER UPDATE OF state ON jobs
+    WHEN NEW.state IN ({outcomes}) AND OLD.state IS NOT NEW.state
+    BEGIN{''.join(statements)}
+    END
+    """
+
+
+TABLE_SQL = {
+    'jobs': JOBS_TABLE_SQL,
+    'job_metrics': JOB_METRICS_TABLE_SQL,
+    'system_metrics': SYSTEM_METRICS_TABLE_SQL,
+    'leases': LEASES_TABLE_SQL,
+    'config': CONFIG_TABLE_SQL
+}
+
+# Timestamp columns of each table, stored as epoch microseconds
+TIMESTAMP_COLUMNS = {
+    'jobs': ('run_at', 'created_at', 'updated_at', 'started_at', 'completed_at',
+             'next_retry_at', 'lease_expires_at', 'heartbeat_at'),
+    'job_metrics': ('timestamp',),
+    'system_metrics': ('timestamp',),
+    'leases': ('expires_at',)
+}
+
+
+def _create_schema(conn: sqlite3.Connection):
+    """Version 1: tables, columns and indexes as of integer timestamps
+
+    Also upgrades databases created before versioning: columns added over
+    time are filled in and ISO text timestamps are converted to integers.
+    """
+    for table, sql in TABLE_SQL.items():
+        conn.execute(sql.format(table=table))
+
+    jobs_columns = _columns(conn, 'jobs')
+    for column_name, column_def in [
+        ("priority", "INTEGER DEFAULT 0"),
+        ("timeout_seconds", "INTEGER DEFAULT 300"),
+        ("run_at", "INTEGER"),
+        ("started_at", "INTEGER"),
+        ("completed_at", "INTEGER"),
+        ("execution_time_ms", "INTEGER DEFAULT 0"),
+        ("worker_id", "TEXT"),
+        ("lease_expires_at", "INTEGER"),
+        ("heartbeat_at", "INTEGER")
+    ]:
+        if column_name not in jobs_columns:
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {column_name} {column_def}")
+
+    # Databases created before integer timestamps keep ISO text; rebuild them
+    for table, column in [('jobs', 'created_at'), ('job_metrics', 'timestamp'),
+                          ('system_metrics', 'timestamp'), ('leases', 'expires_at')]:
+        if _columns(conn, table).get(column) == 'TEXT':
+            _rebuild_with_integer_timestamps(conn, table)
+
+    for statement in [
+        "CREATE INDEX IF NOT EXISTS idx_state_priority ON jobs(state, priority DESC, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_run_at ON jobs(run_at)",
+        "CREATE INDEX IF NOT EXISTS idx_next_retry ON jobs(next_retry_at)",
+        "CREATE INDEX IF NOT EXISTS idx_lease ON jobs(state, lease_expires_at)",
+        "CREATE INDEX IF NOT EXISTS idx_state_run_at ON jobs(state, run_at)",
+        "CREATE INDEX IF NOT EXISTS idx_state_next_retry ON jobs(state, next_retry_at)",
+        "CREATE INDEX IF NOT EXISTS idx_metrics_job ON job_metrics(job_id)",
+        "CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON system_metrics(timestamp)"
+    ]:
+        conn.execute(statement)
+
+
+def _add_output_path(conn: sqlite3.Connection):
+    """Version 2: jobs.output_path, the spill file of output too large for the row"""
+    if 'output_path' not in _columns(conn, 'jobs'):
+        conn.execute("ALTER TABLE jobs ADD COLUMN output_path TEXT")
+
+
+def _create_job_outputs(conn: sqlite3.Connection):
+    """Version 3: move output and error into compressed job_outputs rows
+
+    jobs.error keeps a short summary for listings. jobs.output is emptied
+    rather than dropped, since SQLite before 3.35 can't drop columns.
+    """
+    conn.execute(JOB_OUTPUTS_TABLE_SQL.format(table='job_outputs'))
+    conn.create_function('compress_text', 1, compress_text)
+    conn.create_function('error_summary', 1, error_summary)
+    conn.execute("""
+        INSERT OR REPLACE INTO job_outputs (job_id, output, error)
+        SELECT id, compress_text(output), compress_text(error) FROM jobs
+        WHERE output IS NOT NULL OR error IS NOT NULL
+    """)
+    conn.execute("""
+        UPDATE jobs SET output = NULL, error = error_summary(error)
+        WHERE output IS NOT NULL OR error IS NOT NULL
+    """)
+
+
+def _add_exec_columns(conn: sqlite3.Connection):
+    """Version 4: jobs.exec, env and cwd for jobs run from an argv list without a shell"""
+    columns = _columns(conn, 'jobs')
+    for column_name in ('exec', 'env', 'cwd'):
+        if column_name not in columns:
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {column_name} TEXT")
+
+
+def _add_callable_columns(conn: sqlite3.Connection):
+    """Version 5: jobs.callable, args and kwargs for Python callable jobs"""
+    columns = _columns(conn, 'jobs')
+    for column_name in ('callable', 'args', 'kwargs'):
+        if column_name not in columns:
+            conn.execute(f"ALTER TABLE jobs ADD COLUMN {column_name} TEXT")
+
+
+def _add_listing_indexes(conn: sqlite3.Connection):
+    """Version 6: indexes for paging through jobs newest first, overall and by state"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_created ON jobs(created_at, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_state_created ON jobs(state, created_at, id)")
+
+
+def _add_updated_index(conn: sqlite3.Connection):
+    """Version 7: index for finding recently changed jobs (dashboard live feed)"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_updated ON jobs(updated_at)")
+
+
+def _create_queue_counters(conn: sqlite3.Connection):
+    """Version 8: queue_counters, per-state and per-priority job counts kept by triggers"""
+    conn.execute(QUEUE_COUNTERS_TABLE_SQL.format(table='queue_counters'))
+    for trigger_sql in QUEUE_COUNTER_TRIGGERS_SQL:
+        conn.execute(trigger_sql)
+    conn.execute("DELETE FROM queue_counters")
+    conn.execute("""
+        INSERT INTO queue_counters (state, priority, count)
+        SELECT state, IFNULL(priority, 0), COUNT(*) FROM jobs GROUP BY state, IFNULL(priority, 0)
+    """)
+
+
+def _create_metric_rollups(conn: sqlite3.Connection):
+    """Version 9: metric_rollups, time-bucketed outcome counts and execution times kept by a trigger
+
+    Buckets are seeded from the last outcome of each finished job still
+    within the resolution's retention.
+    """
+    conn.execute(METRIC_ROLLUPS_TABLE_SQL.format(table='metric_rollups'))
+    conn.execute(_rollup_trigger_sql())
+    conn.execute("DELETE FROM metric_rollups")
+    now = now_us()
+    outcomes = ', '.join('?' * len(ROLLUP_OUTCOMES))
+    for resolution, retention in ROLLUP_RESOLUTIONS:
+        width = resolution * 1000000
+        since = now - retention * 1000000 if retention else 0
+        conn.execute(f"""
+            INSERT INTO metric_rollups (resolution, bucket_start, outcome, bin_ms, count,
+                                        time_sum_ms, time_min_ms, time_max_ms)
+            SELECT {resolution}, bucket_start, state, {_bin_sql('time_ms')} AS bin_ms, COUNT(*),
+                   SUM(time_ms), MIN(time_ms), MAX(time_ms)
+            FROM (
+                SELECT (updated_at / {width}) * {width} AS bucket_start, state,
+                       MAX(IFNULL(execution_time_ms, 0), 0) AS time_ms
+                FROM jobs WHERE state IN ({outcomes}) AND updated_at >= ?
+            )
+            GROUP BY bucket_start, state, bin_ms
+        """, ROLLUP_OUTCOMES + (since,))
+
+
+# Migration N brings a database from user_version N-1 to N. Append only.
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _create_schema,
+    _add_output_path,
+    _create_job_outputs,
+    _add_exec_columns,
+    _add_callable_columns,
+    _add_listing_indexes,
+    _add_updated_index,
+    _create_queue_counters,
+    _create_metric_rollups,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+_checked: Set[Tuple[int, str]] = set()
+_checked_lock = threading.Lock()
+
+
+def ensure_schema(conn: sqlite3.Connection, db_path: str):
+    """Bring the database up to SCHEMA_VERSION, at most once per process
+
+    Raises RuntimeError if the database was written by a newer QueueCTL.
+    """
+    key = (os.getpid(), os.path.abspath(db_path))
+    if key in _checked:
+        return
+
+    with _checked_lock:
+        if key in _checked:
+            return
+        if schema_version(conn) != SCHEMA_VERSION:
+            migrate(conn)
+        _checked.add(key)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """The database's schema version"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> int:
+    """Run pending migrations up to target (default: latest) in one transaction
+
+    The version is re-read under the write lock so concurrent processes
+    opening the same database migrate it only once. Returns the new version.
+    """
+    target = SCHEMA_VERSION if target is None else target
+    if conn.in_transaction:
+        conn.commit()
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = schema_version(conn)
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(
+                f"Database schema version {version} is newer than this QueueCTL supports "
+                f"({SCHEMA_VERSION}); upgrade QueueCTL"
+            )
+        for migration in MIGRATIONS[version:target]:
+            migration(conn)
+        if target > version:
+            conn.execute(f"PRAGMA user_version = {int(target)}")
+        conn.commit()
+        return max(version, target)
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> dict:
+    """Map of column name to declared type"""
+    return {row[1]: row[2].upper() for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _rebuild_with_integer_timestamps(conn: sqlite3.Connection, table: str):
+    """Copy a table into the current definition, converting ISO text timestamps
+
+    SQLite can't change a column's type in place, and TEXT affinity would
+    turn stored integers back into text, so the rows are copied into a new
+    table that is then swapped in.
+    """
+    conn.create_function('to_us', 1, lenient_to_us)
+    new_table = f'{table}_migrated'
+    conn.execute(f"DROP TABLE IF EXISTS {new_table}")
+    conn.execute(TABLE_SQL[table].format(table=new_table))
+
+    not_null = {row[1]: row[3] for row in conn.execute(f"PRAGMA table_info({new_table})")}
+    columns = [column for column in _columns(conn, table) if column in not_null]
+    values = []
+    for column in columns:
+        if column not in TIMESTAMP_COLUMNS[table]:
+            values.append(column)
+        elif not_null[column]:
+            values.append(f"IFNULL(to_us({column}), {now_us()})")
+        else:
+            values.append(f"to_us({column})")
+
+    conn.execute(f"""
+        INSERT INTO {new_table} ({', '.join(columns)})
+        SELECT {', '.join(values)} FROM {table}
+    """)
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
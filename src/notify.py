@@ -0,0 +1,139 @@
+"""
+Local wakeup notifications for idle workers
+"""
+
+import hashlib
+import os
+import select
+import socket
+import tempfile
+import uuid
+from typing import Optional
+
+
+def wake_dir(db_path: str) -> str:
+    """Directory holding the wake sockets of workers serving db_path
+
+    Unix socket paths are limited to about 100 bytes, so the directory lives
+    in the temp dir under a short hash of the database path.
+    """
+    digest = hashlib.sha1(os.path.abspath(db_path).encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f'queuectl-{digest}')
+
+
+def notify_workers(db_path: str) -> int:
+    """Wake every worker blocked on db_path
+
+    Sends one datagram to each registered wake socket and removes sockets
+    left behind by workers that no longer exist. Returns the number of
+    workers notified. Never raises: a missed wakeup only delays a worker
+    until its next poll.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return 0
+
+    directory = wake_dir(db_path)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+
+    notified = 0
+    sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sender.setblocking(False)
+    try:
+        for name in names:
+            if not name.endswith('.sock'):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                sender.sendto(b'!', path)
+                notified += 1
+            except BlockingIOError:
+                notified += 1  # Queue already full, the worker has a wakeup pending
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError:
+                pass
+    finally:
+        sender.close()
+    return notified
+
+
+class WakeListener:
+    """Wake socket a worker blocks on while the queue is empty"""
+
+    def __init__(self, db_path: str):
+        self.path: Optional[str] = None
+        self.sock: Optional[socket.socket] = None
+
+        if not hasattr(socket, 'AF_UNIX'):
+            return  # No Unix sockets (Windows), workers fall back to polling
+
+        directory = wake_dir(db_path)
+        try:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            path = os.path.join(directory, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.sock')
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(path)
+            sock.setblocking(False)
+        except OSError:
+            return
+
+        self.path = path
+        self.sock = sock
+
+    @property
+    def available(self) -> bool:
+        """Whether wakeups can be received"""
+        return self.sock is not None
+
+    def wait(self, timeout: float) -> bool:
+        """Block until notified or timeout seconds pass
+
+        Returns True if a notification arrived. Notifications that piled up
+        while the worker was busy are drained so they cause a single wakeup.
+        """
+        if self.sock is None:
+            return False
+
+        readable, _, _ = select.select([self.sock], [], [], max(timeout, 0))
+        if not readable:
+            return False
+
+        while True:
+            try:
+                self.sock.recv(64)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                break
+        return True
+
+    def interrupt(self):
+        """Wake our own wait, e.g. from a signal handler asking us to stop"""
+        if self.path is None:
+            return
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sender.setblocking(False)
+            sender.sendto(b'!', self.path)
+        except OSError:
+            pass
+        finally:
+            sender.close()
+
+    def close(self):
+        """Close the socket and unregister it"""
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
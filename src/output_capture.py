@@ -0,0 +1,122 @@
+"""
+Bounded capture of job output with spill-to-disk, and its compressed storage
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import zlib
+from typing import Optional
+
+
+def spool_dir(db_path: str) -> str:
+    """Default directory for the full output of jobs in db_path, next to the database"""
+    return f"{os.path.splitext(os.path.abspath(db_path))[0]}-spool"
+
+
+def spool_path(directory: str, job_id: str) -> str:
+    """Spill file for a job's output; safe for any job ID"""
+    safe = re.sub(r'[^\w.-]', '_', job_id)[:80]
+    digest = hashlib.sha1(job_id.encode()).hexdigest()[:8]
+    return os.path.join(directory, f'{safe}-{digest}.out.gz')
+
+
+class OutputCapture:
+    """Keeps the first and last limit/2 bytes of a stream in memory
+
+    Once the stream outgrows limit it is also written in full to a gzip
+    file at spill_path (when given), so a job that prints gigabytes costs
+    the worker a fixed amount of memory. Small outputs never touch disk.
+    """
+
+    def __init__(self, limit: int = 65536, spill_path: Optional[str] = None):
+        self.head_limit = max(1, limit // 2)
+        self.tail_limit = max(1, limit - self.head_limit)
+        self.spill_path = spill_path
+        self.total = 0
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._spill = None
+
+    @property
+    def path(self) -> Optional[str]:
+        """The spill file, if the output outgrew the in-memory preview"""
+        return self.spill_path if self._spill is not None else None
+
+    def write(self, data: bytes):
+        """Add a chunk of the stream"""
+        self.total += len(data)
+        if len(self._head) < self.head_limit:
+            take = self.head_limit - len(self._head)
+            self._head += data[:take]
+            data = data[take:]
+            if not data:
+                return
+
+        if self._spill is None and self.spill_path and self.total > self.head_limit + self.tail_limit:
+            # Nothing has been dropped yet, so head and tail still hold everything so far
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+            self._spill = gzip.open(self.spill_path, 'wb', compresslevel=6)
+            self._spill.write(self._head)
+            self._spill.write(self._tail)
+        if self._spill is not None:
+            self._spill.write(data)
+
+        self._tail += data
+        excess = len(self._tail) - self.tail_limit
+        if excess > 0:
+            del self._tail[:excess]
+
+    def close(self):
+        """Finish the spill file, if any"""
+        if self._spill is not None and not self._spill.closed:
+            self._spill.close()
+
+    def discard(self):
+        """Close and delete the spill file, if any"""
+        self.close()
+        if self._spill is not None:
+            try:
+                os.remove(self.spill_path)
+            except OSError:
+                pass
+            self._spill = None
+
+    def text(self) -> str:
+        """The output, or its head and tail around a truncation marker"""
+        if self.total <= len(self._head) + len(self._tail):
+            return _decode(bytes(self._head + self._tail))
+        omitted = self.total - len(self._head) - len(self._tail)
+        where = f"; full output in {self.path}" if self.path else ""
+        return f"{_decode(bytes(self._head))}\n... [{omitted} bytes omitted{where}] ...\n{_decode(bytes(self._tail))}"
+
+
+def _decode(data: bytes) -> str:
+    """Decode output as text, with universal newlines like text-mode pipes"""
+    return data.decode('utf-8', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+
+
+# Longest error kept in the jobs row for listings; the full text is in job_outputs
+ERROR_SUMMARY_CHARS = 200
+
+
+def compress_text(text: Optional[str]) -> Optional[bytes]:
+    """zlib-compress text for a job_outputs BLOB"""
+    if text is None:
+        return None
+    return zlib.compress(text.encode('utf-8'), 6)
+
+
+def decompress_text(data: Optional[bytes]) -> Optional[str]:
+    """Inverse of compress_text"""
+    if data is None:
+        return None
+    return zlib.decompress(data).decode('utf-8')
+
+
+def error_summary(error: Optional[str]) -> Optional[str]:
+    """Shortened error for the jobs row"""
+    if error is None or len(error) <= ERROR_SUMMARY_CHARS:
+        return error
+    return error[:ERROR_SUMMARY_CHARS - 3] + '...'
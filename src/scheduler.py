@@ -0,0 +1,168 @@
+"""
+Scheduler that promotes scheduled jobs and announces due retries
+"""
+
+import heapq
+import logging
+import os
+import signal
+import time
+import uuid
+from typing import List, Optional, Tuple
+
+from .config import Config
+from .job_queue import JobQueue, SCHEDULER_LEASE
+from .notify import WakeListener, notify_workers
+from .timestamps import seconds_until
+
+# Seconds between prunes of old metrics by the elected scheduler
+METRICS_PRUNE_INTERVAL = 3600
+
+
+class Scheduler:
+    """Single elected process that owns all timer-driven state changes
+
+    Only the holder of the 'scheduler' lease is active; other instances wait
+    in standby and take over when the lease expires. The active scheduler
+    keeps the earliest scheduler-window deadlines in a min-heap, promotes
+    scheduled jobs in batches as they come due, wakes workers for due
+    retries and otherwise sleeps until the next deadline. It also prunes
+    expired metrics once an hour. Workers stop scanning scheduled jobs
+    while a scheduler holds the lease.
+    """
+
+    def __init__(self, db_path: str = "jobs.db", owner_id: Optional[str] = None):
+        self.db_path = db_path
+        self.owner_id = owner_id or f"scheduler_{os.getpid()}_{uuid.uuid4().hex[:6]}"
+        self.job_queue = JobQueue(db_path)
+        self.config = Config(db_path)
+        self.running = False
+        self.is_leader = False
+
+        self.lease_seconds = max(3, self.config.get_int('scheduler-lease-seconds', 15))
+        self.window = max(1, self.config.get_int('scheduler-window', 10000))
+        self.metrics_retention_days = self.config.get_float('metrics-retention-days', 30.0)
+
+        self._heap: List[Tuple[int, str, str]] = []
+        self._window_full = False
+        self._stale = True
+        self._renew_at = 0.0
+        self._prune_at = 0.0
+        self._wake = None
+
+        self.logger = logging.getLogger(f'scheduler_{self.owner_id}')
+
+    def start(self):
+        """Run the scheduler loop until stop() is called"""
+        self.running = True
+        wake = self._wake = WakeListener(self.db_path)
+        self.logger.info(f"Scheduler {self.owner_id} started")
+
+        try:
+            while self.running:
+                try:
+                    if not self._hold_lease():
+                        self._sleep(wake, self.lease_seconds / 3)
+                        continue
+
+                    self._prune_metrics()
+                    timeout = min(self.run_once(), max(0.0, self._renew_at - time.time()))
+                    if self._sleep(wake, timeout):
+                        self._stale = True  # New or changed deadlines, reload the heap
+                except Exception as e:
+                    self.logger.error(f"Error in scheduler loop: {e}")
+                    time.sleep(1)
+        finally:
+            self._wake = None
+            wake.close()
+            if self.is_leader:
+                self.job_queue.release_lease(SCHEDULER_LEASE, self.owner_id)
+                self.is_leader = False
+            self.logger.info(f"Scheduler {self.owner_id} stopped")
+
+    def stop(self):
+        """Stop the scheduler and release its lease"""
+        self.running = False
+        wake = self._wake
+        if wake:
+            wake.interrupt()
+
+    def run_once(self) -> float:
+        """Promote everything due and return seconds until the next deadline"""
+        if self._stale or (not self._heap and self._window_full):
+            self._reload()
+
+        due_scheduled = []
+        due_retries = 0
+        while self._heap and seconds_until(self._heap[0][0]) <= 0:
+            _, kind, job_id = heapq.heappop(self._heap)
+            if kind == 'scheduled':
+                due_scheduled.append(job_id)
+            else:
+                due_retries += 1
+
+        if due_scheduled:
+            promoted = self.job_queue.promote_scheduled(due_scheduled)
+            self.logger.info(f"Promoted {promoted} scheduled job(s) to pending")
+        elif due_retries:
+            notify_workers(self.db_path)
+
+        if self._heap:
+            return max(0.0, seconds_until(self._heap[0][0]))
+        if self._window_full:
+            return 0.0  # More deadlines beyond the window, load the next batch
+        return self.lease_seconds
+
+    def _prune_metrics(self):
+        """Delete metrics past their retention when an hourly prune is due"""
+        if time.time() < self._prune_at:
+            return
+        self._prune_at = time.time() + METRICS_PRUNE_INTERVAL
+        deleted = self.job_queue.prune_metrics(self.metrics_retention_days)
+        if deleted:
+            self.logger.info(f"Pruned {deleted} expired metric row(s)")
+
+    def _reload(self):
+        """Load the earliest deadlines into the heap"""
+        self._heap = self.job_queue.next_deadlines(self.window)
+        heapq.heapify(self._heap)
+        self._window_full = len(self._heap) >= self.window
+        self._stale = False
+
+    def _hold_lease(self) -> bool:
+        """Acquire or renew the scheduler lease when it is due"""
+        if time.time() < self._renew_at:
+            return self.is_leader
+
+        leader = self.job_queue.acquire_lease(SCHEDULER_LEASE, self.owner_id, self.lease_seconds)
+        if leader and not self.is_leader:
+            self.logger.info(f"Scheduler {self.owner_id} elected")
+            self._stale = True
+        elif not leader and self.is_leader:
+            self.logger.warning(f"Scheduler {self.owner_id} lost its lease")
+        self.is_leader = leader
+        self._renew_at = time.time() + self.lease_seconds / 3
+        return leader
+
+    def _sleep(self, wake: WakeListener, timeout: float) -> bool:
+        """Block until woken or timeout passes; returns True if woken"""
+        if wake.available:
+            return wake.wait(timeout)
+        time.sleep(min(timeout, 1.0))  # No wakeups available, poll instead
+        return True
+
+
+def scheduler_process(db_path: str):
+    """Scheduler process entry point"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='[scheduler] %(asctime)s - %(levelname)s - %(message)s'
+    )
+    scheduler = Scheduler(db_path)
+
+    def handle_stop(signum, frame):
+        scheduler.stop()
+
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    scheduler.start()
@@ -0,0 +1,78 @@
+"""
+Cached results of whole-table queries, reused until the database changes
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Seconds a snapshot may be reused while nothing is committed
+DEFAULT_TTL = 2.0
+
+
+class SnapshotCache:
+    """Query results kept until another commit or until they are ttl seconds old
+
+    Freshness is checked with PRAGMA data_version on a connection the cache
+    keeps for itself: the value changes whenever any other connection, in
+    this process or another, commits to the database, and reading it touches
+    no tables. The ttl bounds how stale time-windowed results, such as
+    metrics for the last 24 hours, get on an idle queue. A ttl of 0 turns
+    caching off.
+    """
+
+    def __init__(self, db_path: str, ttl: float = DEFAULT_TTL, max_entries: int = 256):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._version: Optional[int] = None
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def version(self) -> int:
+        """A number that changes whenever the database is committed to"""
+        with self._lock:
+            return self._read_version()
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """The cached value for key, or compute() if the database changed since
+
+        Values are shared between callers and must not be modified.
+        """
+        if self.ttl <= 0:
+            return compute()
+
+        with self._lock:
+            version = self._read_version()
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+
+        # Read before computing, so a commit during compute() only makes the
+        # next call recompute
+        computed_at = time.monotonic()
+        value = compute()
+        with self._lock:
+            if self._version == version:
+                self._entries.pop(key, None)
+                if len(self._entries) >= self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+                self._entries[key] = (computed_at, value)
+        return value
+
+    def _read_version(self) -> int:
+        """PRAGMA data_version on the cache's connection; call with the lock held"""
+        if self._pid != os.getpid():
+            # A connection inherited across fork() is left alone
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._pid = os.getpid()
+            self._version = None
+            self._entries = {}
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
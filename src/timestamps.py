@@ -0,0 +1,59 @@
+"""
+Timestamp helpers for QueueCTL
+
+Timestamps are stored as INTEGER microseconds since the Unix epoch and
+presented as ISO 8601 UTC strings.
+"""
+
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Any, Optional
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def now_us() -> int:
+    """Current time in microseconds since the Unix epoch"""
+    return time.time_ns() // 1000
+
+
+def to_us(value: Any) -> Optional[int]:
+    """Convert an ISO string, datetime or epoch microseconds to epoch microseconds
+
+    Naive times are taken as UTC. None stays None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        delta = value - _EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+    raise ValueError(f"Invalid timestamp: {value!r}")
+
+
+def from_us(value: Optional[int]) -> Optional[str]:
+    """Convert epoch microseconds to an ISO 8601 UTC string"""
+    if value is None:
+        return None
+    return (_EPOCH + timedelta(microseconds=value)).isoformat()
+
+
+def seconds_until(timestamp: Any) -> float:
+    """Seconds from now until a timestamp (negative if it has passed)"""
+    return (to_us(timestamp) - now_us()) / 1000000
+
+
+def lenient_to_us(value: Any) -> Optional[int]:
+    """to_us for migrating stored values, mapping unparseable ones to NULL"""
+    try:
+        return to_us(value)
+    except (TypeError, ValueError):
+        return None
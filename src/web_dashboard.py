@@ -2,24 +2,216 @@
 Web Dashboard for QueueCTL monitoring
 """
 
+import gzip
+import hashlib
 import json
+import queue
 import threading
 import time
 from datetime import datetime, timezone
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Set
 
 from .job_queue import JobQueue
 from .config import Config
+from .db import close_connections, get_connection
+from .timestamps import now_us, to_us
+
+
+# Most jobs one /api/jobs page may ask for
+MAX_PAGE_SIZE = 500
+
+# Seconds between comments sent to keep idle /api/stream connections open
+KEEPALIVE_SECONDS = 15
+
+# API responses at least this large are gzipped for clients that accept it
+GZIP_MIN_BYTES = 1024
+
+
+class ResponseSnapshot:
+    """An API response encoded once, with its ETag and gzipped body"""
+    
+    __slots__ = ('body', 'etag', 'gzipped')
+    
+    def __init__(self, data: Dict[str, Any]):
+        self.body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self.gzipped = gzip.compress(self.body, 6) if len(self.body) >= GZIP_MIN_BYTES else None
+
+
+class LiveFeed:
+    """Watches the database and pushes changes to every /api/stream client
+    
+    One thread does the work however many dashboards are open. It sleeps
+    while nobody is connected; otherwise it checks PRAGMA data_version each
+    interval and, only when another connection has committed, re-counts job
+    states and reads the jobs changed since its last look. System metrics
+    are recomputed at most every metrics_interval seconds. Each event is
+    encoded once and queued to all clients.
+    """
+    
+    # Changes are re-read this far back, since a worker may commit an
+    # updated_at it stamped just before the feed's last look
+    LOOKBACK_US = 5 * 1000000
+    # Above this many changed jobs, clients are told to reload the list instead
+    MAX_CHANGES = 500
+    # Events a client may fall behind by before it is disconnected
+    CLIENT_QUEUE_SIZE = 100
+    
+    def __init__(self, job_queue: JobQueue, interval: float = 1.0, metrics_interval: float = 10.0):
+        self.job_queue = job_queue
+        self.interval = interval
+        self.metrics_interval = metrics_interval
+        self.running = False
+        self._clients: Set[queue.Queue] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._last_status: Optional[bytes] = None  # Sent to clients as they connect
+        self._status = None
+        self._metrics = None
+        self._metrics_at = 0.0
+        self._metrics_stale = True
+        self._data_version = None
+        self._since = None
+        self._sent: Dict[str, int] = {}  # Job ID -> updated_at already sent, within the lookback
+    
+    def start(self):
+        """Start the feed thread"""
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the feed thread; open streams end within a second"""
+        self.running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+    
+    def subscribe(self) -> queue.Queue:
+        """Register a client; it gets the latest status right away"""
+        client = queue.Queue(self.CLIENT_QUEUE_SIZE)
+        with self._lock:
+            if self._last_status is not None:
+                client.put_nowait(self._last_status)
+            self._clients.add(client)
+        self._wake.set()
+        return client
+    
+    def unsubscribe(self, client: queue.Queue):
+        """Forget a client"""
+        with self._lock:
+            self._clients.discard(client)
+    
+    def is_subscribed(self, client: queue.Queue) -> bool:
+        """False once a client has been dropped for falling behind"""
+        with self._lock:
+            return client in self._clients
+    
+    def _run(self):
+        """Poll for changes while anyone is watching"""
+        try:
+            while self.running:
+                self._wake.wait(self.interval)
+                self._wake.clear()
+                with self._lock:
+                    watched = bool(self._clients)
+                if not self.running:
+                    break
+                if not watched:
+                    # Start over with a full snapshot when the next client connects
+                    self._data_version = self._status = self._since = None
+                    self._metrics_stale = True
+                    continue
+                try:
+                    self._poll()
+                except Exception:
+                    pass  # Database busy or briefly unavailable; try again next interval
+        finally:
+            close_connections()
+    
+    def _poll(self):
+        """Broadcast whatever changed since the last poll"""
+        conn = get_connection(self.job_queue.db_path)
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version and not self._metrics_due():
+            return
+        changed = version != self._data_version
+        self._data_version = version
+        
+        if changed:
+            self._metrics_stale = True
+            if self._since is None:
+                self._since = now_us()
+            jobs = self._changed_jobs()
+            if jobs is None:
+                self._broadcast('resync', {})
+            elif jobs:
+                self._broadcast('jobs', {'jobs': jobs})
+        
+        status = self.job_queue.get_status() if changed else self._status
+        refresh_metrics = self._metrics_due()
+        if refresh_metrics:
+            self._metrics = self.job_queue.get_system_metrics(24)
+            self._metrics_at = time.monotonic()
+            self._metrics_stale = False
+        if status != self._status or refresh_metrics:
+            self._status = status
+            self._broadcast('status', {
+                'status': status,
+                'metrics': self._metrics,
+                'timestamp': datetime.now(timezone.utc).isoformat()
+            })
+    
+    def _metrics_due(self) -> bool:
+        """Whether the system metrics are out of date and may be recomputed"""
+        return self._metrics is None or (
+            self._metrics_stale and time.monotonic() - self._metrics_at >= self.metrics_interval)
+    
+    def _changed_jobs(self) -> Optional[List[Dict[str, Any]]]:
+        """Jobs changed since the last look, or None if too many to send"""
+        window_start = self._since - self.LOOKBACK_US
+        jobs = self.job_queue.list_jobs_updated_since(window_start, self.MAX_CHANGES)
+        if len(jobs) >= self.MAX_CHANGES:
+            self._since = now_us()
+            self._sent.clear()
+            return None
+        
+        fresh = []
+        for job in jobs:
+            updated_at = to_us(job['updated_at'])
+            if self._sent.get(job['id']) != updated_at:
+                self._sent[job['id']] = updated_at
+                fresh.append(job)
+            self._since = max(self._since, updated_at)
+        
+        cutoff = self._since - self.LOOKBACK_US
+        self._sent = {job_id: updated_at for job_id, updated_at in self._sent.items() if updated_at >= cutoff}
+        return fresh
+    
+    def _broadcast(self, event: str, data: Dict[str, Any]):
+        """Queue an event for every client, dropping clients that fell behind"""
+        message = f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode('utf-8')
+        with self._lock:
+            if event == 'status':
+                self._last_status = message
+            for client in list(self._clients):
+                try:
+                    client.put_nowait(message)
+                except queue.Full:
+                    # The browser reconnects and reloads everything
+                    self._clients.discard(client)
 
 
 class DashboardHandler(BaseHTTPRequestHandler):
     """HTTP request handler for the dashboard"""
     
-    def __init__(self, job_queue: JobQueue, config: Config, *args, **kwargs):
+    def __init__(self, job_queue: JobQueue, config: Config, *args, feed: Optional[LiveFeed] = None, **kwargs):
         self.job_queue = job_queue
         self.config = config
+        self.feed = feed
         super().__init__(*args, **kwargs)
     
     def do_GET(self):
@@ -35,6 +227,8 @@ class DashboardHandler(BaseHTTPRequestHandler):
             self._serve_api_jobs(parsed_path.query)
         elif path == '/api/metrics':
             self._serve_api_metrics(parsed_path.query)
+        elif path == '/api/stream' and self.feed:
+            self._serve_api_stream()
         elif path.startswith('/static/'):
             self._serve_static(path)
         else:
@@ -47,34 +241,38 @@ class DashboardHandler(BaseHTTPRequestHandler):
     
     def _serve_api_status(self):
         """Serve system status API"""
-        try:
-            status = self.job_queue.get_status()
-            metrics = self.job_queue.get_system_metrics(24)
-            
-            response = {
-                'status': status,
-                'metrics': metrics,
+        def build():
+            return {
+                'status': self.job_queue.get_status(),
+                'metrics': self.job_queue.get_system_metrics(24),
                 'timestamp': datetime.now(timezone.utc).isoformat()
             }
-            
-            self._send_json_response(response)
+        
+        try:
+            self._send_snapshot(('status',), build)
         except Exception as e:
             self._send_error_response(str(e))
     
     def _serve_api_jobs(self, query_string: str):
-        """Serve jobs API with filtering"""
+        """Serve one page of jobs, newest first, with filtering
+        
+        Pass the response's next_cursor as ?cursor= to get the following page.
+        """
         try:
             params = parse_qs(query_string)
             state = params.get('state', [None])[0]
-            limit = int(params.get('limit', [100])[0])
-            
-            jobs = self.job_queue.list_jobs(state)[:limit]
+            limit = min(max(int(params.get('limit', [100])[0]), 1), MAX_PAGE_SIZE)
+            cursor = params.get('cursor', [None])[0]
             
-            # Add metrics for each job
-            for job in jobs:
-                job['metrics'] = self.job_queue.get_job_metrics(job['id'])
+            def build():
+                jobs, next_cursor = self.job_queue.list_jobs_page(state, limit, cursor)
+                # Add metrics for the whole page in one query
+                metrics = self.job_queue.get_metrics_for_jobs([job['id'] for job in jobs])
+                for job in jobs:
+                    job['metrics'] = metrics[job['id']]
+                return {'jobs': jobs, 'next_cursor': next_cursor}
             
-            self._send_json_response({'jobs': jobs})
+            self._send_snapshot(('jobs', state, limit, cursor), build)
         except Exception as e:
             self._send_error_response(str(e))
     
@@ -84,11 +282,42 @@ class DashboardHandler(BaseHTTPRequestHandler):
             params = parse_qs(query_string)
             hours = int(params.get('hours', [24])[0])
             
-            metrics = self.job_queue.get_system_metrics(hours)
-            self._send_json_response(metrics)
+            self._send_snapshot(('metrics', hours), lambda: self.job_queue.get_system_metrics(hours))
         except Exception as e:
             self._send_error_response(str(e))
     
+    def _serve_api_stream(self):
+        """Stream status and job changes as Server-Sent Events
+        
+        Events are 'status' (same body as /api/status), 'jobs' (jobs that
+        changed) and 'resync' (too many changes; reload the job list).
+        """
+        feed = self.feed
+        client = feed.subscribe()
+        try:
+            self.send_response(200)
+            self.send_header('Content-type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            
+            idle = 0
+            while feed.running and feed.is_subscribed(client):
+                try:
+                    message = client.get(timeout=1)
+                except queue.Empty:
+                    idle += 1
+                    if idle < KEEPALIVE_SECONDS:
+                        continue
+                    message = b': keepalive\n\n'
+                idle = 0
+                self.wfile.write(message)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Browser tab closed
+        finally:
+            feed.unsubscribe(client)
+    
     def _serve_static(self, path: str):
         """Serve static files (CSS, JS)"""
         if path == '/static/style.css':
@@ -110,9 +339,40 @@ class DashboardHandler(BaseHTTPRequestHandler):
     
     def _send_json_response(self, data: Dict[str, Any]):
         """Send JSON response"""
-        json_data = json.dumps(data, indent=2)
+        json_data = json.dumps(data, separators=(',', ':'))
         self._send_response(200, json_data, 'application/json')
     
+    def _send_snapshot(self, key: tuple, build):
+        """Send a JSON response cached until the database changes
+        
+        Concurrent and repeated requests share one encoded, hashed and
+        gzipped body; a client that sends back its ETag gets 304 Not Modified.
+        """
+        snapshot = self.job_queue.snapshots.get(('http',) + key, lambda: ResponseSnapshot(build()))
+        cached = [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]
+        if snapshot.etag in cached or '*' in cached:
+            self.send_response(304)
+            self.send_header('ETag', snapshot.etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+        
+        body = snapshot.body
+        use_gzip = snapshot.gzipped is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        if use_gzip:
+            body = snapshot.gzipped
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('ETag', snapshot.etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
     def _send_error_response(self, error: str):
         """Send error response"""
         response = {'error': error}
@@ -122,6 +382,13 @@ class DashboardHandler(BaseHTTPRequestHandler):
         """Send 404 response"""
         self._send_response(404, 'Not Found', 'text/plain')
     
+    def finish(self):
+        """Close this request thread's database connections"""
+        try:
+            super().finish()
+        finally:
+            close_connections()
+    
     def log_message(self, format, *args):
         """Override to suppress request logging"""
         pass
@@ -403,8 +670,9 @@ tr:hover {
         return '''
 class QueueCTLDashboard {
     constructor() {
+        this.jobs = [];
         this.init();
-        this.startAutoRefresh();
+        this.startLiveUpdates();
     }
     
     init() {
@@ -422,6 +690,19 @@ class QueueCTLDashboard {
         });
     }
     
+    startLiveUpdates() {
+        if (!window.EventSource) {
+            this.startAutoRefresh();
+            return;
+        }
+        // The server pushes status and changed jobs; the browser reconnects on its own
+        const source = new EventSource('/api/stream');
+        source.addEventListener('open', () => this.loadJobs());
+        source.addEventListener('status', (event) => this.applyStatus(JSON.parse(event.data)));
+        source.addEventListener('jobs', (event) => this.mergeJobs(JSON.parse(event.data).jobs));
+        source.addEventListener('resync', () => this.loadJobs());
+    }
+    
     startAutoRefresh() {
         setInterval(() => {
             this.loadData();
@@ -438,17 +719,19 @@ class QueueCTLDashboard {
     async loadStatus() {
         try {
             const response = await fetch('/api/status');
-            const data = await response.json();
-            
-            this.updateSystemStatus(data);
-            this.updateJobCounts(data.status);
-            this.updatePerformanceMetrics(data.metrics);
-            this.updateSuccessRate(data.metrics);
+            this.applyStatus(await response.json());
         } catch (error) {
             console.error('Error loading status:', error);
         }
     }
     
+    applyStatus(data) {
+        this.updateSystemStatus(data);
+        this.updateJobCounts(data.status);
+        this.updatePerformanceMetrics(data.metrics);
+        this.updateSuccessRate(data.metrics);
+    }
+    
     async loadJobs() {
         try {
             const stateFilter = document.getElementById('state-filter').value;
@@ -457,12 +740,30 @@ class QueueCTLDashboard {
             const response = await fetch(url);
             const data = await response.json();
             
-            this.updateJobsTable(data.jobs);
+            this.jobs = data.jobs;
+            this.updateJobsTable(this.jobs);
         } catch (error) {
             console.error('Error loading jobs:', error);
         }
     }
     
+    mergeJobs(changed) {
+        const stateFilter = document.getElementById('state-filter').value;
+        const byId = new Map(this.jobs.map(job => [job.id, job]));
+        for (const job of changed) {
+            if (stateFilter && job.state !== stateFilter) {
+                byId.delete(job.id);
+            } else {
+                byId.set(job.id, Object.assign(byId.get(job.id) || {}, job));
+            }
+        }
+        // Same order as /api/jobs: newest first
+        this.jobs = Array.from(byId.values()).sort((a, b) =>
+            a.created_at < b.created_at ? 1 : a.created_at > b.created_at ? -1 : (a.id < b.id ? 1 : -1)
+        ).slice(0, 50);
+        this.updateJobsTable(this.jobs);
+    }
+    
     updateSystemStatus(data) {
         const statusEl = document.getElementById('system-status');
         const timestamp = new Date(data.timestamp).toLocaleString();
@@ -496,11 +797,13 @@ class QueueCTLDashboard {
         
         const avgTime = Math.round(metrics.avg_execution_time_ms || 0);
         const jobsPerHour = Math.round(metrics.jobs_per_hour || 0);
+        const p95Time = Math.round(metrics.p95_execution_time_ms || 0);
         
         perfEl.innerHTML = `
             <div class="metric-value">${avgTime}ms</div>
             <div class="metric-label">Avg Execution Time</div>
             <div style="margin-top: 1rem; font-size: 0.9rem;">
+                <div>95th Percentile: ${p95Time}ms</div>
                 <div>Jobs/Hour: ${jobsPerHour}</div>
             </div>
         `;
@@ -567,20 +870,30 @@ class WebDashboard:
         self.port = port
         self.server = None
         self.server_thread = None
+        self.feed = None
     
     def start(self):
         """Start the web dashboard server"""
+        self.job_queue.snapshots.ttl = self.config.get_float('snapshot-ttl', 2.0)
+        self.feed = LiveFeed(self.job_queue)
+        self.feed.start()
+        
         def handler(*args, **kwargs):
-            return DashboardHandler(self.job_queue, self.config, *args, **kwargs)
+            return DashboardHandler(self.job_queue, self.config, *args, feed=self.feed, **kwargs)
         
-        self.server = HTTPServer((self.host, self.port), handler)
+        # A thread per request, so a slow query doesn't hold up other clients
+        self.server = ThreadingHTTPServer((self.host, self.port), handler)
+        self.server.daemon_threads = True
         self.server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
         self.server_thread.start()
         
+        self.port = self.server.server_address[1]  # The port picked when started with port 0
         print(f"Web dashboard started at http://{self.host}:{self.port}")
     
     def stop(self):
         """Stop the web dashboard server"""
+        if self.feed:
+            self.feed.stop()
         if self.server:
             self.server.shutdown()
             self.server.server_close()
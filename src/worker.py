@@ -3,27 +3,190 @@ Worker implementation for processing jobs
 """
 
 import os
+import random
+import selectors
+import signal
+import sys
 import time
 import subprocess
+import threading
 import multiprocessing
-from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, Tuple
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple, Union
 import logging
 
 from .job_queue import JobQueue
+from .timestamps import now_us
 from .config import Config
+from .callables import CallablePool, run_callable
+from .launcher import spawn
+from .notify import WakeListener
+from .output_capture import OutputCapture, spool_dir, spool_path
+
+
+# Exit status of a worker that stopped so the manager replaces it (EX_TEMPFAIL)
+RECYCLE_EXIT_CODE = 75
+
+
+def command_result(returncode: int, stdout: OutputCapture, stderr: OutputCapture,
+                   start_time: float) -> Dict[str, Any]:
+    """Result dict for a command that ran to completion
+    
+    Only completed jobs keep their output, so a failed command's spill
+    file is deleted.
+    """
+    if returncode != 0:
+        stdout.discard()
+    error = stderr.text()
+    return {
+        'success': returncode == 0,
+        'output': stdout.text().strip(),
+        'output_path': stdout.path,
+        'error': error.strip() if error else
+                (f"Command exited with code {returncode}" if returncode != 0 else ""),
+        'execution_time_ms': int((time.time() - start_time) * 1000)
+    }
+
+
+def failed_result(error: str, start_time: float) -> Dict[str, Any]:
+    """Result dict for a command that timed out or couldn't be started"""
+    return {
+        'success': False,
+        'output': '',
+        'output_path': None,
+        'error': error,
+        'execution_time_ms': int((time.time() - start_time) * 1000)
+    }
+
+
+def callable_result(ok: bool, text: str, start_time: float) -> Dict[str, Any]:
+    """Result dict for a callable job: its JSON result, or the traceback it raised"""
+    return {
+        'success': ok,
+        'output': text if ok else '',
+        'output_path': None,
+        'error': '' if ok else text.strip(),
+        'execution_time_ms': int((time.time() - start_time) * 1000)
+    }
+
+
+def kill_process_group(process):
+    """Kill a timed out command along with any children it started
+    
+    Commands run in their own session, so their process group ID is their PID.
+    """
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()  # Windows
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _pump(pipe, capture: OutputCapture):
+    """Copy a pipe into a capture until EOF"""
+    with pipe:
+        while True:
+            chunk = pipe.read1(65536)
+            if not chunk:
+                break
+            capture.write(chunk)
+
+
+def _drain(process, stdout: OutputCapture, stderr: OutputCapture, timeout: float) -> bool:
+    """Read a process's output into captures until it exits
+    
+    Returns False if timeout passes first. On POSIX both pipes are read
+    from this thread with a selector, like Popen.communicate; Windows
+    can't select on pipes, so a thread reads each one there.
+    """
+    deadline = time.monotonic() + timeout
+    streams = ((process.stdout, stdout), (process.stderr, stderr))
+    if os.name == 'posix':
+        with selectors.DefaultSelector() as selector:
+            for pipe, capture in streams:
+                selector.register(pipe, selectors.EVENT_READ, capture)
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                for key, _ in selector.select(remaining):
+                    chunk = os.read(key.fd, 65536)
+                    if chunk:
+                        key.data.write(chunk)
+                    else:
+                        selector.unregister(key.fileobj)
+                        key.fileobj.close()
+    else:
+        readers = [threading.Thread(target=_pump, args=stream, daemon=True) for stream in streams]
+        for reader in readers:
+            reader.start()
+        for reader in readers:
+            reader.join(max(0.0, deadline - time.monotonic()))
+            if reader.is_alive():
+                return False
+    
+    try:
+        process.wait(timeout=max(0.0, deadline - time.monotonic()))
+    except subprocess.TimeoutExpired:
+        return False
+    return True
+
+
+def _rss_mb() -> Optional[float]:
+    """Resident set size of this process in MiB, or None where unknown"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Peak rather than current RSS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
 
 
 class Worker:
-    def __init__(self, worker_id: str, db_path: str = "jobs.db", lock_dir: str = "locks"):
+    def __init__(self, worker_id: str, db_path: str = "jobs.db", lock_dir: str = "locks",
+                 exit_when_idle: bool = True):
         self.worker_id = worker_id
         self.db_path = db_path
         self.lock_dir = lock_dir
+        self.exit_when_idle = exit_when_idle  # False when an autoscaler decides when we stop
         self.job_queue = JobQueue(db_path)
         self.config = Config(db_path)
         self.running = False
         self.current_job = None
         
+        # Jobs leased ahead of time and state changes waiting for a grouped commit
+        self.batch_size = max(1, self.config.get_int('worker-batch-size', 1))
+        self._prefetched = deque()
+        self._pending_updates = []
+        self._pending_metrics = []
+        
+        # Claims are leases kept alive by a heartbeat thread while we hold them
+        self.lease_seconds = max(3, self.config.get_int('worker-lease-seconds', 60))
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread = None
+        self._wake = None
+        
+        # Exit to be replaced by a fresh process after this many jobs or this much memory (0 = never)
+        self.max_jobs = max(0, self.config.get_int('worker-max-jobs', 0))
+        self.max_rss_mb = max(0.0, self.config.get_float('worker-max-rss-mb', 0))
+        self.jobs_processed = 0
+        self.recycle = False
+        
+        # Output beyond the preview is spilled to a gzip file per job instead of held in memory
+        self.preview_bytes = max(2, self.config.get_int('output-preview-bytes', 65536))
+        self.spool_dir = self.config.get('output-spool-dir') or spool_dir(db_path)
+        
+        # Started on the first callable job, then reused so imports stay warm
+        self.callable_pool = CallablePool(1)
+        
         # Ensure lock directory exists
         os.makedirs(lock_dir, exist_ok=True)
         
@@ -35,12 +198,25 @@ class Worker:
         self.logger = logging.getLogger(f'worker_{worker_id}')
     
     def start(self):
-        """Start the worker main loop with intelligent scheduling"""
+        """Start the worker main loop with intelligent scheduling
+        
+        Jobs are drained back to back while work is ready. When the queue is
+        empty the worker blocks on its wake socket until a producer notifies
+        it, the next scheduled job or retry is due, or worker-wake-timeout
+        passes. Without Unix sockets it backs off exponentially with jitter,
+        from worker-poll-interval up to worker-max-backoff seconds.
+        """
         self.running = True
         self.logger.info(f"Worker {self.worker_id} started")
+        self._start_heartbeat()
+        wake = self._wake = WakeListener(self.db_path)
         
-        idle_count = 0
-        max_idle_before_check = 30  # Check for scheduled jobs every 30 seconds when idle
+        poll_interval = self.config.get_float('worker-poll-interval', 0.05)
+        max_backoff = self.config.get_float('worker-max-backoff', 1.0)
+        wake_timeout = self.config.get_float('worker-wake-timeout', 5.0)
+        idle_delay = poll_interval
+        idle_since = None
+        max_idle_before_check = 30  # Check for scheduled jobs after 30 seconds idle
         
         try:
             while self.running:
@@ -48,184 +224,305 @@ class Worker:
                     job_processed = self._process_next_job()
                     
                     if job_processed:
-                        idle_count = 0  # Reset idle counter when job is processed
-                        time.sleep(1)  # Short sleep after processing
-                    else:
-                        idle_count += 1
+                        self.jobs_processed += 1
+                        if self._should_recycle():
+                            self.recycle = True
+                            break
                         
-                        # Check for scheduled jobs periodically when idle
-                        if idle_count >= max_idle_before_check:
-                            scheduled_jobs = self._check_scheduled_jobs()
-                            if scheduled_jobs:
-                                next_job_time = self._get_next_scheduled_time(scheduled_jobs)
-                                if next_job_time:
-                                    wait_seconds = next_job_time
-                                    if wait_seconds <= 300:  # 5 minutes or less
-                                        self.logger.info(f"Next scheduled job in {self._format_wait_time(wait_seconds)} - staying active")
-                                        idle_count = 0  # Reset to keep checking
-                                    elif wait_seconds <= 3600:  # 1 hour or less
-                                        self.logger.info(f"Next scheduled job in {self._format_wait_time(wait_seconds)} - periodic check mode")
-                                        time.sleep(60)  # Check every minute for jobs due within an hour
-                                        idle_count = 0
-                                    else:
-                                        self.logger.info(f"Next scheduled job in {self._format_wait_time(wait_seconds)} - long wait mode")
-                                        time.sleep(300)  # Check every 5 minutes for distant jobs
-                                        idle_count = 0
-                                else:
-                                    # No scheduled jobs, check if we should exit
-                                    self.logger.info("No more jobs to process - worker will exit")
-                                    break
+                        # Drain mode: claim the next job immediately
+                        idle_delay = poll_interval
+                        idle_since = None
+                        continue
+                    
+                    if idle_since is None:
+                        idle_since = time.time()
+                    
+                    # Check for scheduled jobs periodically when idle
+                    if time.time() - idle_since >= max_idle_before_check:
+                        wait_seconds = self.job_queue.seconds_until_next_due()
+                        if wait_seconds is not None:
+                            if wait_seconds <= 300:  # 5 minutes or less
+                                self.logger.info(f"Next scheduled job in {self._format_wait_time(wait_seconds)} - staying active")
+                            elif wait_seconds <= 3600:  # 1 hour or less
+                                self.logger.info(f"Next scheduled job in {self._format_wait_time(wait_seconds)} - periodic check mode")
+                                self._sleep(wake, 60)  # Check every minute for jobs due within an hour
                             else:
-                                # No scheduled jobs, check if we should exit
-                                self.logger.info("No more jobs to process - worker will exit")
-                                break
-                        else:
-                            time.sleep(1)  # Normal polling interval
-                            
+                                self.logger.info(f"Next scheduled job in {self._format_wait_time(wait_seconds)} - long wait mode")
+                                self._sleep(wake, 300)  # Check every 5 minutes for distant jobs
+                            idle_since = time.time()
+                            continue
+                        
+                        # No scheduled jobs, check if we should exit
+                        if self.exit_when_idle:
+                            self.logger.info("No more jobs to process - worker will exit")
+                            break
+                        idle_since = time.time()
+                    
+                    if wake.available:
+                        wake.wait(self._idle_wait(wake_timeout, poll_interval))
+                    else:
+                        time.sleep(self._idle_backoff(idle_delay))
+                        idle_delay = min(idle_delay * 2, max_backoff)
+                        
                 except Exception as e:
                     self.logger.error(f"Error in worker loop: {e}")
                     time.sleep(5)  # Wait longer on error
         except KeyboardInterrupt:
             self.logger.info("Worker interrupted")
         finally:
+            self._wake = None
+            wake.close()
+            self._stop_heartbeat()
+            self._release_prefetched()
+            self.callable_pool.shutdown()
             self.logger.info(f"Worker {self.worker_id} stopped")
     
+    def _sleep(self, wake: WakeListener, seconds: float):
+        """Sleep, returning early when notified of new work"""
+        if wake.available:
+            wake.wait(seconds)
+        else:
+            time.sleep(seconds)
+    
+    def _idle_wait(self, limit: float, minimum: float) -> float:
+        """How long to block for a wakeup before polling the database again"""
+        due = self.job_queue.seconds_until_next_due()
+        if due is None:
+            return limit
+        return min(limit, max(due, minimum))
+    
+    def _idle_backoff(self, delay: float) -> float:
+        """Apply jitter to an idle delay so workers don't poll in lockstep"""
+        return delay * random.uniform(0.5, 1.0)
+    
+    def _should_recycle(self) -> bool:
+        """Whether this worker has run enough jobs or grown enough to be replaced"""
+        if self.max_jobs and self.jobs_processed >= self.max_jobs:
+            self.logger.info(f"Recycling after {self.jobs_processed} jobs")
+            return True
+        if self.max_rss_mb:
+            rss = _rss_mb()
+            if rss is not None and rss >= self.max_rss_mb:
+                self.logger.info(f"Recycling at {rss:.0f} MiB resident")
+                return True
+        return False
+    
     def stop(self):
         """Stop the worker gracefully"""
         self.running = False
+        wake = self._wake
+        if wake:
+            wake.interrupt()
     
-    def _process_next_job(self):
-        """Process the next available job"""
-        job = self.job_queue.get_next_job()
-        if not job:
-            return False  # No job processed
+    def _start_heartbeat(self):
+        """Start the background thread that renews leases and reaps expired ones"""
+        self._heartbeat_stop.clear()
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop, name=f'{self.worker_id}_heartbeat', daemon=True
+        )
+        self._heartbeat_thread.start()
+    
+    def _stop_heartbeat(self):
+        """Stop the heartbeat thread"""
+        self._heartbeat_stop.set()
+        if self._heartbeat_thread:
+            self._heartbeat_thread.join(timeout=5)
+            self._heartbeat_thread = None
+    
+    def _heartbeat_loop(self):
+        """Renew our leases every third of the lease period
         
-        # Try to acquire lock for this job
-        lock_file = os.path.join(self.lock_dir, f"{job['id']}.lock")
+        Each beat also requeues jobs whose lease expired, which recovers work
+        from workers that were killed mid-job.
+        """
+        interval = self.lease_seconds / 3
+        while not self._heartbeat_stop.wait(interval):
+            try:
+                self.job_queue.heartbeat(self._leased_job_ids(), self.worker_id, self.lease_seconds)
+                reaped = self.job_queue.reap_expired_leases()
+                if reaped:
+                    self.logger.warning(f"Requeued {reaped} job(s) with expired leases")
+            except Exception as e:
+                self.logger.error(f"Heartbeat failed: {e}")
+    
+    def _leased_job_ids(self):
+        """IDs of the jobs this worker currently holds leases on
         
-        try:
-            # Atomic lock creation (fails if file exists)
-            with open(lock_file, 'x') as f:
-                f.write(self.worker_id)
-        except FileExistsError:
-            # Job is already being processed by another worker
-            return False  # No job processed
+        Finished jobs stay leased until their results are flushed, so a long
+        job later in the batch can't let them be reaped and run again.
+        """
+        job_ids = [job['id'] for job in list(self._prefetched)]
+        job_ids.extend(update['id'] for update in list(self._pending_updates))
+        current_job = self.current_job
+        if current_job:
+            job_ids.append(current_job['id'])
+        return job_ids
+    
+    def _process_next_job(self):
+        """Process the next job from the local buffer, leasing a new batch when empty"""
+        if not self._prefetched:
+            self._flush_updates()
+            self._prefetched.extend(
+                self.job_queue.claim_batch(self.worker_id, self.batch_size, self.lease_seconds)
+            )
+            if not self._prefetched:
+                return False  # No job processed
         
+        job = self._prefetched.popleft()
         try:
             self.current_job = job
             self._execute_job(job)
             return True  # Job processed successfully
         finally:
-            # Always release the lock
-            try:
-                os.remove(lock_file)
-            except FileNotFoundError:
-                pass  # Lock file might have been cleaned up already
             self.current_job = None
+            if not self._prefetched:
+                self._flush_updates()
+    
+    def _record_update(self, job_id: str, state: str, **fields):
+        """Queue a job state change for the next grouped commit"""
+        self._pending_updates.append({'id': job_id, 'state': state, **fields})
+    
+    def _record_metric(self, job_id: str, event_type: str, data: Dict = None):
+        """Queue a job metric event for the next grouped commit"""
+        self._pending_metrics.append((job_id, event_type, data))
+    
+    def _flush_updates(self):
+        """Write all queued state changes and metrics in one transaction"""
+        if not self._pending_updates and not self._pending_metrics:
+            return
+        skipped = self.job_queue.update_job_states(self._pending_updates, self._pending_metrics,
+                                                   self.worker_id)
+        if skipped:
+            self.logger.warning(f"Dropped results of {len(skipped)} job(s) whose leases were lost: "
+                                f"{', '.join(skipped)}")
+        self._pending_updates = []
+        self._pending_metrics = []
+    
+    def _release_prefetched(self):
+        """Flush finished work and hand unstarted leases back on shutdown"""
+        try:
+            self._flush_updates()
+            if self._prefetched:
+                released = self.job_queue.release_jobs([job['id'] for job in self._prefetched], self.worker_id)
+                self.logger.info(f"Released {released} unstarted job(s) back to the queue")
+                self._prefetched.clear()
+        except Exception as e:
+            self.logger.error(f"Error releasing leased jobs: {e}")
     
     def _execute_job(self, job: Dict[str, Any]):
         """Execute a single job with enhanced logging and metrics"""
-        job_id = job['id']
-        command = job['command']
+        start_time = self._begin_job(job)
+        try:
+            # Execute the command with timeout
+            if job.get('callable'):
+                result = self._run_callable(job['callable'], job.get('args'), job.get('kwargs'),
+                                            job.get('timeout_seconds', 300))
+            else:
+                result = self._run_command(job.get('exec') or job['command'], job.get('timeout_seconds', 300),
+                                           job['id'], job.get('env'), job.get('cwd'))
+            self._finish_job(job, result, start_time)
+        except Exception as e:
+            self.logger.error(f"Error executing job {job['id']}: {e}")
+            self._handle_job_failure(job, str(e), 0)
+    
+    def _begin_job(self, job: Dict[str, Any]) -> int:
+        """Log and record the start of a job; returns its start time"""
         timeout_seconds = job.get('timeout_seconds', 300)
+        self.logger.info(f"Processing job {job['id']}: {job['command']} (timeout: {timeout_seconds}s)")
         
-        self.logger.info(f"Processing job {job_id}: {command} (timeout: {timeout_seconds}s)")
-        
-        # Update job state to processing with start time and worker ID
-        start_time = datetime.now(timezone.utc).isoformat()
-        self.job_queue.update_job_state(
-            job_id, 'processing',
-            started_at=start_time,
-            worker_id=self.worker_id
-        )
-        
-        # Log job start metric
-        self.job_queue._log_job_metric(job_id, 'started', {
+        # The claim already marked the job as processing; record when it really started
+        self._record_metric(job['id'], 'started', {
             'worker_id': self.worker_id,
             'timeout_seconds': timeout_seconds
         })
-        
-        try:
-            # Execute the command with timeout
-            result = self._run_command(command, timeout_seconds)
+        return now_us()
+    
+    def _finish_job(self, job: Dict[str, Any], result: Dict[str, Any], start_time: int):
+        """Record a finished command as completed, or hand it to the retry logic"""
+        job_id = job['id']
+        if result['success']:
+            # Job completed successfully
+            self._record_update(
+                job_id, 'completed',
+                output=result['output'],
+                output_path=result.get('output_path'),
+                started_at=start_time,
+                completed_at=now_us(),
+                execution_time_ms=result['execution_time_ms']
+            )
             
-            completion_time = datetime.now(timezone.utc).isoformat()
+            # Log success metrics
+            self._record_metric(job_id, 'completed', {
+                'execution_time_ms': result['execution_time_ms'],
+                'output_length': len(result['output'])
+            })
             
-            if result['success']:
-                # Job completed successfully
-                self.job_queue.update_job_state(
-                    job_id, 'completed',
-                    output=result['output'],
-                    completed_at=completion_time,
-                    execution_time_ms=result['execution_time_ms']
-                )
-                
-                # Log success metrics
-                self.job_queue._log_job_metric(job_id, 'completed', {
-                    'execution_time_ms': result['execution_time_ms'],
-                    'output_length': len(result['output'])
-                })
-                
-                self.logger.info(f"Job {job_id} completed successfully in {result['execution_time_ms']}ms")
-            else:
-                # Job failed, handle retry logic
-                self._handle_job_failure(job, result['error'], result['execution_time_ms'])
-                
-        except Exception as e:
-            self.logger.error(f"Error executing job {job_id}: {e}")
-            self._handle_job_failure(job, str(e), 0)
+            self.logger.info(f"Job {job_id} completed successfully in {result['execution_time_ms']}ms")
+        else:
+            # Job failed, handle retry logic
+            self._handle_job_failure(job, result['error'], result['execution_time_ms'])
     
-    def _run_command(self, command: str, timeout_seconds: int = 300) -> Dict[str, Any]:
-        """Execute a shell command with configurable timeout"""
+    def _run_command(self, command: Union[str, List[str]], timeout_seconds: int = 300,
+                     job_id: Optional[str] = None, env: Optional[Dict[str, str]] = None,
+                     cwd: Optional[str] = None) -> Dict[str, Any]:
+        """Execute a shell command, or an argv list without a shell, with configurable timeout
+        
+        Output is streamed into bounded captures rather than buffered whole,
+        and stdout beyond the preview is spilled to the job's spool file.
+        """
         start_time = time.time()
+        stdout, stderr = self._captures(job_id)
         
         try:
-            # Use shell=True to handle complex commands
-            process = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=timeout_seconds
-            )
-            
-            execution_time = int((time.time() - start_time) * 1000)  # milliseconds
-            
-            return {
-                'success': process.returncode == 0,
-                'output': process.stdout.strip(),
-                'error': process.stderr.strip() if process.stderr else 
-                        (f"Command exited with code {process.returncode}" if process.returncode != 0 else ""),
-                'execution_time_ms': execution_time
-            }
-            
-        except subprocess.TimeoutExpired:
-            execution_time = int((time.time() - start_time) * 1000)
-            return {
-                'success': False,
-                'output': '',
-                'error': f'Command timed out after {timeout_seconds} seconds',
-                'execution_time_ms': execution_time
-            }
+            # Own process group, so a timeout kills the whole command and not just the shell
+            process = spawn(command, env, cwd)
         except Exception as e:
-            execution_time = int((time.time() - start_time) * 1000)
-            return {
-                'success': False,
-                'output': '',
-                'error': f"Failed to execute command: {str(e)}",
-                'execution_time_ms': execution_time
-            }
+            return failed_result(f"Failed to execute command: {str(e)}", start_time)
+        
+        completed = _drain(process, stdout, stderr, timeout_seconds)
+        if not completed:
+            kill_process_group(process)
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+        stdout.close()
+        
+        if not completed:
+            stdout.discard()
+            return failed_result(f'Command timed out after {timeout_seconds} seconds', start_time)
+        return command_result(process.returncode, stdout, stderr, start_time)
+    
+    def _run_callable(self, spec: str, args: Optional[List], kwargs: Optional[Dict],
+                      timeout_seconds: int = 300) -> Dict[str, Any]:
+        """Run a Python callable job in the warm process pool"""
+        start_time = time.time()
+        executor = self.callable_pool.executor
+        try:
+            ok, text = executor.submit(run_callable, spec, args, kwargs).result(timeout=timeout_seconds)
+        except FutureTimeoutError:
+            self.callable_pool.kill(executor)
+            return failed_result(f'Callable timed out after {timeout_seconds} seconds', start_time)
+        except Exception as e:
+            # A pool process died (BrokenProcessPool); start a fresh pool next time
+            self.callable_pool.kill(executor)
+            return failed_result(f"Failed to run callable: {str(e)}", start_time)
+        return callable_result(ok, text, start_time)
+    
+    def _captures(self, job_id: Optional[str]) -> Tuple[OutputCapture, OutputCapture]:
+        """Bounded stdout and stderr captures for a job; only stdout is spilled"""
+        spill = spool_path(self.spool_dir, job_id) if job_id else None
+        return OutputCapture(self.preview_bytes, spill), OutputCapture(self.preview_bytes)
     
     def _handle_job_failure(self, job: Dict[str, Any], error_message: str, execution_time_ms: int = 0):
         """Handle job failure with retry logic and enhanced logging"""
         job_id = job['id']
-        new_attempts = job['attempts'] + 1
+        new_attempts = job['attempts']  # Incremented when the job was claimed
         max_retries = job['max_retries']
         
         if new_attempts >= max_retries:
             # Move to Dead Letter Queue
-            completion_time = datetime.now(timezone.utc).isoformat()
-            self.job_queue.update_job_state(
+            completion_time = now_us()
+            self._record_update(
                 job_id, 'dead',
                 attempts=new_attempts,
                 error=error_message,
@@ -234,7 +531,7 @@ class Worker:
             )
             
             # Log DLQ metric
-            self.job_queue._log_job_metric(job_id, 'moved_to_dlq', {
+            self._record_metric(job_id, 'moved_to_dlq', {
                 'final_attempts': new_attempts,
                 'error': error_message[:200]  # Truncate long errors
             })
@@ -245,9 +542,9 @@ class Worker:
             backoff_base = float(self.config.get('backoff-base', 2))
             delay_seconds = int(backoff_base ** new_attempts)
             
-            next_retry_at = (datetime.now(timezone.utc) + timedelta(seconds=delay_seconds)).isoformat()
+            next_retry_at = now_us() + delay_seconds * 1000000
             
-            self.job_queue.update_job_state(
+            self._record_update(
                 job_id, 'failed',
                 attempts=new_attempts,
                 next_retry_at=next_retry_at,
@@ -256,7 +553,7 @@ class Worker:
             )
             
             # Log retry metric
-            self.job_queue._log_job_metric(job_id, 'retry_scheduled', {
+            self._record_metric(job_id, 'retry_scheduled', {
                 'attempt': new_attempts,
                 'delay_seconds': delay_seconds,
                 'error': error_message[:200]
@@ -265,44 +562,6 @@ class Worker:
             self.logger.info(f"Job {job_id} scheduled for retry in {delay_seconds}s "
                            f"(attempt {new_attempts}/{max_retries})")
     
-    def _check_scheduled_jobs(self):
-        """Check for scheduled jobs in the queue"""
-        try:
-            import sqlite3
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM jobs WHERE state = 'scheduled' ORDER BY run_at ASC")
-                return [dict(row) for row in cursor.fetchall()]
-        except Exception as e:
-            self.logger.error(f"Error checking scheduled jobs: {e}")
-            return []
-    
-    def _get_next_scheduled_time(self, scheduled_jobs):
-        """Get seconds until the next scheduled job"""
-        if not scheduled_jobs:
-            return None
-        
-        try:
-            from datetime import datetime, timezone
-            now = datetime.now(timezone.utc)
-            
-            for job in scheduled_jobs:
-                run_at = job.get('run_at')
-                if run_at:
-                    try:
-                        # Parse ISO format
-                        scheduled_time = datetime.fromisoformat(run_at.replace('Z', '+00:00'))
-                        wait_seconds = (scheduled_time - now).total_seconds()
-                        if wait_seconds > 0:
-                            return wait_seconds
-                    except Exception:
-                        continue
-            return None
-        except Exception as e:
-            self.logger.error(f"Error calculating next scheduled time: {e}")
-            return None
-    
     def _format_wait_time(self, seconds):
         """Format wait time in human readable format"""
         if seconds <= 0:
@@ -318,7 +577,27 @@ class Worker:
             return f"{hours}h {minutes}m"
 
 
-def worker_process(worker_id: str, db_path: str, lock_dir: str):
-    """Worker process entry point"""
-    worker = Worker(worker_id, db_path, lock_dir)
-    worker.start()
\ No newline at end of file
+def worker_process(worker_id: str, db_path: str, lock_dir: str, exit_when_idle: bool = True,
+                   concurrency: Optional[int] = None):
+    """Worker process entry point
+    
+    With a concurrency above one (default: the worker-concurrency setting)
+    the process runs an AsyncWorker that executes that many jobs at once.
+    """
+    if concurrency is None:
+        concurrency = Config(db_path).get_int('worker-concurrency', 1)
+    if concurrency > 1:
+        from .async_worker import AsyncWorker
+        worker = AsyncWorker(worker_id, db_path, lock_dir, exit_when_idle, concurrency)
+    else:
+        worker = Worker(worker_id, db_path, lock_dir, exit_when_idle)
+    
+    # Finish the current job before exiting when the manager stops us
+    def handle_stop(signum, frame):
+        worker.stop()
+    
+    signal.signal(signal.SIGTERM, handle_stop)
+    signal.signal(signal.SIGINT, handle_stop)
+    worker.start()
+    if worker.recycle:
+        sys.exit(RECYCLE_EXIT_CODE)
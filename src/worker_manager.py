@@ -2,26 +2,138 @@
 Worker Manager for handling multiple worker processes
 """
 
+import math
 import os
 import time
 import multiprocessing
 import threading
 import subprocess
 import sys
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import signal
 import logging
 
-from .worker import worker_process
+from .worker import RECYCLE_EXIT_CODE, worker_process
+from .scheduler import scheduler_process
+
+
+# A worker that stays up this long starts its slot's crash count over
+CRASH_RESET_SECONDS = 60
+
+
+class MockProcess:
+    """Wraps a Popen object with the multiprocessing.Process interface"""
+    def __init__(self, popen_obj, worker_id):
+        self.popen = popen_obj
+        self.pid = popen_obj.pid
+        self.name = worker_id
+        self._terminated = False
+    
+    def is_alive(self):
+        if self._terminated:
+            return False
+        return self.popen.poll() is None
+    
+    @property
+    def exitcode(self):
+        return self.popen.poll()
+    
+    def terminate(self):
+        if not self._terminated:
+            try:
+                self.popen.terminate()
+                self._terminated = True
+            except:
+                pass
+    
+    def kill(self):
+        if not self._terminated:
+            try:
+                self.popen.kill()
+                self._terminated = True
+            except:
+                pass
+    
+    def join(self, timeout=None):
+        try:
+            self.popen.wait(timeout=timeout)
+        except:
+            pass
+
+
+class Autoscaler:
+    """Picks a worker count from the queue backlog
+    
+    The pool grows straight away when the ready backlog needs more workers,
+    or when every worker is busy and the oldest ready job has waited longer
+    than max_wait. It shrinks one worker at a time, and only after the
+    surplus has lasted idle_seconds, so a brief lull between bursts doesn't
+    cause churn.
+    """
+    
+    def __init__(self, min_workers: int, max_workers: int, jobs_per_worker: int = 5,
+                 max_wait: float = 2.0, idle_seconds: float = 30.0, concurrency: int = 1):
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.concurrency = max(1, concurrency)  # Jobs each worker runs at once
+        self.jobs_per_worker = max(1, jobs_per_worker)
+        self.max_wait = max_wait
+        self.idle_seconds = idle_seconds
+        self._surplus_since: Optional[float] = None
+    
+    def target(self, current: int, ready: int, processing: int, oldest_wait: float,
+               now: Optional[float] = None) -> int:
+        """Worker count to run given the current one and the backlog"""
+        now = time.time() if now is None else now
+        
+        # Busy workers stay; ready jobs need one more worker per jobs_per_worker
+        # (per jobs_per_worker for each of a worker's concurrent slots)
+        wanted = (math.ceil(processing / self.concurrency)
+                  + math.ceil(ready / (self.jobs_per_worker * self.concurrency)))
+        if ready and oldest_wait > self.max_wait and processing >= current * self.concurrency:
+            wanted = max(wanted, current + 1)  # Every worker is busy and jobs are aging
+        wanted = min(max(wanted, self.min_workers), self.max_workers)
+        
+        if wanted >= current:
+            self._surplus_since = None
+            return wanted
+
+        if self._surplus_since is None:
+            self._surplus_since = now
+        if now - self._surplus_since < self.idle_seconds:
+            return current
+        self._surplus_since = now  # Wait out another idle period before the next one
+        return current - 1
 
 
 class WorkerManager:
-    def __init__(self, job_queue, db_path: str = "jobs.db", lock_dir: str = "locks"):
+    def __init__(self, job_queue, db_path: str = "jobs.db", lock_dir: str = "locks",
+                 exit_when_idle: bool = True):
         self.job_queue = job_queue
         self.db_path = db_path
         self.lock_dir = lock_dir
+        # Fixed-size pools let workers exit once the queue is empty; a
+        # long-running owner such as the daemon keeps them waiting for jobs
+        self.exit_when_idle = exit_when_idle
         self.workers: List[multiprocessing.Process] = []
         self.worker_pids: Dict[str, int] = {}
+        self.scheduler = None
+        
+        # Set by start(max_count=...); workers being scaled down finish their job first
+        self.autoscaler: Optional[Autoscaler] = None
+        self.autoscale_interval = 1.0
+        self._next_autoscale = 0.0
+        self._retiring: List[multiprocessing.Process] = []
+        self._spawned = 0
+        self.concurrency = 1
+        
+        # Each worker fills a slot; crashed and recycled workers are restarted in
+        # theirs, crashes after a backoff that doubles with each crash in a row
+        self.restart_backoff = 1.0
+        self.restart_max_backoff = 60.0
+        self._slots: Dict[str, Tuple[int, float]] = {}  # Worker name -> (slot, started at)
+        self._crashes: Dict[int, int] = {}
+        self._restarts: List[Tuple[float, int]] = []  # (due at, slot)
         
         # Ensure lock directory exists
         os.makedirs(lock_dir, exist_ok=True)
@@ -30,84 +142,212 @@ class WorkerManager:
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger('worker_manager')
     
-    def start(self, count: int = 1):
-        """Start the specified number of worker processes"""
+    def start(self, count: int = 1, max_count: Optional[int] = None, concurrency: Optional[int] = None):
+        """Start the specified number of worker processes
+        
+        With max_count, the pool autoscales between count and max_count
+        workers as autoscale() is called, and idle workers stay up until
+        they are scaled down instead of exiting on their own. concurrency
+        overrides the worker-concurrency setting (jobs run at once per worker).
+        """
         if self.workers:
             raise RuntimeError("Workers are already running. Stop them first.")
+        if max_count is not None and max_count < max(count, 1):
+            raise ValueError("max_count must be at least 1 and no less than count")
         
         self.logger.info(f"Starting {count} worker processes")
         
-        for i in range(count):
-            worker_id = f"worker_{int(time.time())}_{i}"
-            
-            # Use subprocess instead of multiprocessing for better Windows compatibility
-            if os.name == 'nt':  # Windows
-                # Create worker subprocess
-                cmd = [
-                    sys.executable, "-c",
-                    f"from src.worker import worker_process; worker_process('{worker_id}', '{self.db_path}', '{self.lock_dir}')"
-                ]
-                process = subprocess.Popen(cmd, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
-                
-                # Create a mock process object for compatibility
-                class MockProcess:
-                    def __init__(self, popen_obj, worker_id):
-                        self.popen = popen_obj
-                        self.pid = popen_obj.pid
-                        self.name = worker_id
-                        self._terminated = False
-                    
-                    def is_alive(self):
-                        if self._terminated:
-                            return False
-                        return self.popen.poll() is None
-                    
-                    def terminate(self):
-                        if not self._terminated:
-                            try:
-                                self.popen.terminate()
-                                self._terminated = True
-                            except:
-                                pass
-                    
-                    def kill(self):
-                        if not self._terminated:
-                            try:
-                                self.popen.kill()
-                                self._terminated = True
-                            except:
-                                pass
-                    
-                    def join(self, timeout=None):
-                        try:
-                            self.popen.wait(timeout=timeout)
-                        except:
-                            pass
-                
-                mock_process = MockProcess(process, worker_id)
-                self.workers.append(mock_process)
-                self.worker_pids[worker_id] = process.pid
-                
-            else:  # Unix-like systems
-                # Create worker process
-                process = multiprocessing.Process(
-                    target=worker_process,
-                    args=(worker_id, self.db_path, self.lock_dir),
-                    name=worker_id
-                )
-                
-                process.start()
-                self.workers.append(process)
-                self.worker_pids[worker_id] = process.pid
-            
-            self.logger.info(f"Started worker {worker_id} (PID: {self.worker_pids[worker_id]})")
+        # Recover jobs left in processing by workers that died before this run
+        reaped = self.job_queue.reap_expired_leases()
+        if reaped:
+            self.logger.info(f"Requeued {reaped} job(s) with expired leases")
+        
+        from .config import Config
+        config = Config(self.db_path)
+        self.restart_backoff = config.get_float('worker-restart-backoff', 1.0)
+        self.restart_max_backoff = config.get_float('worker-restart-max-backoff', 60.0)
+        self.concurrency = max(1, concurrency or config.get_int('worker-concurrency', 1))
+        self._crashes.clear()
+        self._restarts.clear()
+        
+        self.autoscaler = None
+        if max_count is not None:
+            self.autoscaler = Autoscaler(
+                count, max_count,
+                jobs_per_worker=config.get_int('autoscale-jobs-per-worker', 5),
+                max_wait=config.get_float('autoscale-max-wait', 2.0),
+                idle_seconds=config.get_float('autoscale-idle-seconds', 30.0),
+                concurrency=self.concurrency
+            )
+            self.autoscale_interval = config.get_float('autoscale-interval', 1.0)
+            self._next_autoscale = 0.0
+            self.logger.info(f"Autoscaling between {count} and {max_count} workers")
+        
+        for _ in range(count):
+            self._start_worker()
+        
+        # One scheduler per manager; extra instances stand by until the elected one stops
+        self.scheduler = self._spawn(
+            f"scheduler_{int(time.time())}", scheduler_process, (self.db_path,),
+            f"from src.scheduler import scheduler_process; scheduler_process('{self.db_path}')"
+        )
+        self.logger.info(f"Started scheduler (PID: {self.scheduler.pid})")
         
         # Clean up any stale lock files
         self._cleanup_stale_locks()
     
+    def _start_worker(self, slot: Optional[int] = None):
+        """Spawn one worker process in slot (default: the lowest free one) and track it"""
+        if slot is None:
+            used = {used_slot for used_slot, _ in self._slots.values()}
+            used.update(pending_slot for _, pending_slot in self._restarts)
+            slot = 0
+            while slot in used:
+                slot += 1
+        worker_id = f"worker_{int(time.time())}_{self._spawned}"
+        self._spawned += 1
+        exit_when_idle = self.autoscaler is None and self.exit_when_idle
+        process = self._spawn(
+            worker_id, worker_process,
+            (worker_id, self.db_path, self.lock_dir, exit_when_idle, self.concurrency),
+            f"from src.worker import worker_process; worker_process('{worker_id}', '{self.db_path}', "
+            f"'{self.lock_dir}', {exit_when_idle}, {self.concurrency})"
+        )
+        self.workers.append(process)
+        self.worker_pids[worker_id] = process.pid
+        self._slots[worker_id] = (slot, time.time())
+        
+        self.logger.info(f"Started worker {worker_id} (PID: {self.worker_pids[worker_id]})")
+    
+    def supervise(self) -> int:
+        """Restart exited workers that are due and apply autoscaling
+        
+        Called about once a second by whatever supervises the pool
+        (wait_for_workers or the daemon). Returns the worker count.
+        """
+        self._reap()
+        now = time.time()
+        due = [slot for due_at, slot in self._restarts if due_at <= now]
+        if due:
+            self._restarts = [(due_at, slot) for due_at, slot in self._restarts if due_at > now]
+            for slot in due:
+                self._start_worker(slot)
+        return self.autoscale()
+    
+    def _reap(self):
+        """Drop exited workers, scheduling restarts for recycled and crashed ones
+        
+        Workers that exit cleanly (idle, or stopped by a signal we didn't
+        send through stop_all) are not restarted.
+        """
+        now = time.time()
+        alive = []
+        for process in self.workers:
+            if process.is_alive():
+                alive.append(process)
+                continue
+            
+            slot, started_at = self._slots.pop(process.name, (0, now))
+            self.worker_pids.pop(process.name, None)
+            exitcode = process.exitcode
+            if exitcode == RECYCLE_EXIT_CODE:
+                self.logger.info(f"Replacing recycled worker {process.name}")
+                self._restarts.append((now, slot))
+            elif exitcode in (0, None):
+                self.logger.info(f"Worker {process.name} exited")
+            else:
+                crashes = 1 if now - started_at >= CRASH_RESET_SECONDS else self._crashes.get(slot, 0) + 1
+                self._crashes[slot] = crashes
+                delay = min(self.restart_backoff * 2 ** (crashes - 1), self.restart_max_backoff)
+                self.logger.warning(
+                    f"Worker {process.name} died unexpectedly (exit code {exitcode}); "
+                    f"restarting slot {slot} in {delay:.1f}s (crash {crashes} in a row)"
+                )
+                self._restarts.append((now + delay, slot))
+                self.job_queue.log_system_metric('worker_crash', crashes)
+        self.workers = alive
+    
+    def autoscale(self) -> int:
+        """Resize the pool for the current backlog; returns the new worker count
+        
+        A no-op unless started with max_count, and rate limited to one
+        decision per autoscale-interval. Scaling decisions are recorded in
+        system_metrics as autoscale_up/autoscale_down with the new count.
+        """
+        current = self.get_active_worker_count() + len(self._restarts)  # Restarts count as workers
+        now = time.time()
+        if self.autoscaler is None or now < self._next_autoscale:
+            return current
+        self._next_autoscale = now + self.autoscale_interval
+        
+        backlog = self.job_queue.get_backlog()
+        target = self.autoscaler.target(current, backlog['ready'], backlog['processing'],
+                                        backlog['oldest_wait_seconds'], now)
+        if target > current:
+            self.logger.info(
+                f"Scaling up to {target} workers ({backlog['ready']} ready, "
+                f"oldest waiting {backlog['oldest_wait_seconds']:.1f}s)"
+            )
+            for _ in range(target - current):
+                self._start_worker()
+            self.job_queue.log_system_metric('autoscale_up', target)
+        elif target < current:
+            self.logger.info(f"Scaling down to {target} workers")
+            for _ in range(current - target):
+                self._retire_worker()
+            self.job_queue.log_system_metric('autoscale_down', target)
+        return target
+    
+    def _retire_worker(self):
+        """Cancel a pending restart, or ask the newest worker to exit after its current job"""
+        if self._restarts:
+            self._restarts.remove(max(self._restarts))
+            return
+        process = self.workers.pop()
+        self.worker_pids.pop(process.name, None)
+        self._slots.pop(process.name, None)
+        try:
+            process.terminate()  # SIGTERM: the worker stops after its current job
+        except ProcessLookupError:
+            pass
+        self._retiring.append(process)
+    
+    def _spawn(self, name: str, target, args: tuple, windows_code: str):
+        """Start a child process running target(*args)"""
+        # Use subprocess instead of multiprocessing for better Windows compatibility
+        if os.name == 'nt':  # Windows
+            cmd = [sys.executable, "-c", windows_code]
+            process = subprocess.Popen(cmd, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+            return MockProcess(process, name)
+        
+        # Unix-like systems
+        process = multiprocessing.Process(target=target, args=args, name=name)
+        process.start()
+        return process
+    
+    def _stop_scheduler(self):
+        """Stop the scheduler process, releasing its lease"""
+        if self.scheduler is None:
+            return
+        if self.scheduler.is_alive():
+            try:
+                self.scheduler.terminate()
+                self.scheduler.join(timeout=10)
+            except ProcessLookupError:
+                pass
+        if self.scheduler.is_alive():
+            self.scheduler.kill()
+            self.scheduler.join(timeout=5)
+        self.scheduler = None
+    
     def stop_all(self):
         """Stop all worker processes gracefully"""
+        self.autoscaler = None
+        self._restarts.clear()
+        self.workers.extend(p for p in self._retiring if p.is_alive())
+        self._retiring.clear()
         if not self.workers:
+            self._stop_scheduler()
             self.logger.info("No workers to stop")
             return
         
@@ -141,37 +381,36 @@ class WorkerManager:
                     pass
         
         # Clean up
+        self._stop_scheduler()
         self.workers.clear()
         self.worker_pids.clear()
+        self._slots.clear()
         self._cleanup_all_locks()
         
         self.logger.info("All workers stopped")
     
     def get_active_worker_count(self) -> int:
         """Get the number of currently active workers"""
-        # Clean up dead processes
-        self.workers = [p for p in self.workers if p.is_alive()]
+        # Clean up dead processes, scheduling restarts where needed
+        self._reap()
+        self._retiring = [p for p in self._retiring if p.is_alive()]
         return len(self.workers)
     
     def wait_for_workers(self):
-        """Wait for all worker processes to complete"""
+        """Wait for all worker processes to complete
+        
+        Crashed and recycled workers are restarted meanwhile. When
+        autoscaling, supervise the pool until interrupted instead.
+        """
         try:
-            while self.workers:
-                # Remove dead processes
-                alive_workers = []
-                for process in self.workers:
-                    if process.is_alive():
-                        alive_workers.append(process)
-                    else:
-                        # Process died, log it
-                        self.logger.warning(f"Worker {process.name} died unexpectedly")
-                
-                self.workers = alive_workers
-                
-                if not self.workers:
+            while True:
+                self.supervise()
+                if not self.workers and not self._restarts and self.autoscaler is None:
                     break
-                
                 time.sleep(1)
+            
+            # Workers exit once nothing is left to schedule
+            self._stop_scheduler()
                 
         except KeyboardInterrupt:
             self.logger.info("Received interrupt signal")
@@ -232,10 +471,13 @@ class WorkerManager:
         status = {}
         
         for process in self.workers:
+            slot = self._slots.get(process.name, (None, 0))[0]
             status[process.name] = {
                 'pid': process.pid,
                 'alive': process.is_alive(),
-                'exitcode': process.exitcode
+                'exitcode': process.exitcode,
+                'slot': slot,
+                'crashes': self._crashes.get(slot, 0)
             }
         
         return status
\ No newline at end of file
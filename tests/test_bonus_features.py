@@ -7,11 +7,14 @@ import sys
 import os
 import time
 import subprocess
+import tempfile
+import threading
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.job_queue import JobQueue
+from src.job_queue import JobQueue, SCHEDULER_LEASE
+from src.scheduler import Scheduler
 
 def test_priority_queues():
     """Test priority queue functionality"""
@@ -96,6 +99,40 @@ def test_scheduled_jobs():
     
     return True
 
+def test_scheduler_promotion():
+    """Test that the elected scheduler promotes jobs when they come due"""
+    print("Testing Scheduler Promotion...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "scheduler_test.db")
+    jq = JobQueue(db_path)
+    jq.enqueue({'id': 'sched_soon', 'command': 'echo soon', 'run_at': '+1s'})
+    jq.enqueue({'id': 'sched_later', 'command': 'echo later', 'run_at': '+1h'})
+    
+    scheduler = Scheduler(db_path, owner_id='scheduler_a')
+    standby = Scheduler(db_path, owner_id='scheduler_b')
+    thread = threading.Thread(target=scheduler.start, daemon=True)
+    thread.start()
+    
+    start_time = time.time()
+    while time.time() - start_time < 5 and jq.get_job('sched_soon')['state'] != 'pending':
+        time.sleep(0.05)
+    elapsed = time.time() - start_time
+    
+    # A second scheduler must not be elected while the first holds the lease
+    second_elected = jq.acquire_lease(SCHEDULER_LEASE, 'scheduler_b', 15)
+    scheduler.stop()
+    thread.join(timeout=5)
+    taken_over = standby._hold_lease()
+    
+    if jq.get_job('sched_soon')['state'] == 'pending' and elapsed < 3 and \
+            jq.get_job('sched_later')['state'] == 'scheduled' and not second_elected and taken_over:
+        print(f"  PASS: Due job promoted after {elapsed:.1f}s, lease held by one scheduler")
+        return True
+    else:
+        print(f"  FAIL: soon={jq.get_job('sched_soon')['state']} later={jq.get_job('sched_later')['state']} "
+              f"second_elected={second_elected} taken_over={taken_over}")
+        return False
+
 def test_interactive_shell():
     """Test interactive shell functionality"""
     print("Testing Interactive Shell...")
@@ -116,6 +153,35 @@ def test_interactive_shell():
     
     return True
 
+def test_interactive_shell_in_process():
+    """Test that shell commands run in-process and report structured counts"""
+    print("Testing Interactive Shell Dispatch...")
+    
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    workdir = tempfile.mkdtemp()
+    jq = JobQueue(os.path.join(workdir, "jobs.db"))
+    jq.enqueue({'id': 'shell_pending', 'command': 'echo hi'})
+    jq.enqueue({'id': 'shell_later', 'command': 'echo later', 'run_at': '+1h'})
+    
+    # Piped input ends in EOF, which must close the shell rather than hang
+    result = subprocess.run(
+        [sys.executable, os.path.join(root, "queuectl.py"), "shell"],
+        input="status\nconfig get max-retries\nno_such_command\n",
+        cwd=workdir,
+        capture_output=True,
+        text=True,
+        timeout=30
+    )
+    
+    counts_ok = "Pending: 1 | Processing: 0 | Completed: 0 | Failed: 0 | Dead: 0 | Scheduled: 1" in result.stdout
+    if result.returncode == 0 and counts_ok and "shell_later: ready in" in result.stdout \
+            and "max-retries = 3" in result.stdout and "No such command" in result.stdout:
+        print("  PASS: Shell reports job counts and runs commands without subprocesses")
+        return True
+    else:
+        print(f"  FAIL: returncode={result.returncode} counts_ok={counts_ok}")
+        return False
+
 def test_web_dashboard():
     """Test web dashboard functionality"""
     print("Testing Web Dashboard...")
@@ -162,7 +228,9 @@ def main():
     tests = [
         test_priority_queues,
         test_scheduled_jobs,
+        test_scheduler_promotion,
         test_interactive_shell,
+        test_interactive_shell_in_process,
         test_web_dashboard,
         test_enhanced_errors
     ]
@@ -6,10 +6,16 @@ Test configuration management functionality
 import sys
 import os
 import subprocess
+import tempfile
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.config import Config
+from src.db import get_connection
+from src.job_queue import JobQueue
+from src.migrations import SCHEMA_VERSION, migrate, schema_version
+
 def test_config_set():
     """Test setting configuration values"""
     print("Testing Config Set...")
@@ -149,6 +155,55 @@ def test_config_invalid_operations():
         print("  FAIL: Non-existent keys not handled properly")
         return False
 
+def test_database_tuning():
+    """Test that pooled connections use WAL and the db-* settings"""
+    print("Testing Database Tuning...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "tuning_test.db")
+    config = Config(db_path)
+    conn = get_connection(db_path)
+    
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    busy_timeout = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+    
+    if journal_mode == 'wal' and busy_timeout == config.get_int('db-busy-timeout-ms') \
+            and get_connection(db_path) is conn:
+        print("  PASS: Pooled connection reused in WAL mode with configured pragmas")
+        return True
+    else:
+        print(f"  FAIL: journal_mode={journal_mode}, busy_timeout={busy_timeout}")
+        return False
+
+def test_schema_versioning():
+    """Test that the schema version is recorded and defaults need no rows"""
+    print("Testing Schema Versioning...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "schema_test.db")
+    JobQueue(db_path)
+    config = Config(db_path)
+    conn = get_connection(db_path)
+    
+    version = schema_version(conn)
+    stored_rows = conn.execute("SELECT COUNT(*) FROM config").fetchone()[0]
+    
+    # A database written by a newer release must not be touched
+    newer_path = os.path.join(tempfile.mkdtemp(), "newer_test.db")
+    newer = get_connection(newer_path)
+    newer.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    try:
+        migrate(newer)
+        refused = False
+    except RuntimeError:
+        refused = True
+    
+    if version == SCHEMA_VERSION and stored_rows == 0 and config.get('max-retries') == '3' and \
+            'backoff-base' in config.list_all() and refused:
+        print(f"  PASS: Schema at version {version}, defaults served without rows")
+        return True
+    else:
+        print(f"  FAIL: version={version}, config rows={stored_rows}, refused newer={refused}")
+        return False
+
 def main():
     """Run all configuration tests"""
     print("=== Testing Configuration Management ===")
@@ -160,7 +215,9 @@ def main():
         test_config_get,
         test_config_list,
         test_config_persistence,
-        test_config_invalid_operations
+        test_config_invalid_operations,
+        test_database_tuning,
+        test_schema_versioning
     ]
     
     passed = 0
@@ -6,12 +6,18 @@ Test web dashboard functionality
 import sys
 import os
 import subprocess
+import tempfile
+import threading
 import time
 import requests
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.config import Config
+from src.job_queue import JobQueue
+from src.web_dashboard import WebDashboard
+
 def test_dashboard_help():
     """Test dashboard help"""
     print("Testing Dashboard Help...")
@@ -194,6 +200,135 @@ def test_dashboard_status_integration():
         print("  FAIL: Status command failed")
         return False
 
+def test_dashboard_jobs_pagination():
+    """Test that /api/jobs pages with a cursor and returns compact JSON"""
+    print("Testing Dashboard Jobs Pagination...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "dashboard_test.db")
+    job_queue = JobQueue(db_path)
+    job_queue.enqueue_many({'id': f'page_{i:03d}', 'command': 'echo page'} for i in range(250))
+    job_queue.enqueue_many([{'id': f'dead_{i}', 'command': 'false'} for i in range(3)])
+    for i in range(3):
+        job_queue.update_job_state(f'dead_{i}', 'dead', error='boom')
+    
+    dashboard = WebDashboard(job_queue, Config(db_path), port=0)
+    dashboard.start()
+    base = f"http://localhost:{dashboard.server.server_address[1]}/api/jobs"
+    try:
+        ids, cursor, pages = [], None, 0
+        while True:
+            response = requests.get(base, params={'limit': 100, 'cursor': cursor} if cursor else {'limit': 100}, timeout=5)
+            data = response.json()
+            ids.extend(job['id'] for job in data['jobs'])
+            pages += 1
+            if not all(job['metrics'] and job['metrics'][0]['event_type'] == 'created' for job in data['jobs']):
+                print("  FAIL: Jobs are missing their metrics")
+                return False
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        dead = requests.get(base, params={'state': 'dead'}, timeout=5).json()
+        compact = response.text.startswith('{"jobs":[{"id":') and '\n' not in response.text
+    finally:
+        dashboard.stop()
+    
+    listed = [job['id'] for job in job_queue.list_jobs()]
+    if ids == listed and len(set(ids)) == 253 and pages == 3 and compact and \
+            sorted(job['id'] for job in dead['jobs']) == ['dead_0', 'dead_1', 'dead_2'] and dead['next_cursor'] is None:
+        print("  PASS: 253 jobs paged newest first in 3 pages with metrics and compact JSON")
+        return True
+    else:
+        print(f"  FAIL: pages={pages} jobs={len(ids)} unique={len(set(ids))} same_order={ids == listed} compact={compact}")
+        return False
+
+def test_dashboard_stream():
+    """Test that /api/stream pushes status and job changes to every client"""
+    print("Testing Dashboard Stream...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "dashboard_test.db")
+    job_queue = JobQueue(db_path)
+    job_queue.enqueue({'id': 'stream_job', 'command': 'echo stream'})
+    
+    dashboard = WebDashboard(job_queue, Config(db_path), port=0)
+    dashboard.start()
+    url = f"http://localhost:{dashboard.server.server_address[1]}/api/stream"
+    received = [[], []]
+    
+    def listen(events):
+        with requests.get(url, stream=True, timeout=10) as response:
+            events.append(response.headers.get('Content-type'))
+            event = None
+            for line in response.iter_lines(chunk_size=1, decode_unicode=True):
+                if line.startswith('event: '):
+                    event = line[len('event: '):]
+                elif line.startswith('data: '):
+                    events.append((event, line[len('data: '):]))
+                    if event == 'jobs' and '"state":"completed"' in line:
+                        return
+    
+    listeners = [threading.Thread(target=listen, args=(events,), daemon=True) for events in received]
+    try:
+        for listener in listeners:
+            listener.start()
+        deadline = time.time() + 10
+        while time.time() < deadline and not all(any(e[0] == 'status' for e in events[1:]) for events in received):
+            time.sleep(0.1)
+        job_queue.update_job_state('stream_job', 'completed', output='stream')
+        for listener in listeners:
+            listener.join(10)
+    finally:
+        dashboard.stop()
+    
+    kinds = [[event for event, _ in events[1:]] for events in received]
+    completed = [[data for event, data in events[1:] if event == 'jobs' and '"state":"completed"' in data]
+                 for events in received]
+    if all(events and events[0] == 'text/event-stream' for events in received) and \
+            all('status' in k and 'jobs' in k for k in kinds) and \
+            all(c and '"id":"stream_job"' in c[0] for c in completed) and completed[0] == completed[1] and \
+            not dashboard.feed._thread.is_alive():
+        print("  PASS: Both clients got status and the same job change; the feed stopped with the server")
+        return True
+    else:
+        print(f"  FAIL: events={kinds} completed={completed}")
+        return False
+
+def test_dashboard_snapshot_cache():
+    """Test that API responses are cached with ETags until the queue changes"""
+    print("Testing Dashboard Snapshot Cache...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "dashboard_test.db")
+    job_queue = JobQueue(db_path)
+    job_queue.enqueue_many({'id': f'cache_{i:03d}', 'command': 'echo cache'} for i in range(100))
+    computed = []
+    count_states = job_queue._count_states
+    job_queue._count_states = lambda: computed.append(1) or count_states()
+    
+    dashboard = WebDashboard(job_queue, Config(db_path), port=0)
+    dashboard.start()
+    base = f"http://localhost:{dashboard.server.server_address[1]}/api"
+    try:
+        first = requests.get(f"{base}/status", timeout=5)
+        etag = first.headers.get('ETag')
+        repeat = requests.get(f"{base}/status", headers={'If-None-Match': etag}, timeout=5)
+        queries_before_change = len(computed)
+        
+        JobQueue(db_path).enqueue({'id': 'cache_new', 'command': 'echo new'})
+        changed = requests.get(f"{base}/status", headers={'If-None-Match': etag}, timeout=5)
+        jobs = requests.get(f"{base}/jobs", params={'limit': 100}, timeout=5)
+    finally:
+        dashboard.stop()
+    
+    if first.status_code == 200 and etag and repeat.status_code == 304 and not repeat.content and \
+            queries_before_change == 1 and changed.status_code == 200 and changed.headers.get('ETag') != etag and \
+            changed.json()['status']['pending'] == 101 and jobs.headers.get('Content-Encoding') == 'gzip' and \
+            len(jobs.json()['jobs']) == 100:
+        print("  PASS: Repeat request got 304 without a query; a new job changed the ETag; large pages are gzipped")
+        return True
+    else:
+        print(f"  FAIL: first={first.status_code} repeat={repeat.status_code} queries={queries_before_change} "
+              f"changed={changed.status_code} encoding={jobs.headers.get('Content-Encoding')}")
+        return False
+
 def main():
     """Run all dashboard tests"""
     print("=== Testing Web Dashboard ===")
@@ -207,7 +342,10 @@ def main():
         test_dashboard_interactive_shell,
         test_dashboard_status_integration,
         test_dashboard_background_mode,
-        test_dashboard_web_interface
+        test_dashboard_web_interface,
+        test_dashboard_jobs_pagination,
+        test_dashboard_stream,
+        test_dashboard_snapshot_cache
     ]
     
     passed = 0
@@ -7,6 +7,7 @@ import sys
 import os
 import subprocess
 import json
+import tempfile
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -217,6 +218,39 @@ def test_enqueue_duplicate_id():
         print("  PASS: Properly rejects duplicate IDs")
         return True
 
+def test_enqueue_bulk_file():
+    """Test bulk enqueue from a JSONL file"""
+    print("Testing Bulk Enqueue from File...")
+    
+    jq = JobQueue()
+    job_ids = [f'bulk_enqueue_test_{i}' for i in range(5)]
+    for job_id in job_ids:
+        jq.delete_job(job_id)
+    
+    jobs_file = os.path.join(tempfile.mkdtemp(), 'jobs.jsonl')
+    with open(jobs_file, 'w') as f:
+        for job_id in job_ids:
+            f.write(json.dumps({'id': job_id, 'command': 'echo Bulk test'}) + '\n')
+    
+    result = subprocess.run(
+        [sys.executable, "queuectl.py", "enqueue", "--file", jobs_file],
+        capture_output=True,
+        text=True
+    )
+    
+    # Re-running the same file skips the jobs that already exist
+    counts = jq.enqueue_many({'id': job_id, 'command': 'echo Bulk test'} for job_id in job_ids)
+    
+    for job_id in job_ids:
+        jq.delete_job(job_id)
+    
+    if result.returncode == 0 and "Enqueued 5" in result.stdout and counts['skipped'] == 5:
+        print("  PASS: Bulk enqueue from file works")
+        return True
+    else:
+        print("  FAIL: Bulk enqueue from file failed")
+        return False
+
 def main():
     """Run all enqueue tests"""
     print("=== Testing Job Enqueuing ===")
@@ -230,7 +264,8 @@ def main():
         test_enqueue_with_retries,
         test_enqueue_cli,
         test_enqueue_validation,
-        test_enqueue_duplicate_id
+        test_enqueue_duplicate_id,
+        test_enqueue_bulk_file
     ]
     
     passed = 0
@@ -5,7 +5,9 @@ Test job listing functionality
 
 import sys
 import os
+import sqlite3
 import subprocess
+import tempfile
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -179,6 +181,136 @@ def test_list_job_details():
         print("  FAIL: Could not retrieve job details")
         return False
 
+def test_timestamp_migration():
+    """Test that ISO text timestamps are migrated to integers and still listed as ISO"""
+    print("Testing Timestamp Migration...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE jobs (
+            id TEXT PRIMARY KEY, command TEXT NOT NULL, state TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0, max_retries INTEGER DEFAULT 3,
+            created_at TEXT NOT NULL, updated_at TEXT NOT NULL, next_retry_at TEXT,
+            output TEXT, error TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO jobs (id, command, state, created_at, updated_at, next_retry_at)
+        VALUES ('legacy_job', 'echo legacy', 'failed', '2024-05-01T12:00:00.250000+00:00',
+                '2024-05-01T12:00:01+00:00', '2024-05-01T12:00:05Z')
+    """)
+    conn.commit()
+    conn.close()
+    
+    jq = JobQueue(db_path)
+    job = jq.list_jobs('failed')[0]
+    
+    conn = sqlite3.connect(db_path)
+    types = conn.execute("SELECT typeof(created_at), typeof(next_retry_at) FROM jobs").fetchone()
+    conn.close()
+    
+    if types == ('integer', 'integer') and job['created_at'] == '2024-05-01T12:00:00.250000+00:00' and \
+            job['next_retry_at'] == '2024-05-01T12:00:05+00:00' and job['priority'] == 0:
+        print("  PASS: Timestamps stored as integers and listed as ISO strings")
+        return True
+    else:
+        print(f"  FAIL: Stored as {types}, listed as {job['created_at']} / {job['next_retry_at']}")
+        return False
+
+def test_job_output_store():
+    """Test that outputs are kept compressed out of listings and fetched per job"""
+    print("Testing Job Output Store...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "outputs.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE jobs (
+            id TEXT PRIMARY KEY, command TEXT NOT NULL, state TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0, max_retries INTEGER DEFAULT 3,
+            created_at INTEGER NOT NULL, updated_at INTEGER NOT NULL, next_retry_at INTEGER,
+            output TEXT, error TEXT
+        )
+    """)
+    conn.execute("""
+        INSERT INTO jobs (id, command, state, created_at, updated_at, output, error)
+        VALUES ('old_job', 'echo old', 'dead', 1714564800000000, 1714564800000000, ?, ?)
+    """, ('x' * 5000, 'e' * 500))
+    conn.commit()
+    conn.close()
+    
+    jq = JobQueue(db_path)
+    jq.enqueue({'id': 'new_job', 'command': 'echo new'})
+    jq.update_job_state('new_job', 'completed', output='line\n' * 1000)
+    listed = {job['id']: job for job in jq.list_jobs()}
+    old_output = jq.get_job_output('old_job')
+    
+    conn = sqlite3.connect(db_path)
+    stored = conn.execute("SELECT SUM(LENGTH(output)) FROM job_outputs").fetchone()[0]
+    row_outputs = conn.execute("SELECT COUNT(*) FROM jobs WHERE output IS NOT NULL").fetchone()[0]
+    conn.close()
+    
+    jq.delete_job('new_job')
+    if 'output' not in listed['old_job'] and len(listed['old_job']['error']) == 200 and \
+            old_output == {'output': 'x' * 5000, 'error': 'e' * 500} and \
+            jq.get_job('new_job') is None and jq.get_job_output('new_job') is None and \
+            jq.get_job('old_job')['output'] == 'x' * 5000 and stored < 1000 and row_outputs == 0:
+        print("  PASS: Outputs stored compressed in job_outputs and left out of listings")
+        return True
+    else:
+        print(f"  FAIL: listed={listed['old_job']} stored={stored} row_outputs={row_outputs}")
+        return False
+
+def test_queue_counters():
+    """Test that trigger-maintained state counts match the jobs table"""
+    print("Testing Queue Counters...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "counters.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE jobs (
+            id TEXT PRIMARY KEY, command TEXT NOT NULL, state TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0, max_retries INTEGER DEFAULT 3,
+            created_at INTEGER NOT NULL, updated_at INTEGER NOT NULL, next_retry_at INTEGER,
+            output TEXT, error TEXT
+        )
+    """)
+    conn.executemany("""
+        INSERT INTO jobs (id, command, state, created_at, updated_at)
+        VALUES (?, 'echo old', ?, 1714564800000000, 1714564800000000)
+    """, [('old_1', 'pending'), ('old_2', 'pending'), ('old_3', 'dead')])
+    conn.commit()
+    conn.close()
+    
+    jq = JobQueue(db_path)
+    seeded = jq.get_status()
+    jq.enqueue_many({'id': f'job_{i}', 'command': 'echo hi', 'priority': i % 3} for i in range(30))
+    jq.claim_batch('worker-1', 5)
+    jq.update_job_state('job_0', 'completed')
+    jq.update_job_states([{'id': 'job_1', 'state': 'dead', 'error': 'boom'},
+                          {'id': 'job_2', 'state': 'failed', 'error': 'retry'}])
+    jq.retry_from_dlq('old_3')
+    jq.enqueue({'id': 'job_0', 'command': 'echo again', 'priority': 5}, force_replace=True)
+    jq.delete_job('job_3')
+    jq.delete_job('old_1')
+    
+    conn = sqlite3.connect(db_path)
+    by_state = dict(conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+    by_priority = dict(conn.execute(
+        "SELECT priority, COUNT(*) FROM jobs WHERE state = 'pending' GROUP BY priority").fetchall())
+    conn.close()
+    
+    status = jq.get_status()
+    counted = {state: count for state, count in status.items() if count}
+    if seeded['pending'] == 2 and seeded['dead'] == 1 and counted == by_state and \
+            jq.get_priority_counts('pending') == by_priority and jq.get_backlog()['processing'] == by_state['processing']:
+        print(f"  PASS: Counters seeded by the migration and kept exact: {counted}")
+        return True
+    else:
+        print(f"  FAIL: seeded={seeded} status={status} actual={by_state} "
+              f"priorities={jq.get_priority_counts('pending')} actual={by_priority}")
+        return False
+
 def main():
     """Run all list tests"""
     print("=== Testing Job Listing ===")
@@ -192,7 +324,10 @@ def main():
         test_list_table_format,
         test_list_empty_state,
         test_list_full_ids,
-        test_list_job_details
+        test_list_job_details,
+        test_timestamp_migration,
+        test_job_output_store,
+        test_queue_counters
     ]
     
     passed = 0
@@ -5,12 +5,18 @@ Test performance metrics functionality
 
 import sys
 import os
+import sqlite3
 import subprocess
+import tempfile
 import time
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.job_queue import JobQueue
+from src.migrations import migrate
+from src.timestamps import now_us
+
 def test_metrics_command():
     """Test basic metrics command"""
     print("Testing Metrics Command...")
@@ -197,6 +203,61 @@ def test_metrics_statistics():
         print("  FAIL: Could not retrieve statistical metrics")
         return False
 
+def test_metrics_rollups():
+    """Test that metrics come from time-bucketed rollups and old rows are pruned"""
+    print("Testing Metrics Rollups...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "rollups.db")
+    conn = sqlite3.connect(db_path)
+    migrate(conn, 8)  # Before rollups, to check they are seeded from finished jobs
+    conn.execute("""
+        INSERT INTO jobs (id, command, state, created_at, updated_at, execution_time_ms)
+        VALUES ('old_done', 'true', 'completed', ?, ?, 40)
+    """, (now_us(), now_us()))
+    conn.commit()
+    conn.close()
+    
+    jq = JobQueue(db_path)
+    jq.enqueue_many({'id': f'job_{i}', 'command': 'true'} for i in range(20))
+    for i in range(18):
+        jq.update_job_state(f'job_{i}', 'completed', execution_time_ms=(i + 1) * 10)
+    jq.update_job_state('job_18', 'dead', execution_time_ms=5)
+    jq.update_job_state('job_19', 'failed', execution_time_ms=5)
+    jq.update_job_state('job_19', 'processing')
+    jq.update_job_state('job_19', 'completed', execution_time_ms=1000)
+    metrics = jq.get_system_metrics(24)
+    
+    now, day = now_us(), 86400 * 1000000
+    conn = sqlite3.connect(db_path)
+    conn.executemany("""
+        INSERT INTO metric_rollups (resolution, bucket_start, outcome, bin_ms, count, time_sum_ms)
+        VALUES (?, ?, 'completed', 0, 1, 0)
+    """, [(60, now - 3 * day), (3600, now - 100 * day)])
+    conn.executemany("INSERT INTO system_metrics (metric_name, metric_value, timestamp) VALUES ('worker_crash', 1, ?)",
+                     [(now - 40 * day,), (now - day,)])
+    conn.commit()
+    buckets = conn.execute("SELECT resolution, SUM(count) FROM metric_rollups GROUP BY resolution").fetchall()
+    conn.close()
+    
+    deleted = jq.prune_metrics(30)
+    conn = sqlite3.connect(db_path)
+    kept_raw = conn.execute("SELECT COUNT(*) FROM system_metrics").fetchone()[0]
+    conn.close()
+    
+    # 20 completed runs (old_done 40ms, 10..180ms, 1000ms), 1 dead, 1 failed attempt
+    if metrics['job_counts'] == {'completed': 20, 'dead': 1, 'failed': 1} and \
+            metrics['avg_execution_time_ms'] == (40 + sum(range(10, 190, 10)) + 1000) / 20 and \
+            metrics['min_execution_time_ms'] == 10 and metrics['max_execution_time_ms'] == 1000 and \
+            metrics['p95_execution_time_ms'] == 200 and metrics['resolution_seconds'] == 60 and \
+            round(metrics['success_rate_percent'], 2) == round(20 / 21 * 100, 2) and \
+            jq.get_system_metrics(24 * 30)['job_counts'] == metrics['job_counts'] and \
+            buckets == [(60, 23), (3600, 23), (86400, 22)] and deleted == 3 and kept_raw == 1:
+        print("  PASS: Outcomes, execution times and percentiles answered from rollups; expired rows pruned")
+        return True
+    else:
+        print(f"  FAIL: metrics={metrics} buckets={buckets} deleted={deleted} kept_raw={kept_raw}")
+        return False
+
 def main():
     """Run all metrics tests"""
     print("=== Testing Performance Metrics ===")
@@ -209,7 +270,8 @@ def main():
         test_metrics_formatting,
         test_metrics_statistics,
         test_metrics_performance_data,
-        test_metrics_with_jobs
+        test_metrics_with_jobs,
+        test_metrics_rollups
     ]
     
     passed = 0
@@ -6,6 +6,7 @@ Test system status reporting functionality
 import sys
 import os
 import subprocess
+import tempfile
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -209,6 +210,38 @@ def test_status_consistency():
         print("  FAIL: Status calls inconsistent")
         return False
 
+def test_status_lazy_imports():
+    """Test that the CLI imports only what a command uses"""
+    print("Testing Lazy CLI Imports...")
+    
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = (
+        "import sys; sys.argv = ['queuectl.py', '--version']; sys.path.insert(0, %r)\n"
+        "import queuectl\n"
+        "try:\n"
+        "    queuectl.app()\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "heavy = ['src.job_queue', 'src.worker_manager', 'src.interactive_shell', 'src.banner']\n"
+        "print('loaded=' + ','.join(m for m in heavy if m in sys.modules))\n"
+    ) % root
+    workdir = tempfile.mkdtemp()
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=workdir,
+        capture_output=True,
+        text=True
+    )
+    
+    loaded = result.stdout.rsplit("loaded=", 1)[-1].strip()
+    if result.returncode == 0 and "loaded=" in result.stdout and not loaded \
+            and not os.path.exists(os.path.join(workdir, "jobs.db")):
+        print("  PASS: --version loads no queue modules and opens no database")
+        return True
+    else:
+        print(f"  FAIL: Eagerly loaded [{loaded}] ({result.stderr.strip()[-200:]})")
+        return False
+
 def main():
     """Run all status tests"""
     print("=== Testing System Status ===")
@@ -222,7 +255,8 @@ def main():
         test_status_job_counts,
         test_status_system_info,
         test_status_with_jobs,
-        test_status_consistency
+        test_status_consistency,
+        test_status_lazy_imports
     ]
     
     passed = 0
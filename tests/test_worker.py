@@ -5,13 +5,24 @@ Test worker management functionality
 
 import sys
 import os
+import multiprocessing
+import gzip
+import json
+import signal
 import subprocess
+import tempfile
+import threading
 import time
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.job_queue import JobQueue
+from src.worker import Worker, worker_process
+from src.config import Config
+from src.daemon import DaemonError, QueueDaemon, RemoteObject, connect, control_path
+from src.db import get_connection
+from src.worker_manager import Autoscaler, WorkerManager
 
 def test_worker_help():
     """Test worker help"""
@@ -227,6 +238,763 @@ def test_worker_interactive_shell():
         print("  FAIL: Worker commands not working in interactive shell")
         return False
 
+def test_atomic_job_claim():
+    """Test that concurrent claims never hand out the same job twice"""
+    print("Testing Atomic Job Claim...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "claim_test.db")
+    jq = JobQueue(db_path)
+    for i in range(20):
+        jq.enqueue({'id': f'claim_{i}', 'command': 'echo claim'})
+    
+    claimed = []
+    
+    def claim_loop(worker_id):
+        queue = JobQueue(db_path)
+        while True:
+            job = queue.claim_next_job(worker_id)
+            if not job:
+                break
+            claimed.append(job['id'])
+    
+    threads = [threading.Thread(target=claim_loop, args=(f'w{i}',)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    job = jq.get_job('claim_0')
+    if sorted(claimed) == sorted(f'claim_{i}' for i in range(20)) and \
+            job['state'] == 'processing' and job['worker_id'] and job['attempts'] == 1:
+        print("  PASS: Each job claimed exactly once and marked processing")
+        return True
+    else:
+        print(f"  FAIL: Claimed {len(claimed)} jobs ({len(set(claimed))} unique)")
+        return False
+
+def test_worker_drain_mode():
+    """Test that a worker drains ready jobs without pausing between them"""
+    print("Testing Worker Drain Mode...")
+    
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "drain_test.db")
+    jq = JobQueue(db_path)
+    for i in range(20):
+        jq.enqueue({'id': f'drain_{i}', 'command': 'echo drain'})
+    
+    worker = Worker('drain_worker', db_path, os.path.join(tmp_dir, 'locks'))
+    thread = threading.Thread(target=worker.start, daemon=True)
+    start_time = time.time()
+    thread.start()
+    
+    # The old loop slept one second after every job
+    while time.time() - start_time < 15 and jq.get_status()['completed'] < 20:
+        time.sleep(0.1)
+    elapsed = time.time() - start_time
+    worker.stop()
+    thread.join(timeout=5)
+    
+    if jq.get_status()['completed'] == 20 and elapsed < 10:
+        print(f"  PASS: Drained 20 jobs in {elapsed:.1f}s")
+        return True
+    else:
+        print(f"  FAIL: Only {jq.get_status()['completed']} of 20 jobs completed in {elapsed:.1f}s")
+        return False
+
+def test_batch_claim_and_release():
+    """Test leasing jobs in batches and releasing unstarted ones"""
+    print("Testing Batch Claim and Release...")
+    
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "batch_test.db")
+    jq = JobQueue(db_path)
+    for i in range(10):
+        jq.enqueue({'id': f'batch_{i}', 'command': 'echo batch', 'priority': i})
+    
+    batch = jq.claim_batch('batch_worker', 4)
+    batch_ids = [job['id'] for job in batch]
+    released = jq.release_jobs(batch_ids[2:], 'batch_worker')
+    
+    job = jq.get_job('batch_7')
+    if batch_ids != ['batch_9', 'batch_8', 'batch_7', 'batch_6'] or released != 2 or \
+            job['state'] != 'pending' or job['attempts'] != 0 or job['worker_id']:
+        print(f"  FAIL: Claimed {batch_ids}, released {released}")
+        return False
+    
+    # A worker with a prefetch buffer drains the rest and commits every result
+    jq.update_job_states([{'id': job_id, 'state': 'completed'} for job_id in batch_ids[:2]])
+    worker = Worker('batch_worker', db_path, os.path.join(tmp_dir, 'locks'))
+    worker.batch_size = 3
+    while worker._process_next_job():
+        pass
+    
+    if jq.get_status()['completed'] == 10:
+        print("  PASS: Batches claimed in priority order and unstarted leases released")
+        return True
+    else:
+        print(f"  FAIL: {jq.get_status()['completed']} of 10 jobs completed")
+        return False
+
+def test_batch_leases_held_until_flush():
+    """Test that finished jobs in a batch keep their lease while a sibling runs long"""
+    print("Testing Batch Leases Held Until Flush...")
+    
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "batch_lease_test.db")
+    jq = JobQueue(db_path)
+    Config(db_path).set('worker-lease-seconds', '3')
+    Config(db_path).set('worker-batch-size', '3')
+    jq.enqueue({'id': 'batch_quick', 'command': 'echo quick', 'priority': 2})
+    jq.enqueue({'id': 'batch_slow', 'command': 'sleep 4.5', 'priority': 1})
+    
+    worker = Worker('batch_lease_worker', db_path, os.path.join(tmp_dir, 'locks'))
+    worker._start_heartbeat()
+    try:
+        while worker._process_next_job():
+            pass
+    finally:
+        worker._stop_heartbeat()
+    
+    quick = jq.get_job('batch_quick')
+    expired = [m for m in jq.get_job_metrics('batch_quick') if m['event_type'] == 'lease_expired']
+    if quick['state'] == 'completed' and quick['attempts'] == 1 and not quick['error'] and not expired \
+            and jq.get_job('batch_slow')['state'] == 'completed':
+        print("  PASS: Finished job stayed leased until the batch was flushed")
+        return True
+    else:
+        print(f"  FAIL: state={quick['state']} attempts={quick['attempts']} error={quick['error']} expired={len(expired)}")
+        return False
+
+def test_expired_lease_recovery():
+    """Test that jobs held by a dead worker are requeued once their lease expires"""
+    print("Testing Expired Lease Recovery...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "lease_test.db")
+    jq = JobQueue(db_path)
+    jq.enqueue({'id': 'lease_live', 'command': 'echo live', 'priority': 3})
+    jq.enqueue({'id': 'lease_crashed', 'command': 'echo crashed', 'priority': 2})
+    jq.enqueue({'id': 'lease_exhausted', 'command': 'echo exhausted', 'priority': 1, 'max_retries': 1})
+    
+    live = jq.claim_next_job('live_worker', lease_seconds=1)
+    # Leases that are already in the past stand in for a worker killed mid-job
+    jq.claim_batch('crashed_worker', 2, lease_seconds=-1)
+    renewed = jq.heartbeat([live['id']], 'live_worker', lease_seconds=60)
+    time.sleep(1.1)
+    reaped = jq.reap_expired_leases()
+    
+    live_job = jq.get_job('lease_live')
+    crashed_job = jq.get_job('lease_crashed')
+    exhausted_job = jq.get_job('lease_exhausted')
+    if renewed == 1 and reaped == 2 and live_job['state'] == 'processing' and \
+            crashed_job['state'] == 'pending' and crashed_job['worker_id'] is None and \
+            exhausted_job['state'] == 'dead':
+        print("  PASS: Expired leases requeued, renewed lease kept")
+        return True
+    else:
+        print(f"  FAIL: Reaped {reaped}, states {live_job['state']}, "
+              f"{crashed_job['state']}, {exhausted_job['state']}")
+        return False
+
+def test_reaped_after_failure():
+    """Test that a job reaped after an earlier failed attempt shows the lease expiry"""
+    print("Testing Reaped After Failure...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "reaped_failure_test.db")
+    jq = JobQueue(db_path)
+    jq.enqueue({'id': 'reaped_job', 'command': 'echo boom; exit 1', 'max_retries': 2})
+    
+    jq.claim_batch('first_worker', 1, lease_seconds=60)
+    jq.update_job_state('reaped_job', 'pending', output='boom', error='exit 1: boom')
+    jq.claim_batch('second_worker', 1, lease_seconds=-1)
+    jq.reap_expired_leases()
+    
+    job = jq.get_job('reaped_job')
+    if job['state'] == 'dead' and 'Lease expired' in (job['error'] or '') and \
+            'second_worker' in job['error'] and job['output'] is None:
+        print("  PASS: Lease expiry replaced the earlier attempt's error and output")
+        return True
+    else:
+        print(f"  FAIL: state={job['state']} error={job['error']!r} output={job['output']!r}")
+        return False
+
+def test_stale_results_dropped():
+    """Test that a worker whose lease was reaped can't overwrite the job's new run"""
+    print("Testing Stale Results Dropped...")
+    
+    db_path = os.path.join(tempfile.mkdtemp(), "stale_test.db")
+    jq = JobQueue(db_path)
+    jq.enqueue({'id': 'stale_job', 'command': 'echo stale'})
+    
+    jq.claim_batch('slow_worker', 1, lease_seconds=-1)
+    jq.reap_expired_leases()
+    jq.claim_batch('fresh_worker', 1, lease_seconds=60)
+    
+    skipped = jq.update_job_states([{'id': 'stale_job', 'state': 'completed', 'output': 'stale'}],
+                                   [('stale_job', 'completed', None)], 'slow_worker')
+    job = jq.get_job('stale_job')
+    with get_connection(db_path) as conn:
+        completions = conn.execute("SELECT COUNT(*) FROM job_metrics WHERE job_id = 'stale_job' "
+                                   "AND event_type = 'completed'").fetchone()[0]
+    
+    applied = jq.update_job_states([{'id': 'stale_job', 'state': 'completed'}], None, 'fresh_worker')
+    if skipped == ['stale_job'] and job['state'] == 'processing' and \
+            job['worker_id'] == 'fresh_worker' and completions == 0 and applied == [] and \
+            jq.get_job('stale_job')['state'] == 'completed':
+        print("  PASS: Stale results skipped, lease holder's results applied")
+        return True
+    else:
+        print(f"  FAIL: Skipped {skipped}, job {job['state']} by {job['worker_id']}, "
+              f"{completions} completion metric(s)")
+        return False
+
+def test_worker_wakeup():
+    """Test that an idle worker is woken by enqueue instead of waiting for its next poll"""
+    print("Testing Worker Wakeup...")
+    
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "wakeup_test.db")
+    jq = JobQueue(db_path)
+    Config(db_path).set('worker-wake-timeout', '30')
+    
+    worker = Worker('wakeup_worker', db_path, os.path.join(tmp_dir, 'locks'))
+    thread = threading.Thread(target=worker.start, daemon=True)
+    thread.start()
+    time.sleep(1)  # Let the worker go idle
+    
+    start_time = time.time()
+    jq.enqueue({'id': 'wakeup_job', 'command': 'echo wakeup'})
+    while time.time() - start_time < 10 and jq.get_job('wakeup_job')['state'] != 'completed':
+        time.sleep(0.01)
+    elapsed = time.time() - start_time
+    worker.stop()
+    
+    if os.name == 'nt':
+        print("  SKIP: Wakeup sockets need Unix domain sockets")
+        return True
+    if jq.get_job('wakeup_job')['state'] == 'completed' and elapsed < 1:
+        print(f"  PASS: Idle worker picked up new job in {elapsed * 1000:.0f}ms")
+        return True
+    else:
+        print(f"  FAIL: Job not completed promptly ({elapsed:.1f}s)")
+        return False
+
+def test_daemon_control_socket():
+    """Test that CLI-side clients reach the daemon's queue and worker pool over its socket"""
+    print("Testing Daemon Control Socket...")
+    
+    if os.name == 'nt':
+        print("  SKIP: The daemon needs Unix domain sockets")
+        return True
+    
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "daemon_test.db")
+    daemon = QueueDaemon(db_path)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    
+    client = None
+    deadline = time.time() + 10
+    while client is None and time.time() < deadline:
+        client = connect(db_path)
+        time.sleep(0.05)
+    if client is None:
+        print("  FAIL: Daemon did not come up")
+        return False
+    
+    job_queue = RemoteObject(client, 'job_queue')
+    job_queue.enqueue({'id': 'daemon_job', 'command': 'echo daemon'}, force_replace=False)
+    try:
+        job_queue.enqueue({'id': 'daemon_job', 'command': 'echo daemon'})
+        duplicate_rejected = False
+    except ValueError:
+        duplicate_rejected = True  # Same exception type as a local JobQueue
+    try:
+        client.call('job_queue.__init__')
+        unknown_rejected = False
+    except DaemonError:
+        unknown_rejected = True
+    try:
+        QueueDaemon(db_path).bind()
+        second_refused = False
+    except RuntimeError:
+        second_refused = True
+    
+    pending = job_queue.get_status()['pending']
+    workers = client.call('worker_manager.get_active_worker_count')
+    client.call('daemon.shutdown')
+    thread.join(timeout=30)
+    
+    if pending == 1 and workers == 0 and duplicate_rejected and unknown_rejected \
+            and second_refused and not thread.is_alive() and not os.path.exists(control_path(db_path)):
+        print("  PASS: Daemon served queue and worker calls and shut down cleanly")
+        return True
+    else:
+        print(f"  FAIL: pending={pending} workers={workers} duplicate_rejected={duplicate_rejected} "
+              f"unknown_rejected={unknown_rejected} second_refused={second_refused} alive={thread.is_alive()}")
+        return False
+
+def test_daemon_client_retries():
+    """Test that daemon calls are only retried when the request never reached the daemon"""
+    print("Testing Daemon Client Retries...")
+    
+    if os.name == 'nt':
+        print("  SKIP: The daemon needs Unix domain sockets")
+        return True
+    
+    import socket
+    from src.daemon import DaemonClient
+    
+    tmp_dir = tempfile.mkdtemp()
+    path = os.path.join(tmp_dir, 'fake.ctl')
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen(8)
+    received = []
+    
+    def serve(connections):
+        # Each connection handles requests per its list of behaviours, then closes
+        for behaviours in connections:
+            conn, _ = listener.accept()
+            reader = conn.makefile('rb')
+            for behaviour in behaviours:
+                line = reader.readline()
+                if not line:
+                    break
+                received.append(behaviour)
+                if behaviour == 'answer':
+                    request = json.loads(line)
+                    conn.sendall(json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': 'ok'}).encode()
+                                 + b'\n')
+                elif behaviour == 'hang':
+                    time.sleep(1.5)
+            reader.close()
+            conn.close()
+    
+    def client_call(client):
+        try:
+            return client.call('job_queue.enqueue', {'id': 'once'})
+        except OSError as e:
+            return e
+    
+    server = threading.Thread(target=serve, args=([['answer'], ['answer', 'drop'], ['hang']],), daemon=True)
+    server.start()
+    client = DaemonClient(os.path.join(tmp_dir, 'unused.db'), timeout=0.5)
+    client.path = path
+    first = client_call(client)
+    time.sleep(0.2)  # The daemon closes the first connection, as after a restart
+    stale = client_call(client)  # Stale socket: nothing sent, so reconnects
+    dropped = client_call(client)  # Closed after reading the request: not retried
+    timed_out = client_call(client)  # No answer in time: not retried
+    client.close()
+    server.join(timeout=5)
+    listener.close()
+    
+    if first == 'ok' and stale == 'ok' and isinstance(dropped, ConnectionResetError) \
+            and isinstance(timed_out, socket.timeout) \
+            and received == ['answer', 'answer', 'drop', 'hang']:
+        print("  PASS: Stale connections reconnected; sent requests never repeated")
+        return True
+    else:
+        print(f"  FAIL: first={first} stale={stale} dropped={dropped} timed_out={timed_out} received={received}")
+        return False
+
+def test_daemon_pool_stays_up():
+    """Test that a daemon's fixed-size pool keeps its workers while the queue is empty"""
+    print("Testing Daemon Pool Stays Up...")
+    
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "pool_test.db")
+    job_queue = JobQueue(db_path)
+    daemon_owned = QueueDaemon(db_path).worker_manager.exit_when_idle is False
+    
+    manager = WorkerManager(job_queue, db_path, os.path.join(tmp_dir, "locks"), exit_when_idle=False)
+    try:
+        manager.start(2)
+        deadline = time.time() + 3
+        while time.time() < deadline:
+            manager.supervise()
+            time.sleep(0.1)
+        idle_workers = manager.get_active_worker_count()
+        job_queue.enqueue({'id': 'pool_job', 'command': 'echo pool'})
+        deadline = time.time() + 10
+        while job_queue.get_job('pool_job')['state'] != 'completed' and time.time() < deadline:
+            time.sleep(0.1)
+        state = job_queue.get_job('pool_job')['state']
+    finally:
+        manager.stop_all()
+    
+    if daemon_owned and idle_workers == 2 and state == 'completed':
+        print("  PASS: Idle workers stayed up and picked up new jobs")
+        return True
+    else:
+        print(f"  FAIL: daemon_owned={daemon_owned} idle_workers={idle_workers} state={state}")
+        return False
+
+def test_worker_autoscaling():
+    """Test that the pool follows queue depth, shrinking only after sustained idle time"""
+    print("Testing Worker Autoscaling...")
+
+    # Policy: grow at once, shrink one at a time after idle_seconds of surplus
+    scaler = Autoscaler(1, 4, jobs_per_worker=2, max_wait=5.0, idle_seconds=10.0)
+    decisions = [
+        scaler.target(1, ready=7, processing=0, oldest_wait=0.0, now=0.0),   # ceil(7/2) = 4
+        scaler.target(4, ready=20, processing=4, oldest_wait=60.0, now=1.0),  # Capped at max
+        scaler.target(4, ready=0, processing=1, oldest_wait=0.0, now=2.0),   # Surplus starts
+        scaler.target(4, ready=0, processing=1, oldest_wait=0.0, now=8.0),   # Not idle long enough
+        scaler.target(4, ready=0, processing=1, oldest_wait=0.0, now=12.0),  # One worker removed
+        scaler.target(3, ready=1, processing=3, oldest_wait=9.0, now=13.0),  # All busy, job waited too long
+        scaler.target(4, ready=1, processing=1, oldest_wait=9.0, now=14.0),  # Idle workers will take it
+        scaler.target(1, ready=0, processing=0, oldest_wait=0.0, now=100.0), # Never below min
+    ]
+    expected = [4, 4, 4, 4, 3, 4, 4, 1]
+    if decisions != expected:
+        print(f"  FAIL: Decisions {decisions}, expected {expected}")
+        return False
+
+    # Manager: a backlog of three jobs scales an empty pool up and records the decision
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "autoscale_test.db")
+    job_queue = JobQueue(db_path)
+    Config(db_path).set('autoscale-jobs-per-worker', '1')
+    for i in range(3):
+        job_queue.enqueue({'id': f'scale_{i}', 'command': 'sleep 1'})
+
+    manager = WorkerManager(job_queue, db_path, os.path.join(tmp_dir, "locks"))
+    try:
+        manager.start(0, max_count=3)
+        scaled_to = manager.autoscale()
+        deadline = time.time() + 20
+        while job_queue.get_status()['completed'] < 3 and time.time() < deadline:
+            time.sleep(0.2)
+        workers_after_jobs = manager.get_active_worker_count()  # Idle workers stay up
+    finally:
+        manager.stop_all()
+
+    with get_connection(db_path) as conn:
+        recorded = [row[0] for row in conn.execute(
+            "SELECT metric_value FROM system_metrics WHERE metric_name = 'autoscale_up'"
+        )]
+    completed = job_queue.get_status()['completed']
+
+    if scaled_to == 3 and completed == 3 and workers_after_jobs == 3 and recorded == [3.0]:
+        print("  PASS: Pool scaled with the backlog and logged its decisions")
+        return True
+    else:
+        print(f"  FAIL: scaled_to={scaled_to} completed={completed} "
+              f"workers_after_jobs={workers_after_jobs} recorded={recorded}")
+        return False
+
+def test_worker_supervised_restarts():
+    """Test that recycled and crashed workers are replaced in their slot"""
+    print("Testing Supervised Worker Restarts...")
+
+    if os.name == 'nt':
+        print("  SKIP: Needs SIGKILL to simulate a crash")
+        return True
+
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "restart_test.db")
+    job_queue = JobQueue(db_path)
+    config = Config(db_path)
+    config.set('worker-max-jobs', '2')
+    config.set('worker-restart-backoff', '0.2')
+    for i in range(5):
+        job_queue.enqueue({'id': f'recycle_{i}', 'command': 'echo recycle'})
+
+    manager = WorkerManager(job_queue, db_path, os.path.join(tmp_dir, "locks"))
+    try:
+        manager.start(1)
+        deadline = time.time() + 30
+        while job_queue.get_status()['completed'] < 5 and time.time() < deadline:
+            manager.supervise()
+            time.sleep(0.1)
+        completed = job_queue.get_status()['completed']
+        spawned_for_jobs = manager._spawned  # The first worker plus one per recycle
+
+        os.kill(manager.workers[0].pid, signal.SIGKILL)
+        manager.workers[0].join(timeout=5)
+        restarted = None
+        deadline = time.time() + 10
+        while restarted is None and time.time() < deadline:
+            manager.supervise()
+            statuses = manager.get_worker_status()
+            if manager._spawned > spawned_for_jobs and statuses:
+                restarted = next(iter(statuses.values()))
+            time.sleep(0.1)
+    finally:
+        manager.stop_all()
+
+    if completed == 5 and spawned_for_jobs == 3 and restarted \
+            and restarted['slot'] == 0 and restarted['crashes'] == 1:
+        print("  PASS: Recycled after max jobs and restarted after a crash")
+        return True
+    else:
+        print(f"  FAIL: completed={completed} spawned_for_jobs={spawned_for_jobs} restarted={restarted}")
+        return False
+
+def test_async_worker_leased_ids():
+    """Test that the async worker's heartbeat snapshot covers running and unflushed jobs"""
+    print("Testing Async Worker Leased IDs...")
+
+    from src.async_worker import AsyncWorker
+
+    tmp_dir = tempfile.mkdtemp()
+    worker = AsyncWorker('leased_worker', os.path.join(tmp_dir, "leased_test.db"),
+                         os.path.join(tmp_dir, "locks"), concurrency=4)
+    errors = []
+    stop = threading.Event()
+
+    def snapshot():
+        while not stop.is_set():
+            try:
+                worker._leased_job_ids()
+            except Exception as e:
+                errors.append(e)
+                return
+
+    # The heartbeat thread snapshots while the loop adds and removes running jobs
+    thread = threading.Thread(target=snapshot)
+    thread.start()
+    for i in range(20000):
+        with worker._leases_lock:
+            worker._running[f'churn_{i}'] = None
+        if i >= 10:
+            with worker._leases_lock:
+                del worker._running[f'churn_{i - 10}']
+    stop.set()
+    thread.join()
+
+    with worker._leases_lock:
+        worker._running = {'running_job': None}
+    worker._record_update('finished_job', 'completed')
+    leased = worker._leased_job_ids()
+    if not errors and leased == ['running_job', 'finished_job']:
+        print("  PASS: Snapshots taken safely and include finished jobs awaiting flush")
+        return True
+    else:
+        print(f"  FAIL: errors={errors} leased={leased}")
+        return False
+
+def test_async_worker_concurrency():
+    """Test that one async worker process runs many jobs at once with per-job timeouts"""
+    print("Testing Async Worker Concurrency...")
+
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "async_test.db")
+    job_queue = JobQueue(db_path)
+    job_queue.enqueue_many({'id': f'async_{i}', 'command': 'sleep 1 && echo done'} for i in range(20))
+    job_queue.enqueue({'id': 'async_timeout', 'command': 'sleep 30', 'timeout_seconds': 1, 'max_retries': 1})
+    job_queue.enqueue({'id': 'async_fail', 'command': 'exit 3', 'max_retries': 1})
+
+    start = time.time()
+    process = multiprocessing.Process(
+        target=worker_process, args=('async_worker', db_path, os.path.join(tmp_dir, "locks"), False, 25)
+    )
+    process.start()
+    deadline = start + 20
+    status = job_queue.get_status()
+    while (status['completed'] < 20 or status['dead'] < 2) and time.time() < deadline:
+        time.sleep(0.1)
+        status = job_queue.get_status()
+    elapsed = time.time() - start
+    process.terminate()
+    process.join(timeout=10)
+
+    timed_out = job_queue.get_job('async_timeout')
+    outputs = {job_queue.get_job_output(job['id'])['output'] for job in job_queue.list_jobs('completed')}
+    # Twenty one-second jobs one at a time would take 20s
+    if status['completed'] == 20 and status['dead'] == 2 and elapsed < 8 and outputs == {'done'} \
+            and 'timed out' in (timed_out['error'] or '') and process.exitcode == 0:
+        print(f"  PASS: 20 concurrent jobs finished in {elapsed:.1f}s; timeout and failure recorded")
+        return True
+    else:
+        print(f"  FAIL: status={status} elapsed={elapsed:.1f}s outputs={outputs} "
+              f"timeout_error={timed_out['error']!r} exitcode={process.exitcode}")
+        return False
+
+def test_output_spill():
+    """Test that large job output is truncated in the row and spilled to a gzip file"""
+    print("Testing Output Spill...")
+
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "spill_test.db")
+    job_queue = JobQueue(db_path)
+    Config(db_path).set('output-preview-bytes', '1024')
+    expected = ''.join(f"{i}\n" for i in range(1, 100001))
+
+    ok = True
+    for concurrency in (1, 4):
+        job_queue.enqueue_many([
+            {'id': f'big_{concurrency}', 'command': 'seq 1 100000'},
+            {'id': f'small_{concurrency}', 'command': 'echo small'},
+            {'id': f'big_fail_{concurrency}', 'command': 'seq 1 100000; exit 1', 'max_retries': 1}
+        ])
+        process = multiprocessing.Process(
+            target=worker_process, args=('spill_worker', db_path, os.path.join(tmp_dir, "locks"), False, concurrency)
+        )
+        process.start()
+        deadline = time.time() + 20
+        while time.time() < deadline and [job_queue.get_job(f'{name}_{concurrency}')['state']
+                                          for name in ('big', 'small', 'big_fail')] != ['completed', 'completed', 'dead']:
+            time.sleep(0.1)
+        process.terminate()
+        process.join(timeout=10)
+
+        big = job_queue.get_job(f'big_{concurrency}')
+        small = job_queue.get_job(f'small_{concurrency}')
+        with gzip.open(big['output_path'], 'rt') as f:
+            spilled = f.read()
+        if not (big['state'] == 'completed' and spilled == expected and 'bytes omitted' in big['output']
+                and len(big['output']) < 1200 and big['output'].startswith('1\n2\n')
+                and big['output'].endswith('99999\n100000')):
+            print(f"  FAIL: concurrency {concurrency}: big output not spilled correctly ({big['output'][:80]!r})")
+            ok = False
+        if small['output'] != 'small' or small['output_path'] is not None:
+            print(f"  FAIL: concurrency {concurrency}: small output {small['output']!r} path {small['output_path']!r}")
+            ok = False
+        if job_queue.get_job(f'big_fail_{concurrency}')['output_path'] is not None:
+            print(f"  FAIL: concurrency {concurrency}: failed job kept a spill file")
+            ok = False
+
+    spool = os.path.join(tmp_dir, "spill_test-spool")
+    job_queue.delete_job('big_1')
+    if ok and len(os.listdir(spool)) == 1:
+        print("  PASS: Output over the preview limit spilled to gzip; small and failed jobs use no file")
+        return True
+    print(f"  FAIL: spool contents after delete: {os.listdir(spool)}")
+    return False
+
+
+def test_exec_jobs():
+    """Test that argv jobs run without a shell, with their own env and cwd"""
+    print("Testing Exec Jobs...")
+
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "exec_test.db")
+    job_queue = JobQueue(db_path)
+
+    ok = True
+    for concurrency in (1, 4):
+        job_queue.enqueue_many([
+            # Shell metacharacters are passed through literally
+            {'id': f'argv_{concurrency}', 'exec': ['printf', '%s|', 'a b', '$HOME', '*;']},
+            {'id': f'env_{concurrency}', 'exec': ['sh', '-c', 'echo "$JOB_VAR $(pwd)"'],
+             'env': {'JOB_VAR': 'set'}, 'cwd': tmp_dir},
+            {'id': f'missing_{concurrency}', 'exec': ['no-such-program-queuectl'], 'max_retries': 1}
+        ])
+        process = multiprocessing.Process(
+            target=worker_process, args=('exec_worker', db_path, os.path.join(tmp_dir, "locks"), False, concurrency)
+        )
+        process.start()
+        deadline = time.time() + 20
+        while time.time() < deadline and [job_queue.get_job(f'{name}_{concurrency}')['state']
+                                          for name in ('argv', 'env', 'missing')] != ['completed', 'completed', 'dead']:
+            time.sleep(0.1)
+        process.terminate()
+        process.join(timeout=10)
+
+        argv_job = job_queue.get_job(f'argv_{concurrency}')
+        env_job = job_queue.get_job(f'env_{concurrency}')
+        missing_job = job_queue.get_job(f'missing_{concurrency}')
+        if argv_job['output'] != 'a b|$HOME|*;|' or argv_job['command'] != "printf '%s|' 'a b' '$HOME' '*;'" \
+                or env_job['output'] != f'set {os.path.realpath(tmp_dir)}' or missing_job['state'] != 'dead':
+            print(f"  FAIL: concurrency {concurrency}: argv={argv_job['output']!r} env={env_job['output']!r} "
+                  f"missing={missing_job['state']}")
+            ok = False
+
+    if ok:
+        print("  PASS: Exec jobs ran without a shell in both worker modes")
+    return ok
+
+
+def test_callable_jobs():
+    """Test that Python callable jobs run in the worker's process pool"""
+    print("Testing Callable Jobs...")
+
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "callable_test.db")
+    job_queue = JobQueue(db_path)
+
+    ok = True
+    for concurrency in (1, 4):
+        job_queue.enqueue_many([
+            {'id': f'call_{concurrency}_{i}', 'callable': 'json:loads', 'args': [f'{{"n": {i}}}']}
+            for i in range(20)
+        ] + [
+            {'id': f'raise_{concurrency}', 'callable': 'operator:truediv', 'args': [1, 0], 'max_retries': 1},
+            {'id': f'slow_{concurrency}', 'callable': 'time:sleep', 'args': [30],
+             'timeout_seconds': 1, 'max_retries': 1, 'priority': 10}
+        ])
+        process = multiprocessing.Process(
+            target=worker_process, args=('callable_worker', db_path, os.path.join(tmp_dir, "locks"), False, concurrency)
+        )
+        process.start()
+        ids = [f'call_{concurrency}_{i}' for i in range(20)]
+        deadline = time.time() + 30
+        while time.time() < deadline and (
+                any(job_queue.get_job(job_id)['state'] != 'completed' for job_id in ids) or
+                job_queue.get_job(f'raise_{concurrency}')['state'] != 'dead' or
+                job_queue.get_job(f'slow_{concurrency}')['state'] != 'dead'):
+            time.sleep(0.1)
+        process.terminate()
+        process.join(timeout=10)
+
+        outputs = [job_queue.get_job_output(job_id)['output'] for job_id in ids]
+        raised = job_queue.get_job(f'raise_{concurrency}')
+        slow = job_queue.get_job(f'slow_{concurrency}')
+        if outputs != [f'{{"n":{i}}}' for i in range(20)] or 'ZeroDivisionError' not in (raised['error'] or '') \
+                or 'timed out' not in (slow['error'] or ''):
+            print(f"  FAIL: concurrency {concurrency}: outputs={outputs[:3]} raised={raised['error']!r} "
+                  f"slow={slow['error']!r}")
+            ok = False
+
+    if ok:
+        print("  PASS: Callable results, exceptions and timeouts recorded in both worker modes")
+    return ok
+
+
+def test_callable_pool_siblings():
+    """Test that callables sharing a pool with a timed out or crashed one aren't failed with it"""
+    print("Testing Callable Pool Siblings...")
+
+    tmp_dir = tempfile.mkdtemp()
+    db_path = os.path.join(tmp_dir, "siblings_test.db")
+    job_queue = JobQueue(db_path)
+
+    ok = True
+    culprits = {
+        'hang': {'callable': 'time:sleep', 'args': [30], 'timeout_seconds': 1},
+        'crash': {'callable': 'os:_exit', 'args': [1]},
+    }
+    for name, culprit in culprits.items():
+        job_queue.enqueue_many([{'id': f'{name}_culprit', 'max_retries': 1, **culprit}] + [
+            {'id': f'{name}_sibling_{i}', 'callable': 'time:sleep', 'args': [2], 'max_retries': 1}
+            for i in range(2)
+        ])
+        process = multiprocessing.Process(
+            target=worker_process, args=('siblings_worker', db_path, os.path.join(tmp_dir, "locks"), False, 4)
+        )
+        process.start()
+        ids = [f'{name}_culprit', f'{name}_sibling_0', f'{name}_sibling_1']
+        deadline = time.time() + 30
+        while time.time() < deadline and any(job_queue.get_job(job_id)['state'] not in ('completed', 'dead')
+                                             for job_id in ids):
+            time.sleep(0.1)
+        process.terminate()
+        process.join(timeout=10)
+
+        jobs = [job_queue.get_job(job_id) for job_id in ids]
+        if jobs[0]['state'] != 'dead' or any(job['state'] != 'completed' or job['attempts'] != 1
+                                             for job in jobs[1:]):
+            print(f"  FAIL: {name}: " + ", ".join(f"{job['id']} {job['state']} after {job['attempts']}"
+                                                  for job in jobs))
+            ok = False
+
+    if ok:
+        print("  PASS: Only the timed out or crashing callable failed")
+    return ok
+
+
 def main():
     """Run all worker tests"""
     print("=== Testing Worker Management ===")
@@ -239,6 +1007,25 @@ def main():
         test_worker_timeout_option,
         test_worker_start_stop,
         test_worker_job_processing,
+        test_atomic_job_claim,
+        test_worker_drain_mode,
+        test_batch_claim_and_release,
+        test_batch_leases_held_until_flush,
+        test_expired_lease_recovery,
+        test_reaped_after_failure,
+        test_stale_results_dropped,
+        test_worker_wakeup,
+        test_daemon_control_socket,
+        test_daemon_client_retries,
+        test_daemon_pool_stays_up,
+        test_worker_autoscaling,
+        test_worker_supervised_restarts,
+        test_async_worker_leased_ids,
+        test_async_worker_concurrency,
+        test_output_spill,
+        test_exec_jobs,
+        test_callable_jobs,
+        test_callable_pool_siblings,
         test_worker_interactive_shell,
         test_worker_daemon_mode,
         test_worker_cron_mode